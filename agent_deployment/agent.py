@@ -1,59 +1,198 @@
+import gzip
+import hashlib
 import json
 import os
 from strands import Agent, tool
 from strands.models import BedrockModel
 from bedrock_agentcore.memory import MemoryClient
-from ddgs import DDGS
-import yfinance as yf
-import pandas as pd
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from botocore.config import Config as BotocoreConfig
-import uuid
+import time
 import boto3
 from botocore.exceptions import NoCredentialsError, ClientError
 from bedrock_agentcore.runtime import BedrockAgentCoreApp
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+import asyncio
+import contextlib
+import contextvars
+import functools
+import tracing
+from lazy_init import LazyModule, LazyObject, resolve
+from model_registry import STAGES as MODEL_STAGES, ModelRegistry, ModelSlots
+from quote_cache import QuoteCache
+from search_cache import SearchCache
+from result_cache import PersistentResultCache, normalise_company_key
+from single_flight import SingleFlight
+from pipeline import AsyncDAGExecutor, Stage
+from report_renderer import personalise_report, render_shared_report
+from prompt_serialiser import parse_section_budgets, serialise_results
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("financial-agent")
 
-app = BedrockAgentCoreApp()
+# Loaded on first use (or by the warm-up) rather than before the runtime can accept requests
+yf = LazyModule("yfinance")
+pd = LazyModule("pandas")
+ddgs = LazyModule("ddgs")
+stock_metrics = LazyModule("stock_metrics")
+
+AGENT_WARMUP = os.environ.get("AGENT_WARMUP", "true").lower() == "true"
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # The warm-up thread loads the deferred modules and clients while the server starts listening
+    if AGENT_WARMUP:
+        threading.Thread(target=warm_up, name="agent-warm-up", daemon=True).start()
+    yield
+
+
+app = BedrockAgentCoreApp(lifespan=lifespan)
 
 region = os.environ.get('AWS_REGION', 'us-east-1')
 S3_BUCKET_NAME = os.environ.get("S3_BUCKET_NAME")
 SESSION_ID = "financial_agent_analysis_session"
 BEDROCK_MODEL_ID = os.environ.get("BEDROCK_MODEL_ID")
-
+OHLCV_STORE_DIR = os.environ.get("OHLCV_STORE_DIR", "/tmp/ohlcv_store")
+OHLCV_RETENTION_DAYS = int(os.environ.get("OHLCV_RETENTION_DAYS", 365))
+OHLCV_REFRESH_SECONDS = int(os.environ.get("OHLCV_REFRESH_SECONDS", 900))
+QUOTE_FAST_TTL_SECONDS = int(os.environ.get("QUOTE_FAST_TTL_SECONDS", 60))
+QUOTE_SLOW_TTL_SECONDS = int(os.environ.get("QUOTE_SLOW_TTL_SECONDS", 21600))
+QUOTE_CACHE_MAX_ENTRIES = int(os.environ.get("QUOTE_CACHE_MAX_ENTRIES", 2048))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("BATCH_MAX_CONCURRENCY", 4))
+SEARCH_NEWS_TTL_SECONDS = int(os.environ.get("SEARCH_NEWS_TTL_SECONDS", 900))
+SEARCH_REFERENCE_TTL_SECONDS = int(os.environ.get("SEARCH_REFERENCE_TTL_SECONDS", 86400))
+SEARCH_CACHE_MAX_BYTES = int(os.environ.get("SEARCH_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+BUSINESS_MODEL_MAX_AGE_DAYS = int(os.environ.get("BUSINESS_MODEL_MAX_AGE_DAYS", 30))
+REPORT_LLM_COMMENTARY = os.environ.get("REPORT_LLM_COMMENTARY", "false").lower() == "true"
+ANALYSIS_MAX_CONCURRENCY = int(os.environ.get("ANALYSIS_MAX_CONCURRENCY", 8))
+ANALYSIS_IO_THREADS = int(os.environ.get("ANALYSIS_IO_THREADS", 32))
+TRACE_EXPORT_PATH = os.environ.get("TRACE_EXPORT_PATH")
+TRACE_EXPORT_FORMAT = os.environ.get("TRACE_EXPORT_FORMAT", "jsonl")
+PROMPT_SECTION_BUDGETS = parse_section_budgets(os.environ.get("PROMPT_SECTION_BUDGETS", ""))
+ANALYSIS_REUSE_MAX_AGE_SECONDS = int(os.environ.get("ANALYSIS_REUSE_MAX_AGE_SECONDS", 21600))
+ANALYSIS_REUSE_MAX_PRICE_MOVE_PERCENT = float(os.environ.get("ANALYSIS_REUSE_MAX_PRICE_MOVE_PERCENT", 1.0))
+ANALYSIS_COALESCE_WAIT_SECONDS = int(os.environ.get("ANALYSIS_COALESCE_WAIT_SECONDS", 300))
+BEDROCK_PROMPT_CACHE = os.environ.get("BEDROCK_PROMPT_CACHE", "default")
+MODEL_ROUTING_CONFIG = os.environ.get("MODEL_ROUTING_CONFIG")
+STAGE_MODEL_IDS = os.environ.get("STAGE_MODEL_IDS", "")
+STAGE_MAX_TOKENS = os.environ.get("STAGE_MAX_TOKENS", "")
+MODEL_MAX_CONCURRENCY = os.environ.get("MODEL_MAX_CONCURRENCY", "")
+MODEL_DEFAULT_MAX_CONCURRENCY = int(os.environ.get("MODEL_DEFAULT_MAX_CONCURRENCY", 16))
+MODEL_MAX_REQUESTS_PER_SECOND = os.environ.get("MODEL_MAX_REQUESTS_PER_SECOND", "")
+# 0: model ids without a known quota are not paced until Bedrock throttles them
+MODEL_DEFAULT_MAX_REQUESTS_PER_SECOND = float(os.environ.get("MODEL_DEFAULT_MAX_REQUESTS_PER_SECOND", 0))
+MODEL_RETRY_BUDGET_SECONDS = float(os.environ.get("MODEL_RETRY_BUDGET_SECONDS", 120))
+
+# Throttled calls are paced and retried by the model registry's rate limiters, not by botocore
 boto_config = BotocoreConfig(
     retries={"max_attempts": 1, "mode": "standard"},
     connect_timeout=5,
     read_timeout=900
 )
 
-model = BedrockModel(
-    model_id=BEDROCK_MODEL_ID,
-    region_name=region,
-    boto_client_config=boto_config
+
+def build_bedrock_model(model_id, max_tokens=None):
+    return BedrockModel(
+        model_id=model_id,
+        region_name=region,
+        boto_client_config=boto_config,
+        # Prompt cache checkpoints after the tools and the static system prompt of every agent (see AgentConfig)
+        cache_prompt=BEDROCK_PROMPT_CACHE or None,
+        cache_tools=BEDROCK_PROMPT_CACHE or None,
+        **({"max_tokens": max_tokens} if max_tokens else {})
+    )
+
+
+# The clients are built on first use: each loads its botocore service model and credentials
+model = LazyObject(lambda: build_bedrock_model(BEDROCK_MODEL_ID))
+
+
+def build_stage_model(model_id, max_tokens):
+    # Stages on the default route share the process-wide model and its client
+    if model_id == BEDROCK_MODEL_ID and not max_tokens:
+        return model
+    return LazyObject(lambda: build_bedrock_model(model_id, max_tokens))
+
+
+# Model id, max tokens, concurrency slots and rate limiter of every LLM stage (see model_registry.py)
+model_registry = ModelRegistry.from_config(
+    build_stage_model,
+    default_model_id=BEDROCK_MODEL_ID,
+    config_path=MODEL_ROUTING_CONFIG,
+    stage_models=STAGE_MODEL_IDS,
+    stage_max_tokens=STAGE_MAX_TOKENS,
+    model_max_concurrency=MODEL_MAX_CONCURRENCY,
+    default_max_concurrency=MODEL_DEFAULT_MAX_CONCURRENCY,
+    model_max_requests_per_second=MODEL_MAX_REQUESTS_PER_SECOND,
+    default_max_requests_per_second=MODEL_DEFAULT_MAX_REQUESTS_PER_SECOND,
+    retry_budget_seconds=MODEL_RETRY_BUDGET_SECONDS
+)
+
+memory_client = LazyObject(lambda: MemoryClient(region_name=region))
+
+s3_client = LazyObject(lambda: boto3.client("s3", region_name=region))
+
+# Upper bound on analyses in flight at once, shared by the runtime's loop, batches and the blocking facades
+analysis_slots = ModelSlots(ANALYSIS_MAX_CONCURRENCY)
+
+# Process-wide worker threads for the blocking yfinance, memory and S3 calls of the async pipeline
+io_executor = ThreadPoolExecutor(max_workers=ANALYSIS_IO_THREADS, thread_name_prefix="agent-io")
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    Runs a blocking call on the shared I/O thread pool without blocking the event loop.
+    """
+
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(io_executor, lambda: context.run(fn, *args, **kwargs))
+
+
+# Per-request traces of every stage, tool call and agent invocation, plus p50/p95/p99 histograms
+tracer = tracing.Tracer(
+    exporters=[tracing.JsonLinesExporter(TRACE_EXPORT_PATH, format=TRACE_EXPORT_FORMAT)] if TRACE_EXPORT_PATH else []
+)
+
+
+business_model_cache = PersistentResultCache(
+    s3_client=s3_client,
+    bucket_name=S3_BUCKET_NAME,
+    prefix="business-model-cache",
+    max_age_seconds=BUSINESS_MODEL_MAX_AGE_DAYS * 86400
+)
+
+# Shared analyses by ticker and trading session, reused while the price has barely moved
+analysis_index = PersistentResultCache(
+    s3_client=s3_client,
+    bucket_name=S3_BUCKET_NAME,
+    prefix="analysis-result-index",
+    max_age_seconds=ANALYSIS_REUSE_MAX_AGE_SECONDS
 )
 
-memory_client = MemoryClient(region_name=region)
+# Analyses being computed, keyed like the index: concurrent requests for the same ticker attach
+# to the running analysis and receive its index entry (None when it failed)
+analysis_flights = SingleFlight()
 
-s3_client = boto3.client("s3", region_name=region)
 
+def upload_to_s3(body, bucket_name, s3_key_upload, **object_args):
+    """
+    Uploads the bytes straight from memory with put_object; object_args are passed through
+    (ContentType, ContentEncoding, ...).
+    """
 
-def upload_to_s3(file_path, bucket_name, s3_key_upload):
     try:
-        s3_client.upload_file(
-            file_path,
-            bucket_name,
-            s3_key_upload,
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=s3_key_upload,
+            Body=body,
+            **object_args
         )
-        logger.info(f"✅ Successfully uploaded '{file_path}' to 's3://{bucket_name}/{s3_key_upload}'")
+        logger.info(f"✅ Successfully uploaded {len(body)} bytes to 's3://{bucket_name}/{s3_key_upload}'")
         return True
-    except FileNotFoundError:
-        logger.info("❌ The file was not found.")
-        return False
     except NoCredentialsError:
         logger.info("❌ AWS credentials not available.")
         return False
@@ -64,20 +203,76 @@ def upload_to_s3(file_path, bucket_name, s3_key_upload):
 
 class MemoryInstance:
 
+    # Memory id resolved once per process and shared by every request
+    _resolved_memory_id = None
+    _resolve_lock = threading.Lock()
+
     def __init__(self):
         self.memory_name = "FinanceAgentMemory"
 
     def list_memory_instances(self):
-        memories_data = memory_client.list_memories()
-        memory_data = []
-        if memories_data:
-            memory_data = [memory for memory in memories_data if memory.get('id').startswith(self.memory_name)]
+        """
+        Pages through all memory resources in the account and returns the id of the first one
+        created for this agent, or None.
+        """
+
+        next_token = None
+        while True:
+            params = {"maxResults": 100}
+            if next_token:
+                params["nextToken"] = next_token
+
+            response = memory_client.gmcp_client.list_memories(**params)
+
+            for memory in response.get("memories", []):
+                memory_id = memory.get("id") or memory.get("memoryId")
+                if memory_id and memory_id.startswith(self.memory_name):
+                    return memory_id
+
+            next_token = response.get("nextToken")
+            if not next_token:
+                return None
 
-        if memory_data:
-            memory_id = memory_data[0].get('memoryId')
+    def resolve_memory_id(self):
+        """
+        Returns the process-wide memory id, looking it up (or creating the memory) on first use.
+        The lock makes concurrent first requests share one lookup instead of racing to create
+        duplicate memories.
+        """
+
+        memory_id = MemoryInstance._resolved_memory_id
+        if memory_id:
             return memory_id
-        else:
-            return None
+
+        with MemoryInstance._resolve_lock:
+            if not MemoryInstance._resolved_memory_id:
+                memory_id = self.list_memory_instances()
+                if not memory_id:
+                    # Initialise Memory
+                    memory_id = self.create_memory_instance()
+                MemoryInstance._resolved_memory_id = memory_id
+                logger.info(f"✅ Resolved memory id: {memory_id}")
+
+            return MemoryInstance._resolved_memory_id
+
+    def invalidate_memory_id(self, memory_id):
+        with MemoryInstance._resolve_lock:
+            if MemoryInstance._resolved_memory_id == memory_id:
+                MemoryInstance._resolved_memory_id = None
+
+    def _with_memory_id(self, memory_id, fn):
+        """
+        Calls fn(memory_id); when the memory no longer exists, re-resolves the id and retries once.
+        """
+
+        try:
+            return fn(memory_id)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "ResourceNotFoundException":
+                raise
+            logger.info(f"⚠️ Memory {memory_id} not found, resolving memory id again")
+            self.invalidate_memory_id(memory_id)
+            return fn(self.resolve_memory_id())
 
     def create_memory_instance(self):
         try:
@@ -92,6 +287,10 @@ class MemoryInstance:
 
             return memory_id
         except Exception as e:
+            if "already exists" in str(e):
+                # Another instance created it after our lookup
+                logger.info(f"⚠️ Memory {self.memory_name} already exists, looking it up again")
+                return self.list_memory_instances()
             logger.info(f"❌ ERROR while creating Memory: {e}")
             return None
 
@@ -111,13 +310,13 @@ class MemoryInstance:
 
             current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            memory_client.create_event(
-                memory_id=memory_id,
+            self._with_memory_id(memory_id, lambda resolved_memory_id: memory_client.create_event(
+                memory_id=resolved_memory_id,
                 actor_id=ACTOR_ID,
                 session_id=SESSION_ID,
                 messages=[(f"Interaction At: {current_datetime} (UTC) \n\n Stock Name: {share_name}",
                            "assistant")]
-            )
+            ))
             logger.info("✅ Summary data saved to memory successfully.")
         except Exception as e:
             logger.info(f"⚠️ Could not save summary to memory: {e}")
@@ -131,64 +330,211 @@ class MemoryInstance:
                 return
 
             # Load the last 5 conversation turns from memory
-            recent_turns = memory_client.get_last_k_turns(
-                memory_id=memory_id,
+            recent_turns = self._with_memory_id(memory_id, lambda resolved_memory_id: memory_client.get_last_k_turns(
+                memory_id=resolved_memory_id,
                 actor_id=ACTOR_ID,
                 session_id=SESSION_ID,
                 k=5,
                 max_results=5
-            )
+            ))
 
             if recent_turns:
-                # Format conversation history for context
-                context_messages = []
+                # Interaction texts, e.g. "Interaction At: <datetime> (UTC) \n\n Stock Name: <name>"
+                interactions = []
                 for turn in recent_turns:
-                    for index, message in enumerate(turn):
-                        content = message['content']['text']
-                        context_messages.append(f"{index + 1}) {content}")
+                    for message in turn:
+                        interactions.append(message['content']['text'])
 
-                # context = "\n".join(context_messages)
                 logger.info(f"✅ Loaded {len(recent_turns)} conversation turns")
-                return f"\n\nRecent conversation:\n{context_messages}"
+                return interactions
 
         except Exception as e:
             logger.info(f"Memory load error: {e}")
 
 
-@tool
-def get_previous_months_stock_data(ticker_symbol):
+def download_stock_history(ticker_symbol, start_date, end_date):
     """
-    Fetches last 3 months of daily stock data (Open, High, Low, Close, Volume)
-    using Yahoo Finance.
+    Downloads daily OHLCV bars for the ticker from Yahoo Finance between start_date
+    (inclusive) and end_date (exclusive).
     """
 
-    # Define time range
-    end_date = datetime.today()
-    start_date = end_date - timedelta(days=90)
-
-    # Fetch data
-    data = yf.download(ticker_symbol, start=start_date, end=end_date, interval="1d")
+    data = yf.download(ticker_symbol, start=start_date, end=end_date, interval="1d", progress=False)
 
-    if data.empty:
-        logger.info(f"No data found for {ticker_symbol}")
+    if data is None or data.empty:
         return None
 
     if isinstance(data.columns, pd.MultiIndex):
         data.columns = [col[0] for col in data.columns]
 
-    # Reset index to make 'Date' a column
-    data.reset_index(inplace=True)
+    return data
 
-    # Keep only useful columns
-    data = data[["Date", "Open", "High", "Low", "Close", "Volume"]]
 
-    # Convert Timestamp to ISO string (for JSON)
-    data["Date"] = data["Date"].astype(str)
+def build_ohlcv_store():
+    from ohlcv_store import OHLCVStore
+
+    return OHLCVStore(
+        downloader=download_stock_history,
+        root_dir=OHLCV_STORE_DIR,
+        retention_days=OHLCV_RETENTION_DAYS,
+        refresh_seconds=OHLCV_REFRESH_SECONDS
+    )
 
-    # Convert to JSON (list of dicts)
-    json_data = data.to_dict(orient="records")
 
-    return json_data
+ohlcv_store = LazyObject(build_ohlcv_store)
+
+
+def fetch_stock_history(ticker_symbol, days=90):
+    """
+    Returns the last `days` of daily OHLCV data for the ticker as a DataFrame
+    indexed by Date, served from the local OHLCV store. Returns None when
+    Yahoo Finance has no data.
+    """
+
+    data = ohlcv_store.get_window(ticker_symbol, days=days)
+
+    if data is None:
+        logger.info(f"No data found for {ticker_symbol}")
+        return None
+
+    return data
+
+
+def batch_technical_metrics(ticker_symbols, days=90):
+    """
+    Downloads the daily OHLCV history of all tickers in one bulk Yahoo Finance call and
+    computes their technical metrics in a single vectorized pass.
+    Returns a dict of ticker -> metrics dict (None when a ticker has no data).
+    """
+
+    end_date = datetime.today()
+    start_date = end_date - timedelta(days=days)
+
+    data = yf.download(tickers=ticker_symbols, start=start_date, end=end_date, interval="1d",
+                       group_by="column", progress=False)
+
+    if data is None or data.empty:
+        logger.info(f"No data found for {ticker_symbols}")
+        return {ticker_symbol: None for ticker_symbol in ticker_symbols}
+
+    closes = data["Close"].reindex(columns=ticker_symbols)
+    volumes = data["Volume"].reindex(columns=ticker_symbols)
+
+    return stock_metrics.compute_batch_metrics(closes, volumes)
+
+
+def technical_metrics_task(ticker_symbol, stock_history=None):
+    """
+    Computes the deterministic 3-month technical metrics (percent change, volatility,
+    trend, drawdown, stability) for the ticker from its OHLCV history, fetching the
+    history when it is not passed in.
+    """
+
+    try:
+        if stock_history is None:
+            stock_history = fetch_stock_history(ticker_symbol)
+        return stock_metrics.compute_stock_metrics(stock_history)
+    except Exception as e:
+        logger.info(f"Error computing technical metrics for {ticker_symbol}: {e}")
+        return None
+
+
+def agent_response_text(response):
+    if response:
+        return response.message.get('content')[0].get('text')
+    else:
+        return None
+
+
+def record_agent_usage(span, response):
+    """
+    Adds the token usage of an agent invocation (all model calls of its event loop) to its span.
+    """
+
+    if response is None:
+        return
+    usage = response.metrics.accumulated_usage
+    tracing.record_tokens(usage)
+    span.set(model_calls=response.metrics.cycle_count or None,
+             tool_calls=sum(tool.call_count for tool in response.metrics.tool_metrics.values()) or None)
+
+
+async def run_agent_async(agent, prompt):
+    """
+    Invokes the agent on the running event loop and returns the text of its final message (None on failure).
+    """
+
+    response = None
+    with tracing.span(agent.name, "agent") as span:
+        try:
+            response = await agent.invoke_async(prompt)
+        except Exception as e:
+            logger.info(e)
+            span.set(error=str(e))
+
+        record_agent_usage(span, response)
+
+    return agent_response_text(response)
+
+
+def current_datetime():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class AgentConfig:
+    """
+    The per-process definition of a stage's agent: its name, model routing stage (see
+    model_registry), tools and static system prompt.
+    Everything that changes per request (date, ticker, data) goes in the user message instead,
+    so the system prompt (and the tools before it) stays a byte-identical prefix that Bedrock can
+    serve from its prompt cache. A fresh Agent is made per invocation because an Agent holds the
+    conversation and usage of its calls.
+    """
+
+    def __init__(self, name, stage, system_prompt, tools=(), **agent_args):
+        self.name = name
+        self.stage = stage
+        self.system_prompt = system_prompt
+        self.tools = list(tools)
+        self.agent_args = agent_args
+
+    def new_agent(self):
+        return Agent(name=self.name, model=model_registry.model(self.stage), system_prompt=self.system_prompt, tools=list(self.tools),
+                     **self.agent_args)
+
+
+def fetch_quote_info(ticker_symbol):
+    """
+    Fetches the full quote info (price, metadata, analyst targets) from Yahoo Finance.
+    """
+
+    return yf.Ticker(ticker_symbol).info
+
+
+def fetch_quote_fast_fields(ticker_symbol):
+    """
+    Fetches only the fast-moving quote fields using the lightweight `fast_info` lookup.
+    """
+
+    fast_info = yf.Ticker(ticker_symbol).fast_info
+
+    price = fast_info.last_price
+    previous_close = fast_info.previous_close
+
+    return {
+        "regularMarketPrice": price,
+        "regularMarketChangePercent": (price - previous_close) / previous_close * 100 if price and previous_close else None,
+        "dayHigh": fast_info.day_high,
+        "dayLow": fast_info.day_low,
+    }
+
+
+quote_cache = QuoteCache(
+    fetch_full=fetch_quote_info,
+    fetch_fast=fetch_quote_fast_fields,
+    fast_ttl=QUOTE_FAST_TTL_SECONDS,
+    slow_ttl=QUOTE_SLOW_TTL_SECONDS,
+    max_entries=QUOTE_CACHE_MAX_ENTRIES
+)
 
 
 def current_price_bedrock_agent(ticker_symbol):
@@ -197,10 +543,8 @@ def current_price_bedrock_agent(ticker_symbol):
     """
 
     try:
-        # Fetch stock info
-        stock = yf.Ticker(ticker_symbol)
-
-        stock_info = stock.info
+        # Fetch stock info (served from the quote cache when fresh)
+        stock_info = quote_cache.get(ticker_symbol)
 
         # Current price and currency
         price = stock_info.get("regularMarketPrice")
@@ -244,63 +588,33 @@ def current_price_bedrock_agent(ticker_symbol):
         logger.info(f"Error fetching current price for {ticker_symbol}: {e}")
         return None, None
 
+    finally:
+        logger.info(f"Quote cache stats: {quote_cache.stats()}")
 
-def performance_bedrock_agent(ticker_symbol, result):
-    recent_news_sentiment = result.get('stock_related_news')
-    current_price_metrics = result.get('stock_information')
-    company_business_model = result.get('company_business_model_data')
 
-    current_price = current_price_metrics.get('stock_current_price')
-
-    current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    performance_agent = Agent(
-        name="Performance Analysis Agent",
-        model=model,
-        callback_handler=None,
-        tools=[get_previous_months_stock_data],
-        system_prompt=f"""
+PERFORMANCE_SYSTEM_PROMPT = """
             You are a financial market analysis agent. Your role is to provide a analysis of recent stock prices
             and give a **Buy / Sell / Hold recommendation** based on the last 3 months of stock data.
 
-            You have access to the tool **get_previous_months_stock_data(ticker_symbol)**, which returns the last 3 months
-            of daily stock price data with the fields:
-                - Date (YYYY-MM-DD)
-                - Open
-                - High
-                - Low
-                - Close
-                - Volume
+            The technical metrics in the user message were computed from the last 3 months of daily prices (Open,
+            High, Low, Close, Volume). They are final — do not recalculate them:
+                - percent_change → ((last_close - first_close) / first_close) * 100
+                - volatility_index → annualised volatility of daily log returns, normalised
+                  (0.0 = very stable, 1.0 = highly volatile), with volatility_label low / medium / high
+                - trend → up / down / flat, from the linear regression slope of the closing prices
+                - trend_stability → R² of that regression (1.0 = very consistent trend, 0.0 = no clear trend)
+                - max_drawdown_percent → largest peak-to-trough fall of the close over the window
 
             ### Tasks:
 
-            1. **Fetch Data**
-                Note: **Today Date and Time:** {current_datetime} (UTC).
-               - Use the tool to retrieve the last 3 months of stock prices for ({ticker_symbol}).
-               - Analyse Current stock price and key metrics provided below.  
-               - Company business model summary provided below.
-               - Recent news sentiment provided below.
-               
-
-            2. **Analyze Trend**
-               - Determine the overall trend direction based on closing prices:
-                 - "up" → consistent increase
-                 - "down" → consistent decrease
-                 - "flat" → minimal net change
-               - Consider intermediate fluctuations when assessing trend stability.
-
-            3. **Calculate Percent Change**
-               - Calculate percentage change between first and last closing prices:
-                 ```
-                 percent_change = ((last_close - first_close) / first_close) * 100
-                 ```
-               - Round to 2 decimal places.
-
-            4. **Calculate Volatility Index**
-               - Estimate normalized volatility (0.0 = very stable, 1.0 = highly volatile) based on daily price swings.
-               - Round to 2 decimal places.
-
-            5. **Generate Recommendation**
+            1. **Review Data**
+                Note: **Today Date and Time** (UTC) and the stock are given in the user message.
+               - Use the technical metrics provided in the user message for the stock.
+               - Analyse Current stock price and key metrics provided in the user message.
+               - Company business model summary provided in the user message.
+               - Recent news sentiment provided in the user message.
+
+            2. **Generate Recommendation**
                - Buy → upward trend, moderate change, low-medium volatility, positive news/business outlook  
                - Sell → downward trend or high volatility with losses, negative news/business signals  
                - Hold → flat trend, small change, moderate volatility, mixed or neutral sentiment  
@@ -310,73 +624,76 @@ def performance_bedrock_agent(ticker_symbol, result):
                 Write a **concise professional summary**.  
                 Use this tone and structure:
 
-                Stock: {ticker_symbol}  
-                Trend: <up / down / flat>  
-                3-Month Change: <+X% or -X%>  
-                Volatility: <low / medium / high>  
+                Stock: <stock>  
+                Trend: <trend>  
+                3-Month Change: <percent_change as +X% or -X%>  
+                Volatility: <volatility_label> (<volatility_index>)  
+                Max Drawdown: <max_drawdown_percent>%  
                 Recommendation: <Buy / Sell / Hold>  
                 Reasoning: <clear lines summarizing why>  
 
-                If data is insufficient, write:
-                "Insufficient data available to provide a meaningful analysis or recommendation for {ticker_symbol}
+                If the technical metrics are missing, write:
+                "Insufficient data available to provide a meaningful analysis or recommendation for <stock>
 
             ### Rules
-            - Use only the data returned by `get_previous_months_stock_data`.
+            - Use the technical metrics exactly as provided.
             - Do not fetch external data or guess prices.
             - Round all numeric values to 2 decimal places.
             - Keep 'comment' concise, max 500 words.
 
-            Here is the Data:
+            The user message holds the Data (quote and 3-month technical_metrics as key=value pairs, business
+            model and news sentiment as text) as `## <section>` blocks.
+        """
 
-            **Current stock price:** 
-            {current_price} \n
+PERFORMANCE_AGENT = AgentConfig(
+    name="Performance Analysis Agent",
+    stage="performance",
+    system_prompt=PERFORMANCE_SYSTEM_PROMPT,
+    callback_handler=None
+)
 
-            **Key Metrics:** 
-            {current_price_metrics} \n
 
-            **Company business model:** 
-            {company_business_model} \n
+def performance_prompt(ticker_symbol, result):
+    prompt_data = serialise_results(result, sections=("quote", "technical_metrics", "business_model", "news_sentiment"),
+                                    budgets=PROMPT_SECTION_BUDGETS)
 
-            **Recent news sentiment:** 
-            {recent_news_sentiment} \n
+    return f"Today Date and Time: {current_datetime()} (UTC)\nStock: {ticker_symbol}\n\n{prompt_data}"
 
-        """
-    )
 
-    response = None
-    try:
-        response = performance_agent(ticker_symbol)
-    except Exception as e:
-        logger.info(e)
+async def performance_bedrock_agent_async(ticker_symbol, result):
+    return await run_agent_async(PERFORMANCE_AGENT.new_agent(), performance_prompt(ticker_symbol, result))
 
-    if response:
-        return response.message.get('content')[0].get('text')
-    else:
-        return None
+
+def ddgs_text_search(keywords):
+    return ddgs.DDGS().text(keywords, region='us-en', max_results=25)
+
+
+search_cache = SearchCache(
+    search=ddgs_text_search,
+    news_ttl=SEARCH_NEWS_TTL_SECONDS,
+    reference_ttl=SEARCH_REFERENCE_TTL_SECONDS,
+    max_bytes=SEARCH_CACHE_MAX_BYTES,
+    max_results=25
+)
 
 
 @tool
 def duck_duck_go_search(keywords):
-    results = DDGS().text(keywords, region='us-en', max_results=25)
+    with tracing.span("duck_duck_go_search", "tool") as span:
+        results = search_cache.search(keywords)
+        span.set(results=len(results) if results else 0)
+    logger.info(f"Search cache stats: {search_cache.stats()}")
     return results
 
 
-def news_agent_bedrock(share_name):
-
-    current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    news_agent = Agent(
-        name="News Fetching Agent",
-        model=model,
-        tools=[duck_duck_go_search],
-        system_prompt=f"""
+NEWS_SYSTEM_PROMPT = """
                 You are a financial market sentiment analysis agent.
 
                 Use the **DuckDuckGo search tool** to find the most recent 10–15 verified English-language news headlines 
-                related to the company **{share_name}** from reputable financial sources such as:
+                related to the company named in the user message from reputable financial sources such as:
                 MoneyControl, Economic Times, Mint, Upstox, CNBC TV18, Times of India.
 
-                Note: **Today Date and Time:** {current_datetime} (UTC).
+                Note: **Today Date and Time** (UTC) is given in the user message.
 
                 ### How to search:
                 - Generate a precise query for the DuckDuckGo search tool in this format:
@@ -386,7 +703,7 @@ def news_agent_bedrock(share_name):
                 - Find recent articles based on Today Date.
 
                 ### Your tasks:
-                1. Fetch and analyze the most recent verified headlines mentioning {share_name}.
+                1. Fetch and analyze the most recent verified headlines mentioning the company.
                 2. Perform sentiment analysis for each headline:
                     - Positive → optimistic tone, growth, profits, upgrades, or favorable performance.
                     - Negative → losses, layoffs, downgrades, scandals, or poor performance.
@@ -402,37 +719,31 @@ def news_agent_bedrock(share_name):
                 - Limit to concise, English-language results (max 25).
                 - Keep 'summary' under 500 words, summarizing the general market sentiment, mentioning whether investors are optimistic, cautious, or concerned, and why.
             """
-    )
 
-    response = None
-    try:
-        response = news_agent(share_name)
-    except Exception as e:
-        logger.info(e)
+NEWS_AGENT = AgentConfig(
+    name="News Fetching Agent",
+    stage="news",
+    system_prompt=NEWS_SYSTEM_PROMPT,
+    tools=[duck_duck_go_search]
+)
 
-    if response:
-        return response.message.get('content')[0].get('text')
-    else:
-        return None
 
+def company_prompt(share_name):
+    return f"Company: {share_name}\nToday Date and Time: {current_datetime()} (UTC)"
 
-def business_model_agent_bedrock(share_name):
 
-    current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+async def news_agent_bedrock_async(share_name):
+    return await run_agent_async(NEWS_AGENT.new_agent(), company_prompt(share_name))
 
-    business_model_agent = Agent(
-        name="Business Model Analysis Agent",
-        model=model,
-        callback_handler=None,
-        tools=[duck_duck_go_search],
-        system_prompt=f"""
+
+BUSINESS_MODEL_SYSTEM_PROMPT = """
                 You are a financial research agent. Your task is to summarize the **business model**
-                of the company **{share_name}**.
+                of the company named in the user message.
 
                 ### Instructions:
                 1. Use the **DuckDuckGo search tool** to find recent and relevant information about the company’s business model.
                    - Generate precise queries for the tool, e.g., 
-                     "{share_name} business model.
+                     "<company name> business model.
                 2. Focus on reliable sources: Forbes, Investopedia, Reuters, Bloomberg, Yahoo Finance, Wikipedia or the company's own website.
                 3. Extract key details, including:
                    - How the company generates revenue
@@ -442,7 +753,7 @@ def business_model_agent_bedrock(share_name):
                    - Are they innovative, competitive, or in decline?
                    - Experienced, trustworthy, and transparent?
 
-                4. Note: **Today Date and Time:** {current_datetime} (UTC). Find recent information accordingly.
+                4. Note: **Today Date and Time** (UTC) is given in the user message. Find recent information accordingly.
 
 
                 ### Output Format:
@@ -455,136 +766,82 @@ def business_model_agent_bedrock(share_name):
                 - Do not include commentary or personal opinion.
                 - Output valid JSON only, without extra text or markdown.
             """
-    )
-
-    response = None
-
-    try:
-        response = business_model_agent(share_name)
-    except Exception as e:
-        logger.info(e)
-
-    if response:
-        return response.message.get('content')[0].get('text')
-    else:
-        return None
 
+BUSINESS_MODEL_AGENT = AgentConfig(
+    name="Business Model Analysis Agent",
+    stage="business_model",
+    system_prompt=BUSINESS_MODEL_SYSTEM_PROMPT,
+    tools=[duck_duck_go_search],
+    callback_handler=None
+)
 
-def report_generator_agent(master_agent_result, summarise_agent, past_interactions, stock_current_price):
-    current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    report_agent = Agent(
-        name="Financial Report Generator Agent",
-        model=model,
-        tools=[],
-        system_prompt=f"""
-        You are a **Financial Report Generation Agent**.  
-        Your task is to generate a **self-contained HTML snippet** that presents a **simple financial report** for a given stock using the provided input data.
+async def business_model_agent_bedrock_async(share_name):
+    return await run_agent_async(BUSINESS_MODEL_AGENT.new_agent(), company_prompt(share_name))
 
-        ---
 
-        ### INPUT DATA:
+async def business_model_task_async(share_name, ticker_symbol, refresh=False):
+    """
+    Returns the company's business model summary from the persisted cache when it is within
+    the freshness window, otherwise runs the business model agent and stores its answer. The S3
+    cache I/O runs in a worker thread and the agent is invoked on the event loop.
+    """
 
-        You will receive the following inputs:
+    cache_key = normalise_company_key(share_name, ticker_symbol)
 
-        1. **master_agent_result** — an object with these keys:
-           - **stock_information** → full stock info including current price, metadata, and key ratios  
-           - **stock_current_price** → latest stock price as a float  
-           - **stock_performance** → includes trend, volatility, percent change, and Buy/Sell/Hold recommendation  
-           - **company_business_model_data** → concise summary of the company's business model  
-           - **stock_related_news** → top headlines and overall sentiment  
+    if not refresh:
+        cached = await run_blocking(business_model_cache.get, cache_key)
+        if cached:
+            logger.info(f"✅ Business model served from cache for {cache_key}")
+            return cached
 
-        2. **summarise_agent** — a summarized narrative generated from `master_agent_result`.  
-           Include this section verbatim in the final HTML report.
+    business_model = await business_model_agent_bedrock_async(share_name=share_name)
+    if business_model:
+        await run_blocking(business_model_cache.put, cache_key, business_model)
 
-        3. **past_interactions** — a short record of the user’s previous financial interactions and data.  
-           Display this as a **separate section** in the report under the title:
-           **“📜 Last 5 Interactions”**.
+    return business_model
 
-           Create a table for this section with columns:
-           - Interaction At  
-           - Stock Name  
 
-           Notes:  
-           - Do **not** modify or rephrase any interaction text.  
-           - Do **not** repeat interactions.  
-           - The list will contain up to 5 entries.  
+COMMENTARY_SYSTEM_PROMPT = """
+        You are a **Financial Report Commentary Agent**.  
+        Your task is to write a short **analyst commentary** section for a stock report that already presents
+        the quote, technical metrics, recommendation, summary, business model and news sentiment.
 
-        ---
+        Note: **Today Date and Time** (UTC) is given in the user message.
 
         ### GOAL:
+        - Add perspective the rest of the report does not state explicitly: what to watch next, key risks,
+          catalysts, and how the technical picture and the sentiment agree or conflict.
+        - Keep it to 2–3 short paragraphs (max 200 words).
+        - Do **not** repeat the summary or restate the numbers verbatim.
 
-        Generate an **HTML report** that:
-
-        1. Reads and formats all data from `master_agent_result`.
-        2. Presents a **clear, human-readable summary**, including:
-           - Current stock price and % change  
-           - Trend and volatility  
-           - Key highlights of the business model  
-           - News sentiment summary  
-           - Final Buy / Hold / Sell recommendation with reasoning  
-        3. Renders this as a **complete HTML structure** (`report.html`) with:
-           - Clean and organized layout  
-           - Proper headings and readable typography  
-           - Minimal inline **CSS styling** for readability  
-           - **Dark mode** implementation via CSS  
-           - (Optional) Basic visual elements such as line charts, bar charts, or pie charts — **only using HTML and CSS**, no external libraries or scripts  
-           - Adequate spacing between sections and visual elements  
-
-        ---
-
-        ### ADDITIONAL REQUIREMENTS:
-
-        - Include **today’s date and time** in the header:  
-          **Report Generated on:** {current_datetime} (UTC)
-
-        - Display **Current Price of the Stock:** {stock_current_price}
-
-        - Always include a **disclaimer at the end** of the report:
-
-          🔒 *This report is generated using advanced AI analysis • For informational purposes only • Not financial advice.*
-
-        ---
+        ### OUTPUT INSTRUCTION:
+        Return **plain text only** — no HTML, markdown, code fences or headings.
 
         ### PROVIDED DATA:
+        The user message holds the report data as `## <section>` blocks.
+        """
 
-        **Master Agent Result:**  
-        {master_agent_result}
+# Optional free-form analyst commentary for the report. The report itself is rendered
+# from a fixed template; only this section is written by the model.
+COMMENTARY_AGENT = AgentConfig(
+    name="Financial Report Commentary Agent",
+    stage="report",
+    system_prompt=COMMENTARY_SYSTEM_PROMPT
+)
 
-        **Summary Agent Result:**  
-        {summarise_agent}
 
-        **Past Interactions:**  
-        {past_interactions}
+def commentary_prompt(master_agent_result, summarise_agent):
+    prompt_data = serialise_results({**master_agent_result, "summary": summarise_agent}, budgets=PROMPT_SECTION_BUDGETS)
 
-        ---
+    return f"Today Date and Time: {current_datetime()} (UTC)\n\n{prompt_data}\n\nWrite the analyst commentary."
 
-        ### OUTPUT INSTRUCTION:
 
-        Return **only** the complete HTML code for the financial report.  
-        Return **only raw HTML** (without markdown code fences, triple backticks, or explanations).  
-        Do **not** include any explanations, markdown formatting, or additional commentary outside the HTML.
-        """
-    )
+async def report_commentary_agent_async(master_agent_result, summarise_agent):
+    return await run_agent_async(COMMENTARY_AGENT.new_agent(), commentary_prompt(master_agent_result, summarise_agent))
 
-    response = None
-    try:
-        response = report_agent(str(master_agent_result))
-    except Exception as e:
-        logger.info(e)
 
-    if response:
-        return response.message.get('content')[0].get('text')
-    else:
-        return None
-
-
-def summariser_agent(master_agent_result):
-    summarise_agent = Agent(
-        name="Financial Report Summariser Agent",
-        model=model,
-        tools=[],
-        system_prompt=f"""
+SUMMARISER_SYSTEM_PROMPT = """
             You are a **Financial Report Summariser Agent**.  
             Your primary objective is to **summarise the complete stock analysis provided in `master_agent_result`** into a structured, insightful, and timestamped narrative that captures all key aspects of the company’s recent market performance and sentiment.
 
@@ -597,12 +854,12 @@ def summariser_agent(master_agent_result):
             - And at **what date/time** this snapshot of analysis was generated.
 
             ### 🧩 INPUT DATA
-            You will receive a dictionary called **`master_agent_result`**, which contains:
-            - `stock_information`: Detailed metadata about the stock (price, change %, volume, ratios, etc.)
-            - `stock_current_price`: The latest price as a float
-            - `stock_performance`: Trend, volatility, % change, and recommendation
-            - `company_business_model_data`: Concise overview of how the company makes money
-            - `stock_related_news`: Headlines and sentiment extracted from reliable financial sources
+            The user message starts with the date and time of analysis, followed by **`master_agent_result`** as `## <section>` blocks:
+            - `quote`: Key quote metrics as key=value pairs (price, currency, change %, day range, volume, targets, etc.)
+            - `technical_metrics`: 3-month % change, volatility, trend, stability and drawdown as key=value pairs
+            - `business_model`: Concise overview of how the company makes money
+            - `news_sentiment`: Headlines and sentiment extracted from reliable financial sources
+            - `performance`: Trend, volatility, % change, and recommendation
 
             ### 🧠 YOUR TASK
             Generate a **comprehensive summary (300–400 words)** that:
@@ -624,137 +881,636 @@ def summariser_agent(master_agent_result):
             Produce **plain text output only** — a single, well-structured 300–400 word summary.  
             The summary must end with a brief **overall investment stance** sentence such as:  
             > “Given the current fundamentals, sentiment, and technicals, the recommendation remains: Hold.”
-
-            ### 🧱 INPUT DATA TO SUMMARISE:
-            {master_agent_result}
             """
+
+SUMMARISER_AGENT = AgentConfig(
+    name="Financial Report Summariser Agent",
+    stage="summariser",
+    system_prompt=SUMMARISER_SYSTEM_PROMPT
+)
+
+
+def summariser_prompt(master_agent_result):
+    prompt_data = serialise_results(master_agent_result, budgets=PROMPT_SECTION_BUDGETS)
+
+    return f"Date and time of analysis: {current_datetime()} (UTC)\n\n{prompt_data}"
+
+
+async def summariser_agent_async(master_agent_result):
+    return await run_agent_async(SUMMARISER_AGENT.new_agent(), summariser_prompt(master_agent_result))
+
+
+def collect_stage_results(stage_values):
+    """
+    Builds the `results` dict the agents expect from the pipeline stage outputs.
+    """
+
+    results = {}
+    for name, value in stage_values.items():
+        if name == "stock_information":
+            stock_info, current_price = value or (None, None)
+            results["stock_information"] = stock_info
+            results["stock_current_price"] = current_price
+        else:
+            results[name] = value
+
+    return results
+
+
+def report_upload(share_name, ticker_symbol, report_generation_html_code):
+    """
+    Returns the S3 key and the gzip-compressed body of the report object. The key is derived from
+    the report's content, so publishing an identical report again overwrites the same object.
+    """
+
+    html = report_generation_html_code.encode("utf-8")
+    file_name = f"{share_name}_report_" + hashlib.sha256(html).hexdigest()[:32] + ".html"
+    s3_upload_path = f"analysis-result-{share_name}-{ticker_symbol}/{file_name}"
+    # mtime=0 keeps the compressed bytes identical for identical reports
+    body = gzip.compress(html, compresslevel=6, mtime=0)
+
+    return s3_upload_path, body
+
+
+def upload_report(s3_upload_path, body):
+    # Served with Content-Encoding: gzip, browsers decompress the report transparently
+    return upload_to_s3(body, S3_BUCKET_NAME, s3_upload_path, ContentType="text/html; charset=utf-8",
+                        ContentEncoding="gzip")
+
+
+def presign_report(s3_upload_path):
+    return s3_client.generate_presigned_url(
+        'get_object',
+        Params={
+            'Bucket': S3_BUCKET_NAME,
+            'Key': s3_upload_path
+        },
+        ExpiresIn=21600
     )
 
-    response = None
+
+async def publish_report_async(share_name, ticker_symbol, report_generation_html_code):
+    """
+    Uploads the gzip-compressed HTML report to S3 straight from memory and returns a presigned
+    URL for it (None without a report or when the upload failed). Upload and presigning run side
+    by side on the I/O pool.
+    """
+
+    if not report_generation_html_code:
+        return None
+
+    s3_upload_path, body = report_upload(share_name, ticker_symbol, report_generation_html_code)
+
+    uploaded, presigned_url = await asyncio.gather(
+        run_blocking(upload_report, s3_upload_path, body),
+        run_blocking(presign_report, s3_upload_path)
+    )
+
+    return presigned_url if uploaded else None
+
+
+# Stage results stored with a shared analysis and replayed when it is reused
+REUSABLE_STAGES = ("stock_technical_metrics", "company_business_model_data", "stock_related_news", "stock_performance")
+
+
+def trading_session(quote):
+    """
+    Returns the date of the current trading session in the exchange's time zone (UTC when unknown).
+    """
+
     try:
-        response = summarise_agent(str(master_agent_result))
+        timezone = ZoneInfo(quote.get("exchangeTimezoneName") or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        timezone = ZoneInfo("UTC")
+
+    return datetime.now(timezone).date().isoformat()
+
+
+def analysis_index_key(ticker_symbol, report_commentary=False):
+    analysis_key = ticker_symbol.strip().upper()
+    return f"{analysis_key}__commentary" if report_commentary else analysis_key
+
+
+def find_reusable_analysis(ticker_symbol, report_commentary=False):
+    """
+    Returns the shared analysis of the ticker when it is from the current trading session and its
+    price is within ANALYSIS_REUSE_MAX_PRICE_MOVE_PERCENT of the current quote, otherwise None.
+    The quote is only fetched when there is an analysis to check.
+    """
+
+    if not ticker_symbol or ANALYSIS_REUSE_MAX_AGE_SECONDS <= 0:
+        return None
+
+    analysis_key = analysis_index_key(ticker_symbol, report_commentary)
+    entry = analysis_index.get(analysis_key)
+    if not entry:
+        return None
+
+    try:
+        quote = quote_cache.get(ticker_symbol)
     except Exception as e:
-        logger.info(e)
+        logger.info(f"⚠️ No quote to check analysis {analysis_key}: {e}")
+        return None
 
-    if response:
-        return response.message.get('content')[0].get('text')
-    else:
+    price = quote.get("regularMarketPrice")
+    if entry["session"] != trading_session(quote) or not price:
+        logger.info(f"♻️ Analysis {analysis_key} is from the {entry['session']} session")
+        return None
+
+    price_move = abs(price - entry["price"]) / entry["price"] * 100
+    if price_move > ANALYSIS_REUSE_MAX_PRICE_MOVE_PERCENT:
+        logger.info(f"♻️ Analysis {analysis_key} is stale: price moved {price_move:.2f}%")
+        return None
+
+    logger.info(f"♻️ Reusing analysis {analysis_key} (price moved {price_move:.2f}%)")
+    return entry
+
+
+def remember_analysis(ticker_symbol, report_commentary, results, summary, report_template):
+    """
+    Builds the shareable entry of a completed analysis and indexes it for reuse. Returns the entry,
+    or None for an analysis with a failed stage, which is neither indexed nor shared.
+    """
+
+    price = (results.get("stock_information") or {}).get("price")
+    if not price or not summary or any(results.get(name) is None for name in REUSABLE_STAGES):
+        return None
+
+    try:
+        session = trading_session(quote_cache.get(ticker_symbol))
+    except Exception as e:
+        logger.info(f"⚠️ Analysis of {ticker_symbol} not indexed: {e}")
+        return None
+
+    entry = {
+        "session": session,
+        "price": price,
+        "summary": summary,
+        "report_template": report_template,
+        "results": {name: results[name] for name in REUSABLE_STAGES},
+    }
+    if ANALYSIS_REUSE_MAX_AGE_SECONDS > 0:
+        analysis_index.put(analysis_index_key(ticker_symbol, report_commentary), entry)
+
+    return entry
+
+
+def join_analysis(ticker_symbol, report_commentary):
+    """
+    Attaches the request to the analysis of the ticker in flight, if any. Returns (key, future, leader):
+    the leader runs the analysis and completes the future with remember_analysis' entry.
+    """
+
+    analysis_key = analysis_index_key(ticker_symbol, report_commentary)
+    future, leader = analysis_flights.join(analysis_key)
+    return analysis_key, future, leader
+
+
+RECOMMENDATION_ORDER = {"Buy": 0, "Hold": 1, "Sell": 2}
+
+
+def parse_recommendation(stock_performance):
+    """
+    Extracts the Buy / Hold / Sell call from the performance agent's response.
+    """
+
+    if not stock_performance:
+        return None
+
+    for line in stock_performance.splitlines():
+        if line.strip().lower().startswith("recommendation:"):
+            for recommendation in RECOMMENDATION_ORDER:
+                if recommendation.lower() in line.lower():
+                    return recommendation
+
+    return None
+
+
+def rank_batch_results(batch_results):
+    """
+    Ranks analysed tickers by recommendation (Buy, Hold, Sell, unknown), then by
+    risk-adjusted momentum: 3-month change weighted by trend stability and divided by
+    the volatility index.
+    """
+
+    ranking = []
+    for item in batch_results:
+        metrics = item.get("stock_technical_metrics") or {}
+        percent_change = metrics.get("percent_change")
+        score = None
+        if percent_change is not None:
+            stability = metrics.get("trend_stability") or 0.0
+            volatility_index = max(metrics.get("volatility_index") or 0.0, 0.05)
+            score = round(percent_change * stability / volatility_index, 2)
+
+        ranking.append({
+            "ticker_symbol": item.get("ticker_symbol"),
+            "stock_name": item.get("stock_name"),
+            "recommendation": item.get("recommendation"),
+            "percent_change": percent_change,
+            "volatility_index": metrics.get("volatility_index"),
+            "trend": metrics.get("trend"),
+            "score": score,
+        })
+
+    ranking.sort(key=lambda row: (
+        RECOMMENDATION_ORDER.get(row["recommendation"], len(RECOMMENDATION_ORDER)),
+        row["score"] is None,
+        -(row["score"] or 0.0),
+    ))
+
+    for rank, row in enumerate(ranking, start=1):
+        row["rank"] = rank
+
+    return ranking
+
+
+async def run_batch_stage(stage_name, ticker_symbol, fn, slots, trace=None):
+    """
+    Runs one stage of a batch ticker under a batch slot and a global analysis slot, and returns its
+    result (None when the stage failed). With a trace, it is recorded as a stage span tagged with
+    its ticker.
+    """
+
+    try:
+        async with slots:
+            await analysis_slots.acquire()
+            try:
+                with trace.span(stage_name, "stage", ticker=ticker_symbol) if trace else contextlib.nullcontext():
+                    return await fn()
+            finally:
+                analysis_slots.release()
+    except Exception as e:
+        logger.info(f"❌ Error in {stage_name} for {ticker_symbol}: {e}")
         return None
 
 
 class MasterAgent(Agent):
 
     def __init__(self):
-        super().__init__(name="MasterAgent")
+        # Reuse the shared model; a default BedrockModel would build a new boto3 client per request
+        super().__init__(name="MasterAgent", model=model)
 
-    def run(self, share_name, ticker_symbol, ACTOR_ID):
+    def run(self, share_name, ticker_symbol, ACTOR_ID, **kwargs):
         """
-        Run all sub-agents sequentially (synchronously).
+        Blocking facade over run_async, for scripts and tests: runs the analysis on a private event loop.
+        """
+
+        return asyncio.run(self.run_async(share_name, ticker_symbol, ACTOR_ID, **kwargs))
+
+    async def run_async(self, share_name, ticker_symbol, ACTOR_ID, refresh_business_model=False,
+                        report_commentary=REPORT_LLM_COMMENTARY, include_trace=False, reuse_analysis=True):
+        """
+        Run all sub-agents and return the final summary and report URL.
+        """
+
+        response = None
+        async for event in self.stream_async(share_name, ticker_symbol, ACTOR_ID,
+                                             refresh_business_model=refresh_business_model,
+                                             report_commentary=report_commentary, include_trace=include_trace,
+                                             reuse_analysis=reuse_analysis):
+            if event["event"] == "complete":
+                response = event["data"]
+
+        return response
+
+    @staticmethod
+    def memory_stages(share_name, ACTOR_ID):
+        """
+        The per-user stages: resolve the memory, read the past interactions, then save this one.
         """
 
         memory_obj = MemoryInstance()
 
-        memory_id = memory_obj.list_memory_instances()
+        # In Case of Delete Memory
 
-        try:
+        # try:
+        #     memory_obj.delete_memory_instance(memory_id)
+        # except Exception as e:
+        #     logger.info("Error while deleting Memory: ", e)
 
-            if not memory_id:
-                # Initialise Memory
-                memory_id = memory_obj.create_memory_instance()
+        return [
+            Stage("memory_id", memory_obj.resolve_memory_id),
+            # Previous Memory Interactions, read before this interaction is saved
+            Stage("past_interactions", lambda memory_id: memory_obj.retrieve_memory(ACTOR_ID, SESSION_ID, memory_id),
+                  inputs=("memory_id",)),
+            Stage("save_memory", lambda memory_id, past_interactions: memory_obj.save_data_memory(memory_id, share_name, ACTOR_ID),
+                  inputs=("memory_id", "past_interactions")),
+        ]
 
-            tasks = {
-                "stock_info_task": lambda: current_price_bedrock_agent(ticker_symbol=ticker_symbol),
-                "business_model_task": lambda: business_model_agent_bedrock(share_name=share_name),
-                "news_task": lambda: news_agent_bedrock(share_name=share_name)
-            }
+    def build_stages(self, share_name, ticker_symbol, ACTOR_ID, refresh_business_model=False,
+                     report_commentary=REPORT_LLM_COMMENTARY, share_analysis=None):
+        """
+        Declares the pipeline as a dependency graph: the LLM stages are coroutines run on the event
+        loop and the blocking I/O stages run in worker threads. The shared part of the result is
+        indexed for reuse by later requests (see remember_analysis) and passed to share_analysis,
+        when given, for the requests coalesced onto this one.
+        """
 
-            results = {}
-            with ThreadPoolExecutor(max_workers=3) as executor:
-                # Start all tasks in parallel
-                future_to_task = {executor.submit(fn): name for name, fn in tasks.items()}
+        def index_stage(results, summary, report_template):
+            entry = remember_analysis(ticker_symbol, report_commentary, results, summary, report_template)
+            if share_analysis:
+                share_analysis(entry)
+
+        async def performance_stage(**inputs):
+            return await performance_bedrock_agent_async(ticker_symbol=ticker_symbol,
+                                                         result=collect_stage_results(inputs))
+
+        async def summary_stage(**inputs):
+            return await summariser_agent_async(collect_stage_results(inputs))
+
+        async def report_stage(summary, past_interactions, stock_history, **inputs):
+            results = collect_stage_results(inputs)
+            commentary = await report_commentary_agent_async(results, summary) if report_commentary else None
+            generated_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+            report_template = render_shared_report(
+                share_name, ticker_symbol, results, summary, generated_at,
+                stock_history=stock_history,
+                recommendation=parse_recommendation(results.get("stock_performance")),
+                commentary=commentary
+            )
+            presigned_url, _ = await asyncio.gather(
+                publish_report_async(share_name, ticker_symbol, personalise_report(report_template, past_interactions)),
+                run_blocking(index_stage, results, summary, report_template)
+            )
+            return presigned_url
+
+        async def business_model_stage():
+            return await business_model_task_async(share_name=share_name, ticker_symbol=ticker_symbol,
+                                                   refresh=refresh_business_model)
+
+        async def news_stage():
+            return await news_agent_bedrock_async(share_name=share_name)
+
+        analysis_inputs = ("stock_information", "stock_technical_metrics", "stock_related_news",
+                           "company_business_model_data")
+
+        return self.memory_stages(share_name, ACTOR_ID) + [
+            Stage("stock_information", lambda: current_price_bedrock_agent(ticker_symbol=ticker_symbol)),
+            Stage("stock_history", lambda: fetch_stock_history(ticker_symbol)),
+            Stage("stock_technical_metrics", lambda stock_history: technical_metrics_task(ticker_symbol, stock_history),
+                  inputs=("stock_history",)),
+            Stage("company_business_model_data", business_model_stage),
+            Stage("stock_related_news", news_stage),
+            Stage("stock_performance", performance_stage, inputs=analysis_inputs),
+            Stage("summary", summary_stage, inputs=analysis_inputs + ("stock_performance",)),
+            Stage("report", report_stage, inputs=analysis_inputs + ("stock_performance", "summary", "past_interactions",
+                                                                    "stock_history")),
+        ]
+
+    def build_reuse_stages(self, share_name, ticker_symbol, ACTOR_ID, entry):
+        """
+        Declares the pipeline answering from a shared analysis: no LLM stage runs. The stored stage
+        results are replayed, the quote is refreshed and the shared report template is filled with
+        this user's past interactions and published under a new presigned URL.
+        """
 
-                for future in as_completed(future_to_task):
-                    task_name = future_to_task[future]
-                    try:
-                        result = future.result()
+        async def report_stage(past_interactions):
+            return await publish_report_async(share_name, ticker_symbol,
+                                              personalise_report(entry["report_template"], past_interactions))
 
-                        if task_name == "stock_info_task":
-                            stock_info, current_price = result
-                            results["stock_information"] = stock_info
-                            results["stock_current_price"] = current_price
-                            logger.info(f"✅ {task_name} done")
+        return self.memory_stages(share_name, ACTOR_ID) + [
+            Stage("stock_information", lambda: current_price_bedrock_agent(ticker_symbol=ticker_symbol)),
+            *[Stage(name, lambda value=value: value) for name, value in entry["results"].items()],
+            Stage("summary", lambda: entry["summary"]),
+            Stage("report", report_stage, inputs=("past_interactions",)),
+        ]
 
-                        elif task_name == "business_model_task":
-                            results["company_business_model_data"] = result
-                            logger.info(f"✅ {task_name} done")
+    @staticmethod
+    def stage_event(stage_result):
+        """
+        Converts a completed stage into a stream event, or None for internal stages.
+        """
 
-                        elif task_name == "news_task":
-                            results["stock_related_news"] = result
-                            logger.info(f"✅ {task_name} done")
+        logger.info(f"✅ {stage_result.name} done")
 
-                    except Exception as e:
-                        logger.info(f"❌ Error in {task_name}: {e}")
+        if stage_result.name in ("memory_id", "past_interactions", "save_memory", "stock_history"):
+            return None
 
-            logger.info(f"\n🔹 Running Performance Agent...")
-            stock_performance = performance_bedrock_agent(ticker_symbol=ticker_symbol, result=results)
-            results["stock_performance"] = stock_performance
+        data = stage_result.value
+        if stage_result.name == "stock_information":
+            stock_info, current_price = data or (None, None)
+            data = {"stock_information": stock_info, "stock_current_price": current_price}
 
-            logger.info(f"\n🔹 Running Summariser Agent...")
-            summarise_agent = summariser_agent(result)
+        return {
+            "event": stage_result.name,
+            "data": data,
+            "stage_ms": round(stage_result.seconds * 1000),
+            "elapsed_ms": round(stage_result.finished * 1000),
+        }
 
-            # Previous Memory Interactions
-            past_interactions = memory_obj.retrieve_memory(ACTOR_ID, SESSION_ID, memory_id)
+    @staticmethod
+    def complete_event(executor, label, include_trace=False, reused=False, coalesced=False):
+        executor.log_critical_path(label)
 
-            # Save Data into Memory
-            memory_obj.save_data_memory(memory_id, share_name, ACTOR_ID)
+        trace = executor.trace
+        trace.root.set(reused=reused, coalesced=coalesced)
+        trace.finish()
+        logger.info(f"📊 Trace {trace.trace_id} for {label}: {trace.root.duration_ms:.0f} ms, {trace.totals()}")
 
-            report_generation_html_code = report_generator_agent(result, summarise_agent, past_interactions, results["stock_current_price"])
+        summarise_agent = executor.results["summary"].value
+        presigned_url = executor.results["report"].value
 
-            presigned_url = None
-            if report_generation_html_code:
-                file_name = f"{share_name}_report_" + str(uuid.uuid4()) + ".html"
-                file_path = f"/tmp/{file_name}"
+        print("Output: ", {"summary": summarise_agent, "report": presigned_url})
 
-                with open(file_path, "w") as file:
-                    file.write(report_generation_html_code)
+        data = {"summary": summarise_agent, "report": presigned_url, "reused": reused, "coalesced": coalesced,
+                "trace_id": trace.trace_id, "tokens": trace.stage_totals()}
+        if include_trace:
+            data["trace"] = trace.to_dict()
 
-                if os.path.exists(file_path):
-                    s3_upload_path = f"analysis-result-{share_name}-{ticker_symbol}/{file_name}"
-                    upload_to_s3(file_path, S3_BUCKET_NAME, s3_upload_path)
+        return {
+            "event": "complete",
+            "data": data,
+            "stage_ms": round(executor.results["report"].finished * 1000),
+            "elapsed_ms": round((time.perf_counter() - executor.started) * 1000),
+        }
 
-                    presigned_url = s3_client.generate_presigned_url(
-                        'get_object',
-                        Params={
-                            'Bucket': S3_BUCKET_NAME,
-                            'Key': s3_upload_path
-                        },
-                        ExpiresIn=21600
-                    )
+    async def stream_async(self, share_name, ticker_symbol, ACTOR_ID, refresh_business_model=False,
+                           report_commentary=REPORT_LLM_COMMENTARY, include_trace=False, reuse_analysis=True):
+        """
+        Run all sub-agents as a dependency graph on the event loop, yielding an event as soon as each
+        stage completes: stock_information, stock_technical_metrics, stock_related_news,
+        company_business_model_data, stock_performance, summary, report and finally complete.
+        Every event carries the stage's own duration and the time elapsed since the request started;
+        the complete event carries the request's trace id (and its spans with include_trace).
+        When a fresh analysis of the ticker exists (see find_reusable_analysis) its results are
+        replayed instead, and while one is being computed for another request the request waits
+        for it and replays it (coalescing), unless reuse_analysis is False or the business model
+        is refreshed. When that analysis fails, one waiter re-runs it and the others wait again.
+        The memory stages and the personalised report always run per request.
+        At most ANALYSIS_MAX_CONCURRENCY analyses run at once; reused and coalesced requests do not
+        wait for a slot.
+        """
 
-            print("Output: ", {"summary": summarise_agent, "report": presigned_url})
+        trace = tracer.start_trace("analysis", ticker=ticker_symbol, stock_name=share_name)
+        entry, coalesced, flight = None, False, None
+        acquired = False
 
-            return {"summary": summarise_agent, "report": presigned_url}
+        try:
+            if reuse_analysis and not refresh_business_model and ticker_symbol:
+                with trace.span("analysis_index", "lookup"):
+                    entry = await run_blocking(find_reusable_analysis, ticker_symbol, report_commentary)
+
+                deadline = time.monotonic() + ANALYSIS_COALESCE_WAIT_SECONDS
+                while not entry:
+                    analysis_key, future, leader = join_analysis(ticker_symbol, report_commentary)
+                    if leader:
+                        flight = (analysis_key, future)
+                        break
+                    with trace.span("coalesced", "wait"):
+                        try:
+                            # shield: a cancelled waiter must not cancel the shared future
+                            entry = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                                           max(0.0, deadline - time.monotonic()))
+                        except asyncio.TimeoutError:
+                            logger.info(f"⚠️ Analysis {analysis_key} still running, analysing separately")
+                            break
+                    if entry:
+                        coalesced = True
+                        tracing.record_cache("analysis", "coalesced")
+                    else:
+                        # The leader failed: join again, so exactly one waiter re-runs it and the others wait for that
+                        logger.info(f"♻️ Analysis {analysis_key} failed, joining its re-run")
+
+            if entry:
+                stages = self.build_reuse_stages(share_name, ticker_symbol, ACTOR_ID, entry)
+            else:
+                with trace.span("queued", "wait"):
+                    await analysis_slots.acquire()
+                acquired = True
+                stages = self.build_stages(share_name, ticker_symbol, ACTOR_ID,
+                                           refresh_business_model=refresh_business_model,
+                                           report_commentary=report_commentary,
+                                           share_analysis=functools.partial(analysis_flights.complete, *flight) if flight else None)
+            executor = AsyncDAGExecutor(stages, io_executor=io_executor, trace=trace)
+
+            async for stage_result in executor.run():
+                event = self.stage_event(stage_result)
+                if event:
+                    yield event
+
+            yield self.complete_event(executor, f"{share_name} ({ticker_symbol})", include_trace=include_trace,
+                                      reused=bool(entry) and not coalesced, coalesced=coalesced)
 
         except Exception as e:
             logger.info(e)
+            trace.finish(error=e)
+            yield {"event": "error", "data": str(e), "stage_ms": 0, "elapsed_ms": 0}
 
         finally:
+            if acquired:
+                analysis_slots.release()
+            if flight:
+                analysis_flights.complete(*flight, None)
+            trace.finish()
+
+    async def run_batch_async(self, tickers, max_concurrency=BATCH_MAX_CONCURRENCY, refresh_business_model=False):
+        """
+        Analyse a watchlist in one invocation. OHLCV for every ticker comes from a single bulk
+        download and the technical metrics from one vectorized pass. Every ticker runs its own
+        stage chain, with at most max_concurrency LLM stages of the batch (and the global analysis
+        slots) running at once, so a slow ticker does not hold the others back. No per-ticker HTML
+        report is generated.
+        """
+
+        ticker_symbols = [ticker["ticker_symbol"] for ticker in tickers]
+        trace = tracer.start_trace("batch", tickers=len(ticker_symbols))
+        batch_slots = asyncio.Semaphore(max_concurrency)
+
+        def technical_metrics_stage():
+            with trace.span("technical_metrics_task", "stage"):
+                return batch_technical_metrics(ticker_symbols)
+
+        async def technical_metrics():
             try:
-                if os.path.exists(file_name):
-                    os.remove(file_name)
+                return await run_blocking(technical_metrics_stage)
             except Exception as e:
-                pass
+                logger.info(f"❌ Error in technical_metrics_task: {e}")
+                return {}
+
+        metrics_task = asyncio.ensure_future(technical_metrics())
+
+        def stage(stage_name, ticker_symbol, fn):
+            return run_batch_stage(stage_name, ticker_symbol, fn, batch_slots, trace=trace)
+
+        async def analyse(ticker):
+            # Each ticker moves on as soon as its own stages finish, not when the whole wave does
+            ticker_symbol = ticker["ticker_symbol"]
+            stock_info, current_price = await stage("stock_info_task", ticker_symbol, functools.partial(
+                run_blocking, current_price_bedrock_agent, ticker_symbol=ticker_symbol)) or (None, None)
+            share_name = ticker.get("stock_name")
+            if not share_name:
+                # Already cached by the quote lookup above
+                quote = quote_cache.get(ticker_symbol) if stock_info else {}
+                share_name = quote.get("longName") or quote.get("shortName") or ticker_symbol
+
+            news, business_model = await asyncio.gather(
+                stage("news_task", ticker_symbol, functools.partial(news_agent_bedrock_async, share_name=share_name)),
+                stage("business_model_task", ticker_symbol, functools.partial(
+                    business_model_task_async, share_name=share_name, ticker_symbol=ticker_symbol,
+                    refresh=refresh_business_model)),
+            )
+            result = {
+                "stock_information": stock_info,
+                "stock_current_price": current_price,
+                "stock_technical_metrics": (await metrics_task).get(ticker_symbol),
+                "stock_related_news": news,
+                "company_business_model_data": business_model,
+            }
+            result["stock_performance"] = await stage("performance_task", ticker_symbol, functools.partial(
+                performance_bedrock_agent_async, ticker_symbol=ticker_symbol, result=result))
+            summary = await stage("summariser_task", ticker_symbol, functools.partial(summariser_agent_async, result))
+
+            return {
+                "stock_name": share_name,
+                "ticker_symbol": ticker_symbol,
+                **result,
+                "recommendation": parse_recommendation(result["stock_performance"]),
+                "summary": summary,
+            }
+
+        batch_results = list(await asyncio.gather(*(analyse(ticker) for ticker in tickers)))
+        logger.info(f"✅ Batch analysis done for {len(batch_results)} tickers")
+
+        trace.finish()
+        logger.info(f"📊 Trace {trace.trace_id} for batch of {len(ticker_symbols)}: {trace.root.duration_ms:.0f} ms, {trace.totals()}")
+
+        return {"results": batch_results, "ranking": rank_batch_results(batch_results), "trace_id": trace.trace_id}
+
+
+def parse_batch_tickers(tickers):
+    """
+    Normalises the batch payload: each entry is either a ticker symbol string or an object
+    with `ticker_symbol` and optional `stock_name`. Duplicate tickers are dropped.
+    """
+
+    parsed = {}
+    for ticker in tickers:
+        if isinstance(ticker, str):
+            ticker = {"ticker_symbol": ticker}
+        ticker_symbol = (ticker.get("ticker_symbol") or "").strip().upper()
+        if ticker_symbol and ticker_symbol not in parsed:
+            parsed[ticker_symbol] = {"ticker_symbol": ticker_symbol, "stock_name": ticker.get("stock_name")}
+
+    return list(parsed.values())
+
 
-            # In Case of Delete Memory
+def warm_up():
+    """
+    Loads the deferred modules and builds the clients, so the first request does not pay for them.
+    """
 
-            # try:
-            #     memory_obj.delete_memory_instance(memory_id)
-            # except Exception as e:
-            #     logger.info("Error while deleting Memory: ", e)
+    started = time.perf_counter()
+    try:
+        resolve(yf, pd, ddgs, stock_metrics, model, memory_client, s3_client, ohlcv_store,
+                *(model_registry.model(stage).model for stage in MODEL_STAGES))
+        logger.info(f"🔥 Warm-up finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+    except Exception as e:
+        logger.info(f"⚠️ Warm-up failed, loading on first use instead: {e}")
 
 
 @app.entrypoint
-def strands_agent_bedrock(payload):
+async def strands_agent_bedrock(payload):
     """
     Invoke the agent with a payload
     """
@@ -766,6 +1522,27 @@ def strands_agent_bedrock(payload):
         if isinstance(payload, str):
             payload = json.loads(payload)
 
+        if payload.get("latency_summary"):
+            # p50 / p95 / p99 per stage, tool and agent over the requests served by this process
+            return tracer.summary()
+
+        if payload.get("model_stats"):
+            # Slots in use, current request rate and throttle counts per model id
+            return model_registry.stats()
+
+        if payload.get("tickers"):
+            tickers = parse_batch_tickers(payload.get("tickers"))
+            max_concurrency = max(1, min(int(payload.get("max_concurrency", BATCH_MAX_CONCURRENCY)), BATCH_MAX_CONCURRENCY))
+
+            logger.info(f"Batch input: {len(tickers)} tickers, concurrency {max_concurrency}")
+
+            response = await MasterAgent().run_batch_async(tickers, max_concurrency=max_concurrency,
+                                                           refresh_business_model=bool(payload.get("refresh_business_model")))
+
+            logger.info(f"Batch Response Completed")
+
+            return response
+
         stock_name = payload.get("stock_name")
         ticker_symbol = payload.get("ticker_symbol")
         ACTOR_ID = payload.get("actor_id")
@@ -774,7 +1551,19 @@ def strands_agent_bedrock(payload):
 
         master_agent = MasterAgent()
 
-        response = master_agent.run(stock_name, ticker_symbol=ticker_symbol, ACTOR_ID=ACTOR_ID)
+        if payload.get("stream"):
+            # Returning an async generator makes the runtime answer with a text/event-stream response
+            return master_agent.stream_async(stock_name, ticker_symbol=ticker_symbol, ACTOR_ID=ACTOR_ID,
+                                             refresh_business_model=bool(payload.get("refresh_business_model")),
+                                             report_commentary=bool(payload.get("report_commentary", REPORT_LLM_COMMENTARY)),
+                                             include_trace=bool(payload.get("trace")),
+                                             reuse_analysis=not payload.get("refresh_analysis"))
+
+        response = await master_agent.run_async(stock_name, ticker_symbol=ticker_symbol, ACTOR_ID=ACTOR_ID,
+                                                refresh_business_model=bool(payload.get("refresh_business_model")),
+                                                report_commentary=bool(payload.get("report_commentary", REPORT_LLM_COMMENTARY)),
+                                                include_trace=bool(payload.get("trace")),
+                                                reuse_analysis=not payload.get("refresh_analysis"))
 
         logger.info(f"Response Completed")
 
@@ -0,0 +1,473 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import benchmark_fakes
+
+logger = logging.getLogger("financial-agent")
+
+AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(AGENT_DIR, "..", "backend")
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[max(0, math.ceil(fraction * len(ordered)) - 1)], 1)
+
+
+def peak_rss_mb():
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def request_payloads(count, tickers, cache_mode, stream, offset=0):
+    """
+    Builds one analysis payload per request. In "cold" mode every request of the run gets its own
+    ticker (numbered from `offset`), so no quote, OHLCV, search or business model cache can answer
+    it; in "warm" mode the requests cycle through `tickers`.
+    """
+
+    payloads = []
+    for i in range(count):
+        ticker_symbol = f"BM{offset + i:05d}" if cache_mode == "cold" else tickers[i % len(tickers)]
+        payloads.append({
+            "stock_name": f"{ticker_symbol} Holdings",
+            "ticker_symbol": ticker_symbol,
+            "actor_id": f"benchmark-user-{i % 16}",
+            "stream": stream,
+        })
+    return payloads
+
+
+def is_complete(response):
+    return isinstance(response, dict) and bool(response.get("report"))
+
+
+async def invoke_entrypoint(agent_module, payload):
+    response = await agent_module.strands_agent_bedrock(payload)
+    if hasattr(response, "__aiter__"):
+        events = [event async for event in response]
+        return bool(events) and events[-1]["event"] == "complete" and is_complete(events[-1]["data"])
+    return is_complete(response)
+
+
+def invoke_lambda(invoke_module, payload):
+    event = {
+        "rawPath": "/analyse",
+        "queryStringParameters": {
+            "stockname": payload["stock_name"],
+            "ticker_symbol": payload["ticker_symbol"],
+            "actor_id": payload["actor_id"],
+            "stream": "true" if payload["stream"] else "false",
+        },
+    }
+    content = json.loads(invoke_module.lambda_handler(event, None)).get("response") or []
+
+    if payload["stream"]:
+        events = [json.loads(line) for line in content]
+        return bool(events) and events[-1]["event"] == "complete" and is_complete(events[-1]["data"])
+    return bool(content) and is_complete(json.loads("".join(content)))
+
+
+async def run_level(agent_module, invoke_module, target, concurrency, payloads):
+    """
+    Sends the payloads with at most `concurrency` in flight and returns the level's throughput,
+    request latency percentiles, per-stage latency summary and peak RSS.
+    """
+
+    agent_module.tracer.histograms.reset()
+    token_totals = []
+    stage_tokens = []
+    collect_tokens = lambda trace: (token_totals.append(trace.root.attributes), stage_tokens.append(trace.stage_totals()))
+    agent_module.tracer.exporters.append(collect_tokens)
+
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    # The Lambda handler is synchronous: give every in-flight invocation its own thread, like Lambda would
+    lambda_pool = ThreadPoolExecutor(max_workers=concurrency) if target == "lambda" else None
+
+    async def one(payload):
+        nonlocal errors
+        async with slots:
+            started = time.perf_counter()
+            try:
+                if target == "lambda":
+                    ok = await loop.run_in_executor(lambda_pool, invoke_lambda, invoke_module, payload)
+                else:
+                    ok = await invoke_entrypoint(agent_module, payload)
+            except Exception as e:
+                logger.warning(f"Benchmark request failed: {e}")
+                ok = False
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += not ok
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(payload) for payload in payloads))
+    finally:
+        agent_module.tracer.exporters.remove(collect_tokens)
+        if lambda_pool:
+            lambda_pool.shutdown(wait=False)
+    wall_seconds = time.perf_counter() - started
+
+    def tokens_per_request(key):
+        return round(sum(totals.get(key, 0) for totals in token_totals) / len(token_totals)) if token_totals else None
+
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "errors": errors,
+        "wall_seconds": round(wall_seconds, 3),
+        "requests_per_second": round(len(payloads) / wall_seconds, 2),
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+        },
+        "tokens_per_request": {
+            "input": tokens_per_request("tokens.input"),
+            "output": tokens_per_request("tokens.output"),
+            "cache_read": tokens_per_request("tokens.cache_read"),
+            "cache_write": tokens_per_request("tokens.cache_write"),
+        },
+        # Mean prompt cache reads per request of every stage that called the model
+        "cache_read_tokens_per_stage": {
+            stage: round(sum(totals.get(stage, {}).get("tokens.cache_read", 0) for totals in stage_tokens) / len(stage_tokens))
+            for stage in sorted({stage for totals in stage_tokens for stage in totals})
+        },
+        # Model calls retried after a throttle, and calls that ran out of retry budget
+        "throttles": {
+            "retried_per_request": round(sum(totals.get("throttle.retried", 0) for totals in token_totals) /
+                                         len(token_totals), 2) if token_totals else None,
+            "exhausted": sum(totals.get("throttle.exhausted", 0) for totals in token_totals),
+        },
+        # Requests answered from a shared analysis: one already indexed, or one in flight
+        "reused_requests": sum(1 for totals in token_totals if totals.get("reused")),
+        "coalesced_requests": sum(1 for totals in token_totals if totals.get("coalesced")),
+        "stages": agent_module.tracer.summary(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def run_sweep(agent_module, invoke_module, targets, concurrency_levels, requests_per_level, tickers,
+                    cache_mode="cold", stream=False):
+    loop = asyncio.get_running_loop()
+    invoke_module.boto3.client = lambda *args, **kwargs: benchmark_fakes.FakeAgentCoreClient(
+        agent_module.strands_agent_bedrock, loop)
+
+    results = []
+    sent = 0
+    for target in targets:
+        for concurrency in concurrency_levels:
+            payloads = request_payloads(max(requests_per_level, concurrency), tickers, cache_mode, stream, offset=sent)
+            sent += len(payloads)
+            results.append(await run_level(agent_module, invoke_module, target, concurrency, payloads))
+            print_level(results[-1], file=sys.__stdout__)
+
+    return results
+
+
+def print_level(level, file=sys.stdout):
+    latency = level["latency_ms"]
+    print(f"{level['target']:<10} c={level['concurrency']:<4} {level['requests']:>5} req  {level['errors']:>3} err  "
+          f"{level['requests_per_second']:>8.2f} req/s  p50 {latency['p50']:>8.1f} ms  p95 {latency['p95']:>8.1f} ms  "
+          f"p99 {latency['p99']:>8.1f} ms  peak RSS {level['peak_rss_mb']:>7.1f} MB  "
+          f"tokens/req in {level['tokens_per_request']['input']} out {level['tokens_per_request']['output']} "
+          f"cache read {level['tokens_per_request']['cache_read']}  "
+          f"reused {level['reused_requests']} coalesced {level['coalesced_requests']}  "
+          f"throttles/req {level['throttles']['retried_per_request']} exhausted {level['throttles']['exhausted']}", file=file)
+
+    stages = {name: summary for name, summary in level["stages"].items() if not name.startswith("request:")}
+    for name, summary in stages.items():
+        print(f"    {name:<45} n={summary['count']:<5} p50 {summary['p50_ms']:>8.1f}  p95 {summary['p95_ms']:>8.1f}  "
+              f"p99 {summary['p99_ms']:>8.1f} ms", file=file)
+    cache_reads = "  ".join(f"{stage} {tokens}" for stage, tokens in level["cache_read_tokens_per_stage"].items())
+    print(f"    cache read tokens/req per stage: {cache_reads or '-'}", file=file)
+
+
+def legacy_collect_events(body):
+    # lambda_handler's event stream handling before the passthrough change, kept as the comparison baseline
+    content = []
+    for line in body.iter_lines(chunk_size=1):
+        if line:
+            line = line.decode("utf-8")
+            if line.startswith("data: "):
+                content.append(line[6:])
+    return content
+
+
+def run_passthrough(invoke_module, event_count, event_bytes, interval_ms):
+    """
+    Replays one synthetic agent event stream through each way the backend can read it and returns,
+    per path, the time until the caller receives the first event, the total time and the bytes/sec:
+    "legacy" (1-byte reads, collected), "buffered" (lambda_handler, collected) and "streaming"
+    (streaming_app, passed through as it arrives).
+    """
+
+    from botocore.response import StreamingBody
+
+    events = [f"data: {json.dumps({'event': f'stage_{i}', 'data': 'x' * event_bytes})}\n\n".encode("utf-8")
+              for i in range(event_count)]
+    total_bytes = sum(len(event) for event in events)
+
+    def agent_response():
+        body = StreamingBody(benchmark_fakes.TimedEventStream(events, interval_ms=interval_ms), None)
+        return {"contentType": "text/event-stream", "response": body}
+
+    invoke_module.boto3.client = lambda *args, **kwargs: SimpleNamespace(
+        invoke_agent_runtime=lambda **kwargs: agent_response())
+    query = {"stockname": "Benchmark", "ticker_symbol": "BM", "actor_id": "benchmark-user", "stream": "true"}
+
+    results = {}
+    for path in ("legacy", "buffered", "streaming"):
+        started = time.perf_counter()
+        first_event = None
+
+        if path == "legacy":
+            received = len(legacy_collect_events(agent_response()["response"]))
+        elif path == "buffered":
+            received = len(json.loads(invoke_module.lambda_handler({"rawPath": "/analyse", "queryStringParameters": query}, None))["response"])
+        else:
+            environ = {"PATH_INFO": "/analyse", "QUERY_STRING": "&".join(f"{key}={value}" for key, value in query.items())}
+            received = 0
+            for chunk in invoke_module.streaming_app(environ, lambda status, headers: None):
+                first_event = first_event or time.perf_counter()
+                received += chunk.count(b"\n\n")
+
+        total = time.perf_counter() - started
+        results[path] = {
+            "events": received,
+            # Collected responses reach the caller in one piece, when the stream has ended
+            "first_event_ms": round(((first_event or started + total) - started) * 1000, 1),
+            "total_ms": round(total * 1000, 1),
+            "mb_per_second": round(total_bytes / total / 1e6, 2),
+        }
+
+    return results
+
+
+def parse_import_times(stderr, module):
+    """
+    Parses `-X importtime` output into the module's cumulative import time and the cumulative
+    time of each of its direct imports, in milliseconds.
+    """
+
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((len(name) - len(name.lstrip()), name.strip(), int(cumulative) / 1000))
+
+    # Each module is reported after its own imports, which are indented one level deeper
+    position = max(i for i, (_, name, _) in enumerate(entries) if name == module)
+    depth, _, total_ms = entries[position]
+    imports = {}
+    for child_depth, name, cumulative_ms in reversed(entries[:position]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 2:
+            imports[name] = round(cumulative_ms, 1)
+
+    return round(total_ms, 1), imports
+
+
+def profile_imports(module="agent", top=10):
+    """
+    Imports the module in a fresh interpreter with `-X importtime` and returns its import time,
+    its slowest direct imports and how long warm_up() then takes to load what was deferred.
+    """
+
+    code = (f"import time, {module}\n"
+            f"started = time.perf_counter()\n"
+            f"{module}.warm_up()\n"
+            f"print(round((time.perf_counter() - started) * 1000, 1))")
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=AGENT_DIR,
+                               capture_output=True, text=True, check=True)
+
+    import_ms, imports = parse_import_times(completed.stderr, module)
+    slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "module": module,
+        "import_ms": import_ms,
+        "warm_up_ms": float(completed.stdout.strip().splitlines()[-1]),
+        "slowest_imports": dict(slowest),
+    }
+
+
+def print_import_profile(profile, file=sys.stdout):
+    print(f"import {profile['module']}: {profile['import_ms']:.1f} ms, warm-up {profile['warm_up_ms']:.1f} ms", file=file)
+    for name, cumulative_ms in profile["slowest_imports"].items():
+        print(f"  {name:<40} {cumulative_ms:>9.1f} ms", file=file)
+
+
+def compare_with_baseline(results, baseline, max_regression):
+    """
+    Returns a description of every level whose throughput fell, or whose p95 latency rose,
+    by more than `max_regression` (a fraction) compared with the baseline run.
+    """
+
+    previous = {(level["target"], level["concurrency"]): level for level in baseline["results"]}
+    regressions = []
+
+    for level in results:
+        before = previous.get((level["target"], level["concurrency"]))
+        if not before:
+            continue
+        label = f"{level['target']} c={level['concurrency']}"
+        if level["requests_per_second"] < before["requests_per_second"] * (1 - max_regression):
+            regressions.append(f"{label}: {before['requests_per_second']} → {level['requests_per_second']} req/s")
+        if level["latency_ms"]["p95"] > before["latency_ms"]["p95"] * (1 + max_regression):
+            regressions.append(f"{label}: p95 {before['latency_ms']['p95']} → {level['latency_ms']['p95']} ms")
+
+    return regressions
+
+
+def compare_import_profiles(profile, baseline_profile, max_regression):
+    """
+    Returns a description of the import time regression, if the module now takes more than
+    `max_regression` (a fraction) longer to import than in the baseline run.
+    """
+
+    if not profile or not baseline_profile:
+        return []
+    if profile["import_ms"] > baseline_profile["import_ms"] * (1 + max_regression):
+        return [f"import {profile['module']}: {baseline_profile['import_ms']} → {profile['import_ms']} ms"]
+    return []
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline throughput / latency benchmark of the analysis pipeline")
+    parser.add_argument("--targets", nargs="+", choices=["entrypoint", "lambda"], default=["entrypoint", "lambda"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests-per-level", type=int, default=32)
+    parser.add_argument("--tickers", nargs="+", default=["AAPL", "MSFT", "TATAMOTORS.NS", "HDFCBANK.NS"])
+    parser.add_argument("--cache-mode", choices=["cold", "warm"], default="cold")
+    parser.add_argument("--stream", action="store_true", help="Request text/event-stream responses")
+    parser.add_argument("--model-latency-ms", type=float, default=800)
+    parser.add_argument("--ms-per-input-token", type=float, default=0.0, help="Prefill cost before the first token")
+    parser.add_argument("--ms-per-output-token", type=float, default=0.0)
+    parser.add_argument("--output-tokens", type=int, default=250)
+    parser.add_argument("--input-tokens", type=int, default=None, help="Fixed input tokens (default: estimated from prompt)")
+    parser.add_argument("--min-cache-tokens", type=int, default=1024,
+                        help="Smallest tools + system prompt prefix the fake model caches (Bedrock's minimum)")
+    parser.add_argument("--model-quota-rps", type=float, default=None,
+                        help="Throttle model calls beyond this many per second, like a Bedrock quota (default: no quota)")
+    parser.add_argument("--yfinance-latency-ms", type=float, default=150)
+    parser.add_argument("--search-latency-ms", type=float, default=300)
+    parser.add_argument("--memory-latency-ms", type=float, default=40)
+    parser.add_argument("--s3-latency-ms", type=float, default=60)
+    parser.add_argument("--frames-dir", help="Directory of recorded <TICKER>.csv daily bars to replay")
+    parser.add_argument("--record-frames", action="store_true", help="Record --tickers from Yahoo Finance into --frames-dir and exit")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15)
+    parser.add_argument("--verbose", action="store_true", help="Keep the agent's logs and prints")
+    parser.add_argument("--passthrough", action="store_true",
+                        help="Benchmark how the backend reads the agent's event stream instead of the pipeline")
+    parser.add_argument("--passthrough-events", type=int, default=50)
+    parser.add_argument("--passthrough-event-bytes", type=int, default=4096)
+    parser.add_argument("--passthrough-interval-ms", type=float, default=0.0, help="Delay between agent events")
+    parser.add_argument("--import-profile", action="store_true",
+                        help="Also profile the agent's import time (python -X importtime) in a fresh interpreter")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.record_frames:
+        benchmark_fakes.record_frames(args.tickers, args.frames_dir or "benchmark_frames")
+        return 0
+
+    if args.passthrough:
+        sys.path.insert(0, BACKEND_DIR)
+        import invoke
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_passthrough(invoke, args.passthrough_events, args.passthrough_event_bytes,
+                                      args.passthrough_interval_ms)
+        for path, result in results.items():
+            print(f"{path:<10} {result['events']:>5} events  first event {result['first_event_ms']:>9.1f} ms  "
+                  f"total {result['total_ms']:>9.1f} ms  {result['mb_per_second']:>8.2f} MB/s")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"config": vars(args), "passthrough": results}, f, indent=2)
+        return 0
+
+    # Profiled before this process imports the agent, in a fresh interpreter so nothing is preloaded
+    import_profile = profile_imports() if args.import_profile else None
+    if import_profile:
+        print_import_profile(import_profile)
+
+    import agent
+
+    sys.path.insert(0, BACKEND_DIR)
+    import invoke
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logger.setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix="benchmark-") as store_dir:
+        benchmark_fakes.install_fakes(
+            agent,
+            model=benchmark_fakes.ScriptedModel(latency_ms=args.model_latency_ms, output_tokens=args.output_tokens,
+                                                ms_per_input_token=args.ms_per_input_token,
+                                                ms_per_output_token=args.ms_per_output_token,
+                                                input_tokens=args.input_tokens,
+                                                min_cache_tokens=args.min_cache_tokens,
+                                                max_requests_per_second=args.model_quota_rps),
+            yfinance=benchmark_fakes.FakeYFinance(frames_dir=args.frames_dir, latency_ms=args.yfinance_latency_ms),
+            search_latency_ms=args.search_latency_ms,
+            memory_latency_ms=args.memory_latency_ms,
+            s3_latency_ms=args.s3_latency_ms,
+            store_dir=store_dir,
+        )
+
+        # Per-request prints of the agent and the Lambda handler would drown the report
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            results = asyncio.run(run_sweep(agent, invoke, args.targets, args.concurrency, args.requests_per_level,
+                                            args.tickers, cache_mode=args.cache_mode, stream=args.stream))
+
+    report = {"config": vars(args), "results": results}
+    if import_profile:
+        report["import_profile"] = import_profile
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.max_regression)
+        regressions += compare_import_profiles(import_profile, baseline.get("import_profile"), args.max_regression)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+# Local stand-ins for Bedrock, Yahoo Finance, DuckDuckGo, AgentCore Memory, S3 and the AgentCore
+# runtime client, used by benchmark.py to run the whole pipeline offline. Each fake replaces the
+# library object agent.py talks to, so the agent code between them runs unchanged.
+
+import asyncio
+import collections
+import hashlib
+import io
+import itertools
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from botocore.exceptions import ClientError
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+
+
+def _sleep_ms(latency_ms):
+    if latency_ms:
+        time.sleep(latency_ms / 1000)
+
+
+_ANSWER_VOCABULARY = np.array(("revenue growth margin guidance investors outlook demand volatility earnings quarter "
+                               "segment pricing risk momentum valuation upgrade analysts shares market steady").split())
+
+
+class ScriptedModel(Model):
+    """
+    Strands model that answers without calling Bedrock. An agent with tools first gets one tool
+    call (the DuckDuckGo search tool takes `keywords`) and then a text answer; every answer holds
+    a "Recommendation:" line so the recommendation parser has something to read.
+    Each call reports `output_tokens` and an input token count estimated from the prompt size
+    (or `input_tokens`). The first token arrives after `latency_ms` plus `ms_per_input_token` per
+    input token (prefill); generation then takes `ms_per_output_token` per output token.
+    With `cache_prompt` in its config it caches prompt prefixes like Bedrock: the tools and system
+    prompt of a call are written to the cache once they reach `min_cache_tokens`, and later calls
+    with the same prefix report them as cacheReadInputTokens and skip their prefill.
+    With `max_requests_per_second` it throttles like a Bedrock quota: a call beyond that many
+    in the last second raises ModelThrottledException before its first event.
+    """
+
+    def __init__(self, latency_ms=800, output_tokens=250, ms_per_output_token=0.0, input_tokens=None,
+                 ms_per_input_token=0.0, min_cache_tokens=1024, max_requests_per_second=None):
+        self.latency_ms = latency_ms
+        self.output_tokens = output_tokens
+        self.ms_per_output_token = ms_per_output_token
+        self.ms_per_input_token = ms_per_input_token
+        self.input_tokens = input_tokens
+        self.min_cache_tokens = min_cache_tokens
+        self.max_requests_per_second = max_requests_per_second
+        self.throttled = 0
+        self.config = {"model_id": "scripted"}
+        self._cached_prefixes = set()
+        self._calls = 0
+        self._accepted = collections.deque()
+        self._lock = threading.Lock()
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("ScriptedModel does not produce structured output")
+
+    @property
+    def calls(self):
+        return self._calls
+
+    def _input_tokens(self, messages, system_prompt):
+        if self.input_tokens is not None:
+            return self.input_tokens
+        return max(1, (len(json.dumps(messages, default=str)) + len(system_prompt or "")) // 4)
+
+    def _prompt_cache_usage(self, tool_specs, system_prompt):
+        # (cache read tokens, cache write tokens) of the tools + system prompt prefix
+        if not self.config.get("cache_prompt"):
+            return 0, 0
+        prefix = json.dumps(tool_specs or [], sort_keys=True, default=str) + (system_prompt or "")
+        prefix_tokens = len(prefix) // 4
+        if prefix_tokens < self.min_cache_tokens:
+            return 0, 0
+        with self._lock:
+            if prefix in self._cached_prefixes:
+                return prefix_tokens, 0
+            self._cached_prefixes.add(prefix)
+        return 0, prefix_tokens
+
+    def _answer_words(self, system_prompt, count):
+        # Different agents and calls get different words, as real answers would
+        rng = np.random.default_rng(int(hashlib.sha256(f"{system_prompt}{self._calls}".encode()).hexdigest()[:8], 16))
+        words = rng.choice(_ANSWER_VOCABULARY, size=count)
+        return ". ".join(" ".join(words[i:i + 12]) for i in range(0, count, 12))
+
+    def _within_quota(self):
+        if not self.max_requests_per_second:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            while self._accepted and now - self._accepted[0] >= 1.0:
+                self._accepted.popleft()
+            if len(self._accepted) >= self.max_requests_per_second:
+                self.throttled += 1
+                return False
+            self._accepted.append(now)
+            return True
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        if not self._within_quota():
+            raise ModelThrottledException("Too many requests, please wait before trying again.")
+        with self._lock:
+            self._calls += 1
+
+        input_tokens = self._input_tokens(messages, system_prompt)
+        cache_read_tokens, cache_write_tokens = self._prompt_cache_usage(tool_specs, system_prompt)
+        # Like Bedrock, inputTokens leaves out the tokens read from or written to the cache
+        input_tokens = max(1, input_tokens - cache_read_tokens - cache_write_tokens)
+        await asyncio.sleep((self.latency_ms + self.ms_per_input_token * (input_tokens + cache_write_tokens)) / 1000)
+
+        has_tool_result = any("toolResult" in block for message in messages for block in message.get("content", []))
+        prompt = next((block["text"] for block in messages[0].get("content", []) if "text" in block), "")
+
+        yield {"messageStart": {"role": "assistant"}}
+
+        if tool_specs and not has_tool_result:
+            # The user message starts with "Company: <name>"
+            tool_input = {"keywords": f"{prompt.split(chr(10))[0].split(': ', 1)[-1][:80]} stock news"}
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": f"tool-{self._calls}",
+                                                               "name": tool_specs[0]["name"]}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(tool_input)}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            output_tokens = 20
+        else:
+            text = "Recommendation: Buy\nReasoning: " + self._answer_words(system_prompt, max(0, self.output_tokens - 4))
+            await asyncio.sleep(self.ms_per_output_token * self.output_tokens / 1000)
+            yield {"contentBlockDelta": {"delta": {"text": text}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            output_tokens = self.output_tokens
+
+        usage = {"inputTokens": input_tokens, "outputTokens": output_tokens,
+                 "totalTokens": input_tokens + cache_read_tokens + cache_write_tokens + output_tokens}
+        if cache_read_tokens:
+            usage["cacheReadInputTokens"] = cache_read_tokens
+        if cache_write_tokens:
+            usage["cacheWriteInputTokens"] = cache_write_tokens
+        yield {"metadata": {"usage": usage,
+                            "metrics": {"latencyMs": int(self.latency_ms)}}}
+
+
+def synthetic_frame(ticker_symbol, start, end):
+    """
+    Deterministic daily OHLCV bars (a seeded random walk over business days) for tickers
+    without a recorded frame.
+    """
+
+    seed = int(hashlib.sha256(ticker_symbol.encode()).hexdigest()[:8], 16)
+    dates = pd.bdate_range(pd.Timestamp(start).normalize() - timedelta(days=730), datetime.today(), name="Date")
+    rng = np.random.default_rng(seed)
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(dates))))
+    frame = pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.003, len(dates))),
+        "High": close * (1 + np.abs(rng.normal(0, 0.008, len(dates)))),
+        "Low": close * (1 - np.abs(rng.normal(0, 0.008, len(dates)))),
+        "Close": close,
+        "Volume": rng.integers(100_000, 5_000_000, len(dates)).astype(float),
+    }, index=dates)
+
+    return frame[(frame.index >= pd.Timestamp(start).normalize()) & (frame.index < pd.Timestamp(end))]
+
+
+class FakeYFinance:
+    """
+    Stands in for the `yfinance` module: `download` and `Ticker(...).info / .fast_info`.
+    Bars come from `<frames_dir>/<TICKER>.csv` when recorded (see record_frames), otherwise
+    from synthetic_frame.
+    """
+
+    def __init__(self, frames_dir=None, latency_ms=150):
+        self.frames_dir = frames_dir
+        self.latency_ms = latency_ms
+        self._recorded = {}
+
+    def _frame(self, ticker_symbol, start, end):
+        path = os.path.join(self.frames_dir, f"{ticker_symbol}.csv") if self.frames_dir else None
+        if path and os.path.exists(path):
+            if ticker_symbol not in self._recorded:
+                self._recorded[ticker_symbol] = pd.read_csv(path, index_col="Date", parse_dates=True)
+            frame = self._recorded[ticker_symbol]
+            return frame[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))].copy()
+        return synthetic_frame(ticker_symbol, start, end)
+
+    def download(self, tickers, start=None, end=None, interval="1d", group_by="column", progress=False, **kwargs):
+        _sleep_ms(self.latency_ms)
+        end = end or datetime.today() + timedelta(days=1)
+        start = start or end - timedelta(days=90)
+
+        if isinstance(tickers, str):
+            frame = self._frame(tickers, start, end)
+            frame.columns = pd.MultiIndex.from_product([frame.columns, [tickers]])
+            return frame
+
+        frames = {ticker: self._frame(ticker, start, end) for ticker in tickers}
+        return pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+
+    def Ticker(self, ticker_symbol):
+        fake = self
+
+        class _Ticker:
+
+            @property
+            def info(self):
+                _sleep_ms(fake.latency_ms)
+                closes = synthetic_frame(ticker_symbol, datetime.today() - timedelta(days=10), datetime.today())["Close"]
+                price, previous = float(closes.iloc[-1]), float(closes.iloc[-2])
+                return {
+                    "symbol": ticker_symbol, "longName": f"{ticker_symbol} Holdings", "currency": "USD",
+                    "regularMarketPrice": price, "regularMarketChangePercent": (price - previous) / previous * 100,
+                    "dayHigh": price * 1.01, "dayLow": price * 0.99, "marketCap": 10_000_000_000,
+                    "sector": "Technology", "quoteType": "EQUITY", "website": "https://example.com",
+                    "targetMeanPrice": price * 1.1, "averageVolume": 1_000_000,
+                }
+
+            @property
+            def fast_info(self):
+                info = self.info
+                return SimpleNamespace(last_price=info["regularMarketPrice"],
+                                       previous_close=info["regularMarketPrice"] * 0.99,
+                                       day_high=info["dayHigh"], day_low=info["dayLow"])
+
+        return _Ticker()
+
+
+def record_frames(ticker_symbols, frames_dir, days=400):
+    """
+    Records real Yahoo Finance daily bars as CSV so later benchmark runs replay them offline.
+    """
+
+    import yfinance as yf
+
+    os.makedirs(frames_dir, exist_ok=True)
+    for ticker_symbol in ticker_symbols:
+        data = yf.download(ticker_symbol, start=datetime.today() - timedelta(days=days), interval="1d", progress=False)
+        if data is None or data.empty:
+            continue
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = [col[0] for col in data.columns]
+        data[["Open", "High", "Low", "Close", "Volume"]].to_csv(os.path.join(frames_dir, f"{ticker_symbol}.csv"))
+
+
+class FakeDDGS:
+    """
+    Stands in for `ddgs.DDGS`: canned results derived from the query.
+    """
+
+    latency_ms = 300
+
+    def text(self, keywords, region="us-en", max_results=25):
+        _sleep_ms(self.latency_ms)
+        slug = "-".join(keywords.lower().split())[:60]
+        return [
+            {"title": f"{keywords} — headline {i}", "href": f"https://news.example.com/{slug}/{i}",
+             "body": f"Analysts comment on {keywords}; item {i} of the canned result set."}
+            for i in range(min(max_results, 10))
+        ]
+
+
+class FakeMemoryClient:
+    """
+    In-memory stand-in for bedrock_agentcore's MemoryClient (short-term events only).
+    """
+
+    def __init__(self, latency_ms=40):
+        self.latency_ms = latency_ms
+        self._memories = []
+        self._events = {}
+        self._lock = threading.Lock()
+        self.gmcp_client = SimpleNamespace(list_memories=self._list_memories)
+
+    def _list_memories(self, maxResults=100, nextToken=None):
+        _sleep_ms(self.latency_ms)
+        return {"memories": [{"id": memory_id} for memory_id in self._memories]}
+
+    def create_memory_and_wait(self, name, **kwargs):
+        _sleep_ms(self.latency_ms)
+        memory_id = f"{name}-benchmark"
+        with self._lock:
+            self._memories.append(memory_id)
+        return {"id": memory_id}
+
+    def create_event(self, memory_id, actor_id, session_id, messages):
+        _sleep_ms(self.latency_ms)
+        with self._lock:
+            self._events.setdefault((memory_id, actor_id, session_id), []).append(
+                [{"role": role.upper(), "content": {"text": text}} for text, role in messages])
+
+    def get_last_k_turns(self, memory_id, actor_id, session_id, k=5, max_results=5):
+        _sleep_ms(self.latency_ms)
+        with self._lock:
+            return list(self._events.get((memory_id, actor_id, session_id), [])[-k:])
+
+
+class FakeS3:
+    """
+    In-memory stand-in for the boto3 S3 client calls agent.py makes.
+    """
+
+    def __init__(self, latency_ms=60):
+        self.latency_ms = latency_ms
+        self.objects = {}
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        _sleep_ms(self.latency_ms)
+        body = Body.encode("utf-8") if isinstance(Body, str) else Body if isinstance(Body, bytes) else Body.read()
+        with self._lock:
+            self.objects[(Bucket, Key)] = {"Body": body, **kwargs}
+        return {"ETag": hashlib.md5(body).hexdigest()}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        _sleep_ms(self.latency_ms)
+        with self._lock:
+            stored = self.objects.get((Bucket, Key))
+        if stored is None:
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject")
+        return {**{k: v for k, v in stored.items() if k != "Body"}, "Body": io.BytesIO(stored["Body"]),
+                "ContentLength": len(stored["Body"])}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        response = self.get_object(Bucket, Key)
+        response.pop("Body")
+        return response
+
+    def upload_file(self, Filename, Bucket, Key, **kwargs):
+        with open(Filename, "rb") as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f.read())
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600):
+        return f"https://{Params['Bucket']}.s3.local/{Params['Key']}?X-Amz-Expires={ExpiresIn}&X-Amz-Signature=benchmark"
+
+
+class FakeAgentCoreClient:
+    """
+    Stands in for the `bedrock-agentcore` boto3 client of the backend Lambda: invoke_agent_runtime
+    runs the agent entrypoint in-process on `loop` and shapes the answer like the runtime does
+    (text/event-stream for generators, application/json otherwise).
+    """
+
+    def __init__(self, entrypoint, loop):
+        self.entrypoint = entrypoint
+        self.loop = loop
+
+    async def _invoke(self, payload):
+        result = await self.entrypoint(json.loads(payload))
+        if hasattr(result, "__aiter__"):
+            return [event async for event in result], True
+        return result, False
+
+    def invoke_agent_runtime(self, agentRuntimeArn, runtimeSessionId, payload, qualifier=None, **kwargs):
+        result, streamed = asyncio.run_coroutine_threadsafe(self._invoke(payload), self.loop).result()
+
+        if streamed:
+            body = b"".join(f"data: {json.dumps(event, default=str)}\n\n".encode("utf-8") for event in result)
+            return {"contentType": "text/event-stream", "response": _StreamingBody(body)}
+
+        return {"contentType": "application/json", "response": [json.dumps(result, default=str).encode("utf-8")]}
+
+
+class _StreamingBody:
+
+    def __init__(self, body):
+        self._stream = io.BytesIO(body)
+
+    def read(self, amt=None):
+        return self._stream.read(amt)
+
+    def iter_chunks(self, chunk_size=1024):
+        while chunk := self._stream.read(chunk_size):
+            yield chunk
+
+    def iter_lines(self, chunk_size=1024, keepends=False):
+        for line in self._stream.read().splitlines(keepends):
+            yield line
+
+
+class TimedEventStream:
+    """
+    Raw HTTP response body with urllib3's read semantics, delivering one server-sent event every
+    `interval_ms` (the first after one interval): read(n) waits for n bytes or the end of the body,
+    read1(n) returns what has already arrived, waiting only when nothing has.
+    """
+
+    def __init__(self, events, interval_ms=0):
+        self._data = b"".join(events)
+        self._ends = list(itertools.accumulate(len(event) for event in events))
+        self._interval = interval_ms / 1000
+        self._position = 0
+        self._started = None
+
+    def _arrived(self, wait):
+        if self._started is None:
+            self._started = time.perf_counter()
+        if not self._interval:
+            return len(self._data)
+
+        count = int((time.perf_counter() - self._started) / self._interval)
+        if wait and count < len(self._ends) and (count == 0 or self._ends[count - 1] <= self._position):
+            # Nothing new yet: wait for the next event
+            next_count = next(i + 1 for i, end in enumerate(self._ends) if end > self._position)
+            time.sleep(max(0.0, self._started + next_count * self._interval - time.perf_counter()))
+            count = next_count
+        return self._ends[min(count, len(self._ends)) - 1] if count else 0
+
+    def read1(self, amt=-1):
+        available = self._arrived(wait=True) - self._position
+        size = available if amt is None or amt < 0 else min(amt, available)
+        chunk = self._data[self._position:self._position + size]
+        self._position += size
+        return chunk
+
+    def read(self, amt=None):
+        chunks, remaining = [], amt
+        while remaining is None or remaining > 0:
+            chunk = self.read1(-1 if remaining is None else remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+        return b"".join(chunks)
+
+
+def install_fakes(agent_module, model=None, yfinance=None, search_latency_ms=300, memory_latency_ms=40,
+                  s3_latency_ms=60, bucket_name="benchmark-bucket", store_dir=None, setattr=setattr):
+    """
+    Swaps every external dependency of an imported agent module for a local fake, empties its
+    caches and returns the fakes as a namespace. Every change goes through `setattr`; tests pass
+    monkeypatch.setattr so the module is restored afterwards.
+    """
+
+    fakes = SimpleNamespace(
+        model=model or ScriptedModel(),
+        yfinance=yfinance or FakeYFinance(),
+        memory_client=FakeMemoryClient(latency_ms=memory_latency_ms),
+        s3=FakeS3(latency_ms=s3_latency_ms),
+    )
+
+    fakes.model.update_config(cache_prompt=agent_module.BEDROCK_PROMPT_CACHE or None)
+    setattr(FakeDDGS, "latency_ms", search_latency_ms)
+    setattr(agent_module, "model", fakes.model)
+    setattr(agent_module.model_registry, "model_factory", lambda model_id, max_tokens: fakes.model)
+    for attribute in ("models", "_slots", "_limiters"):
+        setattr(agent_module.model_registry, attribute, {})
+    setattr(agent_module, "yf", fakes.yfinance)
+    setattr(agent_module, "ddgs", SimpleNamespace(DDGS=FakeDDGS))
+    setattr(agent_module, "memory_client", fakes.memory_client)
+    setattr(agent_module, "s3_client", fakes.s3)
+    setattr(agent_module, "S3_BUCKET_NAME", bucket_name)
+    for result_cache in (agent_module.business_model_cache, agent_module.analysis_index):
+        setattr(result_cache, "s3_client", fakes.s3)
+        setattr(result_cache, "bucket_name", bucket_name)
+    for cache in (agent_module.business_model_cache, agent_module.analysis_index, agent_module.quote_cache,
+                  agent_module.search_cache):
+        setattr(cache, "_entries", type(cache._entries)())
+    setattr(agent_module.search_cache, "_size", 0)
+    setattr(agent_module.MemoryInstance, "_resolved_memory_id", None)
+    if store_dir:
+        setattr(agent_module.ohlcv_store, "root_dir", store_dir)
+        os.makedirs(store_dir, exist_ok=True)
+
+    return fakes
@@ -0,0 +1,77 @@
+import importlib
+import threading
+
+_UNSET = object()
+
+
+class LazyModule:
+    """
+    Stands in for a module and imports it on first attribute access, so a heavy dependency
+    (yfinance, pandas, ddgs) is only loaded when a request needs it.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}{'' if self._module is None else ' (loaded)'}>"
+
+
+class LazyObject:
+    """
+    Stands in for an object (a client, a store) built by `factory` on first use. Attribute reads
+    and writes go to the built object, which is built once even when threads race for it.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_value", _UNSET)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        if self._value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    object.__setattr__(self, "_value", self._factory())
+        return self._value
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._load(), attribute, value)
+
+    def __repr__(self):
+        return f"<lazy {getattr(self._factory, '__name__', 'object')}{'' if self._value is _UNSET else ' (loaded)'}>"
+
+
+def is_loaded(value):
+    """
+    False for a lazy module or object that has not been loaded yet, True otherwise.
+    """
+
+    if isinstance(value, LazyModule):
+        return value._module is not None
+    if isinstance(value, LazyObject):
+        return value._value is not _UNSET
+    return True
+
+
+def resolve(*values):
+    """
+    Loads the given lazy modules and objects now; anything else (e.g. a fake swapped in by a test)
+    is left alone.
+    """
+
+    for value in values:
+        if isinstance(value, (LazyModule, LazyObject)):
+            value._load()
@@ -0,0 +1,274 @@
+import asyncio
+import collections
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from strands.models import Model
+
+import tracing
+from rate_limiter import AdaptiveRateLimiter, RetryBudgetExceeded, backoff_delay, is_throttle
+
+logger = logging.getLogger("financial-agent")
+
+# LLM stages that can be routed to their own model
+STAGES = ("news", "business_model", "performance", "summariser", "report")
+
+
+def parse_stage_settings(spec, cast=str):
+    """
+    Parses "news=<model id>,summariser=<model id>" (or "news=800,...") into {stage: cast(value)}.
+    """
+
+    settings = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        stage, _, value = item.partition("=")
+        if stage.strip() not in STAGES or not value.strip():
+            raise ValueError(f"Invalid stage setting: {item!r}")
+        settings[stage.strip()] = cast(value.strip())
+    return settings
+
+
+def parse_model_limits(spec, cast=int):
+    """
+    Parses "<model id>=16,<model id>=4" into {model id: 16, ...}.
+    """
+
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        model_id, _, limit = item.rpartition("=")
+        try:
+            value = cast(limit.strip())
+        except ValueError:
+            value = 0
+        if not model_id.strip() or not value > 0:
+            raise ValueError(f"Invalid model limit: {item!r}")
+        limits[model_id.strip()] = value
+    return limits
+
+
+class ModelSlots:
+    """
+    Counting semaphore usable from any event loop: requests acquire it on the runtime's loop, while
+    MasterAgent.run and the precompute CLI run their analyses on event loops of their own. Slots are
+    handed to waiters first come, first served.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiters = collections.deque()
+
+    def _reserve(self):
+        # A future that is done once the caller holds a slot
+        future = Future()
+        with self._lock:
+            if self._in_use < self.limit and not self._waiters:
+                self._in_use += 1
+                future.set_result(None)
+            else:
+                self._waiters.append(future)
+        return future
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                # Hand the slot straight to the next waiter that has not given up
+                if waiter.set_running_or_notify_cancel():
+                    waiter.set_result(None)
+                    return
+            self._in_use -= 1
+
+    async def acquire(self):
+        future = self._reserve()
+        try:
+            await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Granted just as the caller was cancelled: give the slot back
+            if not future.cancel():
+                self.release()
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {"limit": self.limit, "in_use": self._in_use, "waiting": len(self._waiters)}
+
+
+class RoutedModel(Model):
+    """
+    Wraps a stage's model so every model call holds one of its model's slots while it streams
+    (tool calls between model calls do not hold one) and goes through its model's rate limiter.
+    A call throttled before its first event is retried with jittered backoff for up to
+    retry_budget_seconds; then RetryBudgetExceeded is raised, which Strands does not retry again.
+    """
+
+    def __init__(self, model, model_id, slots, limiter, retry_budget_seconds=120):
+        self.model = model
+        self.model_id = model_id
+        self.slots = slots
+        self.limiter = limiter
+        self.retry_budget_seconds = retry_budget_seconds
+
+    @property
+    def config(self):
+        return self.model.get_config()
+
+    def update_config(self, **model_config):
+        self.model.update_config(**model_config)
+
+    def get_config(self):
+        return self.model.get_config()
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            with tracing.span(f"model:{self.model_id}", "wait"):
+                await self.slots.acquire()
+                try:
+                    granted_at = await self.limiter.acquire()
+                except BaseException:
+                    # Cancelled while waiting for a token (e.g. the client disconnected): give the slot back
+                    self.slots.release()
+                    raise
+
+            streamed = False
+            try:
+                async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                    streamed = True
+                    yield event
+                self.limiter.on_success()
+                return
+            except Exception as e:
+                # Only a call throttled before its first event can be sent again as is
+                if streamed or not is_throttle(e):
+                    raise
+                self.limiter.on_throttle(granted_at)
+                delay = backoff_delay(attempt)
+                if time.perf_counter() - started + delay > self.retry_budget_seconds:
+                    tracing.record_throttle("exhausted")
+                    raise RetryBudgetExceeded(f"{self.model_id} still throttled after {attempt + 1} attempts in "
+                                              f"{time.perf_counter() - started:.1f}s (retry budget "
+                                              f"{self.retry_budget_seconds:g}s)") from e
+                tracing.record_throttle("retried")
+                logger.info(f"⏳ {self.model_id} throttled, retrying in {delay:.2f}s (rate {self.limiter.rate:.2f}/s)")
+            finally:
+                self.slots.release()
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        await self.slots.acquire()
+        try:
+            async for event in self.model.structured_output(output_model, prompt, system_prompt, **kwargs):
+                yield event
+        finally:
+            self.slots.release()
+
+
+class ModelRegistry:
+    """
+    Routes each LLM stage to a model id and max tokens, and bounds the model calls in flight per
+    model id, so a busy stage cannot use up the account's throughput for the others. Stages
+    without a route run on the default model; stages on the same model id share its slots and
+    its adaptive rate limiter.
+
+    model_factory(model_id, max_tokens) builds a model; one is built per (model id, max tokens)
+    on first use and kept in `models`.
+    """
+
+    def __init__(self, model_factory, default_model_id, routes=None, max_concurrency=None,
+                 default_max_concurrency=16, max_requests_per_second=None, default_max_requests_per_second=None,
+                 retry_budget_seconds=120):
+        self.model_factory = model_factory
+        self.default_model_id = default_model_id
+        self.routes = {stage: {"model_id": default_model_id, "max_tokens": None} for stage in STAGES}
+        for stage, route in (routes or {}).items():
+            if stage not in STAGES:
+                raise ValueError(f"Unknown model routing stage: {stage!r}")
+            self.routes[stage].update({key: value for key, value in route.items() if value is not None})
+        self.max_concurrency = dict(max_concurrency or {})
+        self.default_max_concurrency = default_max_concurrency
+        self.max_requests_per_second = dict(max_requests_per_second or {})
+        self.default_max_requests_per_second = default_max_requests_per_second
+        self.retry_budget_seconds = retry_budget_seconds
+        self.models = {}
+        self._slots = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, model_factory, default_model_id, config_path=None, stage_models="", stage_max_tokens="",
+                    model_max_concurrency="", default_max_concurrency=16, model_max_requests_per_second="",
+                    default_max_requests_per_second=None, retry_budget_seconds=120):
+        """
+        Builds the registry from a JSON config file, overridden by the environment style settings:
+
+            {"stages": {"news": {"model_id": "...", "max_tokens": 800}, ...},
+             "max_concurrency": {"<model id>": 16, ...},
+             "max_requests_per_second": {"<model id>": 5, ...}}
+        """
+
+        config = {}
+        if config_path:
+            with open(config_path) as f:
+                config = json.load(f)
+
+        routes = {stage: dict(route) for stage, route in config.get("stages", {}).items()}
+        for stage, model_id in parse_stage_settings(stage_models).items():
+            routes.setdefault(stage, {})["model_id"] = model_id
+        for stage, max_tokens in parse_stage_settings(stage_max_tokens, int).items():
+            routes.setdefault(stage, {})["max_tokens"] = max_tokens
+
+        max_concurrency = {**config.get("max_concurrency", {}), **parse_model_limits(model_max_concurrency)}
+        max_requests_per_second = {**config.get("max_requests_per_second", {}),
+                                   **parse_model_limits(model_max_requests_per_second, float)}
+        return cls(model_factory, default_model_id, routes, max_concurrency,
+                   config.get("default_max_concurrency", default_max_concurrency),
+                   max_requests_per_second,
+                   config.get("default_max_requests_per_second", default_max_requests_per_second),
+                   config.get("retry_budget_seconds", retry_budget_seconds))
+
+    def slots(self, model_id):
+        with self._lock:
+            if model_id not in self._slots:
+                self._slots[model_id] = ModelSlots(self.max_concurrency.get(model_id, self.default_max_concurrency))
+            return self._slots[model_id]
+
+    def limiter(self, model_id):
+        with self._lock:
+            if model_id not in self._limiters:
+                # No known quota (None or 0): not paced until the model throttles
+                max_rate = self.max_requests_per_second.get(model_id, self.default_max_requests_per_second) or None
+                self._limiters[model_id] = AdaptiveRateLimiter(max_rate=max_rate, min_rate=min(0.2, max_rate or 0.2))
+            return self._limiters[model_id]
+
+    def model(self, stage):
+        """
+        Returns the stage's model, bounded by its model id's slots.
+        """
+
+        route = self.routes[stage]
+        key = (route["model_id"], route["max_tokens"])
+        with self._lock:
+            if key not in self.models:
+                self.models[key] = self.model_factory(*key)
+            model = self.models[key]
+        return RoutedModel(model, route["model_id"] or "default", self.slots(route["model_id"]),
+                           self.limiter(route["model_id"]), self.retry_budget_seconds)
+
+    def stats(self):
+        """
+        Returns {model id: {limit, in_use, waiting, rate, throttles, successes}}.
+        """
+
+        with self._lock:
+            slots = dict(self._slots)
+            limiters = dict(self._limiters)
+        return {model_id or "default": {**model_slots.stats(), **(limiters[model_id].stats() if model_id in limiters else {})}
+                for model_id, model_slots in slots.items()}
@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import tracing
+
+logger = logging.getLogger("financial-agent")
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+_EPOCH = pd.Timestamp("1970-01-01")
+
+
+def _to_epoch_days(index):
+    return ((pd.DatetimeIndex(index).tz_localize(None).normalize() - _EPOCH) // pd.Timedelta(days=1)).to_numpy(dtype=np.float64)
+
+
+def _from_epoch_days(days):
+    return pd.DatetimeIndex(_EPOCH + pd.to_timedelta(days, unit="D"), name="Date")
+
+
+class OHLCVStore:
+    """
+    On-disk store of daily OHLCV bars, one memory-mapped NumPy file per ticker.
+
+    Each `<TICKER>.npy` holds a float64 array of rows [epoch_day, Open, High, Low, Close, Volume]
+    sorted by date, with a `<TICKER>.json` sidecar recording the covered range and last sync time.
+    A window request only downloads the bars missing since the last stored one (the last bar is
+    re-fetched as it may have been partial) and is then served by slicing the local array.
+
+    Files are replaced atomically, so readers holding an older memory map are never affected by
+    a concurrent update, and a per-ticker lock makes concurrent requests share one download.
+    """
+
+    def __init__(self, downloader, root_dir, retention_days=365, refresh_seconds=900):
+        """
+        downloader: callable(ticker_symbol, start_date, end_date) returning a DataFrame indexed
+                    by Date with the OHLCV columns, or None / an empty frame when there is no data.
+        """
+
+        self.downloader = downloader
+        self.root_dir = root_dir
+        self.retention_days = retention_days
+        self.refresh_seconds = refresh_seconds
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def _ticker_lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _key(ticker_symbol):
+        return re.sub(r"[^A-Z0-9._-]", "_", ticker_symbol.upper())
+
+    def _paths(self, key):
+        return os.path.join(self.root_dir, f"{key}.npy"), os.path.join(self.root_dir, f"{key}.json")
+
+    def _load(self, key):
+        array_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            bars = np.load(array_path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None, None
+        return bars, meta
+
+    def _write(self, key, bars, meta):
+        array_path, meta_path = self._paths(key)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with open(array_path + suffix, "wb") as f:
+            np.save(f, bars)
+        os.replace(array_path + suffix, array_path)
+
+        with open(meta_path + suffix, "w") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+
+    def _download(self, ticker_symbol, start_day, end_day):
+        start_date = _from_epoch_days([start_day])[0].to_pydatetime()
+        # yfinance treats `end` as exclusive
+        end_date = _from_epoch_days([end_day + 1])[0].to_pydatetime()
+
+        data = self.downloader(ticker_symbol, start_date, end_date)
+        if data is None or data.empty:
+            return np.empty((0, len(OHLCV_COLUMNS) + 1))
+
+        data = data[OHLCV_COLUMNS].dropna(subset=["Close"])
+        return np.column_stack([_to_epoch_days(data.index), data.to_numpy(dtype=np.float64)])
+
+    @staticmethod
+    def _merge(bars, new_bars):
+        if bars is None or len(bars) == 0:
+            merged = new_bars
+        else:
+            # Newly downloaded bars replace stored ones for the same day
+            merged = np.concatenate([bars[~np.isin(bars[:, 0], new_bars[:, 0])], new_bars])
+        return merged[np.argsort(merged[:, 0], kind="stable")]
+
+    def _sync(self, ticker_symbol, key, start_day, today):
+        bars, meta = self._load(key)
+        now = time.time()
+
+        if meta and meta["covered_from"] <= start_day and now - meta["synced_at"] < self.refresh_seconds:
+            tracing.record_cache("ohlcv", "hits")
+            return bars
+
+        tracing.record_cache("ohlcv", "syncs")
+
+        retention_start = today - self.retention_days
+        covered_from = max(min(start_day, meta["covered_from"]) if meta else start_day, retention_start)
+        fetched = []
+
+        if not meta or len(bars) == 0:
+            fetched.append(self._download(ticker_symbol, covered_from, today))
+        else:
+            if covered_from < meta["covered_from"]:
+                # Backfill days requested before the stored range
+                fetched.append(self._download(ticker_symbol, covered_from, meta["covered_from"] - 1))
+            # Re-fetch from the last stored bar, which may have been an intraday snapshot
+            fetched.append(self._download(ticker_symbol, bars[-1, 0], today))
+
+        new_bars = np.concatenate(fetched) if fetched else np.empty((0, len(OHLCV_COLUMNS) + 1))
+        merged = self._merge(None if bars is None else np.asarray(bars), new_bars)
+        merged = merged[merged[:, 0] >= retention_start]
+
+        self._write(key, merged, {"covered_from": covered_from, "synced_at": now})
+        logger.info(f"✅ OHLCV store synced {ticker_symbol}: {len(new_bars)} bars fetched, {len(merged)} stored")
+
+        return np.load(self._paths(key)[0], mmap_mode="r")
+
+    def get_window(self, ticker_symbol, days=90):
+        """
+        Returns the last `days` calendar days of daily bars for the ticker as a DataFrame
+        indexed by Date, downloading only what the local store is missing. Windows longer
+        than the retention are cut to it. Returns None when no bars are available.
+        """
+
+        if days > self.retention_days:
+            # The store never holds more, so a longer window would re-download on every call
+            logger.info(f"⚠️ OHLCV window of {days} days cut to the {self.retention_days} day retention")
+            days = self.retention_days
+
+        key = self._key(ticker_symbol)
+        today = float((pd.Timestamp(datetime.today()).normalize() - _EPOCH).days)
+        start_day = today - days
+
+        with self._ticker_lock(key):
+            bars = self._sync(ticker_symbol, key, start_day, today)
+
+        if bars is None or len(bars) == 0:
+            return None
+
+        start = np.searchsorted(bars[:, 0], start_day, side="left")
+        # Copy the slice out of the memory map so the file can be replaced underneath
+        window = np.array(bars[start:])
+        if len(window) == 0:
+            return None
+
+        return pd.DataFrame(window[:, 1:], index=_from_epoch_days(window[:, 0]), columns=OHLCV_COLUMNS)
@@ -0,0 +1,150 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import inspect
+import logging
+import time
+
+logger = logging.getLogger("financial-agent")
+
+
+class Stage:
+    """
+    One unit of pipeline work. `fn` is called with the results of the stages named in
+    `inputs` as keyword arguments, as soon as all of them have completed.
+    """
+
+    def __init__(self, name, fn, inputs=()):
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+
+
+class StageResult:
+
+    def __init__(self, name, value=None, error=None, started=0.0, finished=0.0):
+        self.name = name
+        self.value = value
+        self.error = error
+        self.started = started
+        self.finished = finished
+
+    @property
+    def seconds(self):
+        return self.finished - self.started
+
+
+class AsyncDAGExecutor:
+    """
+    Runs a set of stages as a dependency graph on the event loop: every stage starts as soon as
+    its inputs are ready, and results are yielded in completion order. Coroutine stages run on the
+    loop and plain functions (blocking I/O) are moved to `io_executor` (the loop's default executor
+    when None). A stage that raises is logged and yields a None value, so its dependents still run
+    with partial data.
+    """
+
+    def __init__(self, stages, io_executor=None, trace=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.results = {}
+        self.io_executor = io_executor
+        self.trace = trace
+        self._validate()
+
+    def _stage_span(self, stage):
+        # Each stage becomes a span of the request trace, parent of the tool and agent spans inside it
+        return self.trace.span(stage.name, "stage") if self.trace else contextlib.nullcontext()
+
+    def _validate(self):
+        for stage in self.stages.values():
+            unknown = [name for name in stage.inputs if name not in self.stages]
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {unknown}")
+
+        # Kahn's algorithm: every stage must become ready eventually
+        remaining = {name: set(stage.inputs) for name, stage in self.stages.items()}
+        while remaining:
+            ready = [name for name, inputs in remaining.items() if not inputs]
+            if not ready:
+                raise ValueError(f"Stage dependencies contain a cycle: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for inputs in remaining.values():
+                inputs.difference_update(ready)
+
+    def _ready_stages(self, pending):
+        for name, stage in list(pending.items()):
+            if all(input_name in self.results for input_name in stage.inputs):
+                del pending[name]
+                yield stage, {input_name: self.results[input_name].value for input_name in stage.inputs}
+
+    def critical_path(self):
+        """
+        Returns the chain of stages that determined the end-to-end time, as a list of
+        StageResult from the first stage to the last one to finish.
+        """
+
+        if not self.results:
+            return []
+
+        path = [max(self.results.values(), key=lambda result: result.finished)]
+        while True:
+            inputs = [self.results[name] for name in self.stages[path[-1].name].inputs if name in self.results]
+            if not inputs:
+                break
+            path.append(max(inputs, key=lambda result: result.finished))
+
+        return list(reversed(path))
+
+    def log_critical_path(self, label=""):
+        path = self.critical_path()
+        if path:
+            chain = " → ".join(f"{result.name} ({result.seconds:.2f}s)" for result in path)
+            logger.info(f"⏱️ Critical path{' for ' + label if label else ''}: {chain} | total {path[-1].finished:.2f}s")
+
+    async def _execute(self, stage, kwargs):
+        started = time.perf_counter() - self.started
+        try:
+            with self._stage_span(stage):
+                if inspect.iscoroutinefunction(stage.fn):
+                    value = await stage.fn(**kwargs)
+                else:
+                    loop = asyncio.get_running_loop()
+                    context = contextvars.copy_context()
+                    value = await loop.run_in_executor(self.io_executor, functools.partial(context.run, stage.fn, **kwargs))
+            error = None
+        except Exception as e:
+            logger.info(f"❌ Error in {stage.name}: {e}")
+            value, error = None, e
+        return StageResult(stage.name, value, error, started, time.perf_counter() - self.started)
+
+    async def run(self):
+        """
+        Executes the graph, yielding a StageResult as each stage completes.
+        """
+
+        self.started = time.perf_counter()
+        self.results = {}
+        pending = dict(self.stages)
+        running = set()
+
+        def submit_ready():
+            for stage, kwargs in self._ready_stages(pending):
+                running.add(asyncio.ensure_future(self._execute(stage, kwargs)))
+
+        try:
+            submit_ready()
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                running.difference_update(done)
+                completed = [task.result() for task in done]
+                for stage_result in completed:
+                    self.results[stage_result.name] = stage_result
+
+                submit_ready()
+                for stage_result in completed:
+                    yield stage_result
+        finally:
+            # The consumer went away: do not leave orphaned stages running
+            for task in running:
+                task.cancel()
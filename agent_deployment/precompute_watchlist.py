@@ -0,0 +1,269 @@
+# Precomputes the analyses of a watchlist ahead of traffic (e.g. before the market opens) and
+# writes them to the shared analysis index, so interactive requests for those tickers are
+# answered from it (see find_reusable_analysis) instead of running the LLM stages.
+#
+#   python precompute_watchlist.py watchlist.txt --fetch-workers 8 --max-concurrency 16
+#
+# Quotes, OHLCV bars and technical metrics are fetched in a pool of worker processes; the LLM
+# stages run on the event loop, at most --max-concurrency tickers at a time. Every finished stage
+# is appended to a checkpoint file, so an interrupted run picks up where it stopped.
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import agent
+from report_renderer import render_shared_report
+
+logger = logging.getLogger("financial-agent")
+
+# LLM stages of an analysis, in the order they run
+PRECOMPUTE_STAGES = ("stock_related_news", "company_business_model_data", "stock_performance", "summary", "commentary")
+
+
+def read_watchlist(path):
+    """
+    Reads a watchlist: a JSON list like the batch payload's `tickers` (or an object holding one),
+    or a text file with one `TICKER[,Stock Name]` per line and `#` comments.
+    """
+
+    with open(path) as f:
+        content = f.read()
+
+    if path.endswith(".json"):
+        tickers = json.loads(content)
+        return agent.parse_batch_tickers(tickers["tickers"] if isinstance(tickers, dict) else tickers)
+
+    tickers = []
+    for line in content.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            ticker_symbol, _, stock_name = line.partition(",")
+            tickers.append({"ticker_symbol": ticker_symbol, "stock_name": stock_name.strip() or None})
+    return agent.parse_batch_tickers(tickers)
+
+
+def fetch_market_data(ticker_symbol):
+    """
+    Fetches the quote and the OHLCV bars of the ticker and computes its technical metrics. Runs in
+    a worker process: the bars land in the OHLCV store directory, the quote and metrics are returned.
+    """
+
+    return {
+        "quote": agent.quote_cache.get(ticker_symbol),
+        "stock_technical_metrics": agent.technical_metrics_task(ticker_symbol),
+    }
+
+
+class PrecomputeCheckpoint:
+    """
+    Append-only JSON lines file of the LLM stage results of unfinished analyses. A stage result is
+    reused by a later run while it is from the same trading session and the price has not moved
+    more than ANALYSIS_REUSE_MAX_PRICE_MOVE_PERCENT since; the results of a ticker are dropped once
+    its analysis is indexed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._stages = {}
+
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        # The line being written when the previous run was interrupted
+                        continue
+
+    def _apply(self, record):
+        if record.get("cleared"):
+            self._stages.pop(record["ticker"], None)
+        else:
+            self._stages.setdefault(record["ticker"], {})[record["stage"]] = record
+
+    def _append(self, record):
+        self._apply(record)
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def stages(self, ticker_symbol, session, price):
+        """
+        Returns {stage: result} of the ticker's stages still valid for the session and price.
+        """
+
+        return {
+            stage: record["value"] for stage, record in self._stages.get(ticker_symbol, {}).items()
+            if record["session"] == session and price and record["price"]
+            and abs(price - record["price"]) / record["price"] * 100 <= agent.ANALYSIS_REUSE_MAX_PRICE_MOVE_PERCENT
+        }
+
+    def record(self, ticker_symbol, session, price, stage, value):
+        self._append({"ticker": ticker_symbol, "session": session, "price": price, "stage": stage, "value": value})
+
+    def clear(self, ticker_symbol):
+        if ticker_symbol in self._stages:
+            self._append({"ticker": ticker_symbol, "cleared": True})
+
+
+async def precompute_ticker(ticker, fetch, llm_slots, checkpoint, refresh_business_model=False,
+                            report_commentary=agent.REPORT_LLM_COMMENTARY, force=False):
+    """
+    Analyses one ticker and indexes the analysis for reuse. Returns "fresh" when a reusable analysis
+    already exists, "indexed" when a new one was indexed and "failed" otherwise.
+    """
+
+    ticker_symbol = ticker["ticker_symbol"]
+    trace = agent.tracer.start_trace("precompute", ticker=ticker_symbol)
+
+    try:
+        with trace.span("market_data", "stage", ticker=ticker_symbol):
+            market = await fetch(ticker_symbol)
+        agent.quote_cache.put(ticker_symbol, market["quote"])
+
+        if not force and not refresh_business_model:
+            with trace.span("analysis_index", "lookup"):
+                if await agent.run_blocking(agent.find_reusable_analysis, ticker_symbol, report_commentary):
+                    return "fresh"
+
+        quote = market["quote"]
+        share_name = ticker.get("stock_name") or quote.get("longName") or quote.get("shortName") or ticker_symbol
+        stock_information = agent.current_price_bedrock_agent(ticker_symbol)
+        price = (stock_information[0] or {}).get("price")
+        session = agent.trading_session(quote)
+        done = checkpoint.stages(ticker_symbol, session, price)
+
+        async def stage(name, run):
+            if name in done:
+                return done[name]
+            with trace.span(name, "stage", ticker=ticker_symbol):
+                value = await run()
+            if value is not None:
+                checkpoint.record(ticker_symbol, session, price, name, value)
+            return value
+
+        with trace.span("queued", "wait"):
+            await llm_slots.acquire()
+        try:
+            news, business_model = await asyncio.gather(
+                stage("stock_related_news", lambda: agent.news_agent_bedrock_async(share_name=share_name)),
+                stage("company_business_model_data", lambda: agent.business_model_task_async(
+                    share_name=share_name, ticker_symbol=ticker_symbol, refresh=refresh_business_model))
+            )
+            results = agent.collect_stage_results({
+                "stock_information": stock_information,
+                "stock_technical_metrics": market["stock_technical_metrics"],
+                "stock_related_news": news,
+                "company_business_model_data": business_model,
+            })
+            results["stock_performance"] = await stage("stock_performance", lambda: agent.performance_bedrock_agent_async(
+                ticker_symbol=ticker_symbol, result=results))
+            summary = await stage("summary", lambda: agent.summariser_agent_async(results))
+            commentary = None
+            if report_commentary:
+                commentary = await stage("commentary", lambda: agent.report_commentary_agent_async(results, summary))
+        finally:
+            llm_slots.release()
+
+        stock_history = await agent.run_blocking(agent.fetch_stock_history, ticker_symbol)
+        report_template = render_shared_report(
+            share_name, ticker_symbol, results, summary, datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+            stock_history=stock_history,
+            recommendation=agent.parse_recommendation(results.get("stock_performance")),
+            commentary=commentary
+        )
+        entry = await agent.run_blocking(agent.remember_analysis, ticker_symbol, report_commentary, results, summary,
+                                         report_template)
+        if not entry:
+            return "failed"
+
+        checkpoint.clear(ticker_symbol)
+        return "indexed"
+
+    except Exception as e:
+        logger.info(f"❌ Precompute of {ticker_symbol} failed: {e}")
+        trace.finish(error=e)
+        return "failed"
+
+    finally:
+        trace.finish()
+
+
+async def precompute_watchlist(tickers, fetch_workers=os.cpu_count(), max_concurrency=agent.ANALYSIS_MAX_CONCURRENCY,
+                               checkpoint_path="precompute_checkpoint.jsonl", refresh_business_model=False,
+                               report_commentary=agent.REPORT_LLM_COMMENTARY, force=False):
+    """
+    Precomputes every ticker of the watchlist. Returns {ticker: "fresh" | "indexed" | "failed"}.
+    With fetch_workers=0 the market data is fetched on the agent's I/O threads instead of in
+    worker processes.
+    """
+
+    if agent.ANALYSIS_REUSE_MAX_AGE_SECONDS <= 0:
+        logger.info("⚠️ ANALYSIS_REUSE_MAX_AGE_SECONDS is 0: analyses are not indexed, only business models are cached")
+
+    checkpoint = PrecomputeCheckpoint(checkpoint_path)
+    llm_slots = asyncio.Semaphore(max_concurrency)
+    loop = asyncio.get_running_loop()
+    # spawn: the workers must not inherit the event loop's threads and locks
+    pool = ProcessPoolExecutor(max_workers=fetch_workers, mp_context=multiprocessing.get_context("spawn")) \
+        if fetch_workers else None
+
+    async def fetch(ticker_symbol):
+        if pool:
+            return await loop.run_in_executor(pool, fetch_market_data, ticker_symbol)
+        return await agent.run_blocking(fetch_market_data, ticker_symbol)
+
+    async def run(ticker):
+        outcome = await precompute_ticker(ticker, fetch, llm_slots, checkpoint,
+                                          refresh_business_model=refresh_business_model,
+                                          report_commentary=report_commentary, force=force)
+        logger.info(f"{'✅' if outcome != 'failed' else '❌'} {ticker['ticker_symbol']}: {outcome}")
+        return ticker["ticker_symbol"], outcome
+
+    try:
+        return dict(await asyncio.gather(*(run(ticker) for ticker in tickers)))
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the analyses of a watchlist into the shared analysis index")
+    parser.add_argument("watchlist", help="Watchlist file: one TICKER[,Stock Name] per line, or a JSON list")
+    parser.add_argument("--fetch-workers", type=int, default=os.cpu_count(),
+                        help="Worker processes fetching quotes and OHLCV data (0: fetch on threads)")
+    parser.add_argument("--max-concurrency", type=int, default=agent.ANALYSIS_MAX_CONCURRENCY,
+                        help="Tickers whose LLM stages run at once")
+    parser.add_argument("--checkpoint", default="precompute_checkpoint.jsonl",
+                        help="File recording finished stages, to resume an interrupted run")
+    parser.add_argument("--refresh-business-model", action="store_true")
+    parser.add_argument("--report-commentary", action="store_true", default=agent.REPORT_LLM_COMMENTARY)
+    parser.add_argument("--force", action="store_true", help="Recompute tickers that already have a fresh analysis")
+    args = parser.parse_args(argv)
+
+    tickers = read_watchlist(args.watchlist)
+    started = time.perf_counter()
+    outcomes = asyncio.run(precompute_watchlist(
+        tickers, fetch_workers=args.fetch_workers, max_concurrency=max(1, args.max_concurrency),
+        checkpoint_path=args.checkpoint, refresh_business_model=args.refresh_business_model,
+        report_commentary=args.report_commentary, force=args.force
+    ))
+
+    counts = {outcome: list(outcomes.values()).count(outcome) for outcome in ("indexed", "fresh", "failed")}
+    print(f"{len(tickers)} tickers in {time.perf_counter() - started:.0f}s: {counts['indexed']} indexed, "
+          f"{counts['fresh']} already fresh, {counts['failed']} failed")
+    if counts["failed"]:
+        print("Failed: " + ", ".join(ticker for ticker, outcome in outcomes.items() if outcome == "failed"))
+
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
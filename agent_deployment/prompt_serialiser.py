@@ -0,0 +1,147 @@
+import math
+import re
+
+# Sections of the analysis results in prompt order: section name -> (results key, fields to keep).
+# Fields are listed explicitly so the prompt schema does not change when a data source adds keys;
+# None keeps a text section as is.
+PROMPT_SCHEMA = {
+    "quote": ("stock_information", (
+        "symbol", "price", "currency", "change_percent", "dayHigh", "dayLow", "52WeekChange",
+        "allTimeHigh", "allTimeLow", "averageVolume", "marketCap", "sector",
+        "targetLowPrice", "targetMeanPrice", "targetHighPrice",
+    )),
+    "technical_metrics": ("stock_technical_metrics", (
+        "first_close", "last_close", "percent_change", "volatility_index", "volatility_label", "trend",
+        "trend_change_percent", "trend_stability", "max_drawdown_percent", "average_volume", "trading_days",
+    )),
+    "business_model": ("company_business_model_data", None),
+    "news_sentiment": ("stock_related_news", None),
+    "performance": ("stock_performance", None),
+    "summary": ("summary", None),
+}
+
+# Rough size of a token for English text and numbers, used for the per-section budgets
+CHARS_PER_TOKEN = 4
+
+
+def parse_section_budgets(spec):
+    """
+    Parses "news_sentiment=600,business_model=400" into {"news_sentiment": 600, "business_model": 400}.
+    """
+
+    budgets = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, tokens = item.partition("=")
+        if name.strip() not in PROMPT_SCHEMA or not tokens.strip().isdigit():
+            raise ValueError(f"Invalid prompt section budget: {item!r}")
+        budgets[name.strip()] = int(tokens)
+    return budgets
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def compact_number(value):
+    """
+    Rounds a number to the precision worth paying tokens for: integers above 1000,
+    2 decimals above 1 and 3 decimals below.
+    """
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if abs(value) >= 1000:
+        return int(round(value))
+    if isinstance(value, int):
+        return value
+    rounded = round(value, 2) if abs(value) >= 1 else round(value, 3)
+    return int(rounded) if rounded == int(rounded) else rounded
+
+
+def _compact_text(text):
+    # Collapse runs of blank lines and trailing spaces left by model answers
+    lines = [line.rstrip() for line in str(text).strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def _fit_budget(text, max_tokens):
+    """
+    Cuts the text to about max_tokens, at the last sentence or line end inside the budget.
+    """
+
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+
+    cut = text[:max_tokens * CHARS_PER_TOKEN]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " …"
+
+
+def _dedupe_lines(text, seen):
+    """
+    Drops lines (of at least a few words) already sent in an earlier section.
+    """
+
+    kept = []
+    for line in text.splitlines():
+        key = " ".join(line.lower().split())
+        if len(key.split()) >= 4:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+
+def serialise_section(value, fields=None):
+    """
+    Formats one section: `key=value` pairs separated by "; " for a dict (None and empty
+    fields dropped, numbers rounded), the compacted text otherwise. Returns "" when empty.
+    """
+
+    if value is None:
+        return ""
+
+    if isinstance(value, dict):
+        pairs = []
+        for key in fields or value.keys():
+            item = compact_number(value.get(key))
+            if item is None or item == "":
+                continue
+            pairs.append(f"{key}={item}")
+        return "; ".join(pairs)
+
+    return _compact_text(value)
+
+
+def serialise_results(results, sections=None, budgets=None):
+    """
+    Serialises the analysis results for a prompt following PROMPT_SCHEMA: one `## <section>`
+    block per non-empty section, in schema order.
+
+    sections: section names to include (all by default).
+    budgets: section name -> max tokens, applied to that section's text after deduplication.
+             A line repeated from an earlier section is sent once.
+    """
+
+    budgets = budgets or {}
+    seen_lines = set()
+    blocks = []
+
+    for name, (key, fields) in PROMPT_SCHEMA.items():
+        if sections is not None and name not in sections:
+            continue
+
+        text = serialise_section(results.get(key), fields)
+        if fields is None:
+            text = _dedupe_lines(text, seen_lines)
+        text = _fit_budget(text, budgets.get(name))
+
+        if text:
+            blocks.append(f"## {name}\n{text}")
+
+    return "\n\n".join(blocks)
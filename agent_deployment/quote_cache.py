@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+
+import tracing
+from single_flight import SingleFlight
+
+# Quote fields that move during the trading day; everything else is refreshed on the slow TTL
+FAST_QUOTE_FIELDS = ("regularMarketPrice", "regularMarketChangePercent", "dayHigh", "dayLow")
+
+
+class QuoteCache:
+    """
+    Process-level cache of Yahoo Finance quote info with two TTLs.
+
+    Fast-moving fields (price, change %, day high/low) expire after `fast_ttl` seconds and are
+    refreshed with the lightweight `fetch_fast`; slow-moving fields (sector, website, analyst
+    targets, market cap, ...) expire after `slow_ttl` seconds and trigger a full `fetch_full`.
+    Concurrent lookups of the same ticker share one upstream fetch. At most `max_entries` tickers
+    are kept, evicting the least recently used.
+    """
+
+    def __init__(self, fetch_full, fetch_fast, fast_ttl=60, slow_ttl=21600, max_entries=2048):
+        """
+        fetch_full: callable(ticker_symbol) returning the full quote info dict.
+        fetch_fast: callable(ticker_symbol) returning a dict with the FAST_QUOTE_FIELDS.
+        """
+
+        self.fetch_full = fetch_full
+        self.fetch_fast = fetch_fast
+        self.fast_ttl = fast_ttl
+        self.slow_ttl = slow_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._counters = {"hits": 0, "fast_refreshes": 0, "misses": 0, "coalesced": 0, "errors": 0, "evictions": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+        tracing.record_cache("quote", name)
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    @staticmethod
+    def _full_entry(info, now):
+        return {
+            "slow": {k: v for k, v in info.items() if k not in FAST_QUOTE_FIELDS},
+            "fast": {field: info.get(field) for field in FAST_QUOTE_FIELDS},
+            "slow_at": now,
+            "fast_at": now,
+        }
+
+    def _refresh(self, key, ticker_symbol):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry and now - entry["slow_at"] < self.slow_ttl:
+            if now - entry["fast_at"] < self.fast_ttl:
+                # Another caller refreshed it while we were waiting to run
+                return entry
+            fast = self.fetch_fast(ticker_symbol)
+            entry = {**entry, "fast": {field: fast.get(field) for field in FAST_QUOTE_FIELDS}, "fast_at": now}
+            self._count("fast_refreshes")
+        else:
+            entry = self._full_entry(self.fetch_full(ticker_symbol), now)
+            self._count("misses")
+
+        self._store(key, entry)
+        return entry
+
+    def get(self, ticker_symbol):
+        """
+        Returns the quote info dict for the ticker, fetching only the stale part.
+        """
+
+        key = ticker_symbol.upper()
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+
+        fresh = entry and now - entry["slow_at"] < self.slow_ttl and now - entry["fast_at"] < self.fast_ttl
+        if fresh:
+            self._count("hits")
+        else:
+            try:
+                entry, shared = self._single_flight.do(key, lambda: self._refresh(key, ticker_symbol))
+            except Exception:
+                self._count("errors")
+                raise
+            if shared:
+                self._count("coalesced")
+
+        return {**entry["slow"], **entry["fast"]}
+
+    def put(self, ticker_symbol, info):
+        """
+        Stores a full quote info dict fetched elsewhere (e.g. by a worker process) as if just fetched.
+        """
+
+        self._store(ticker_symbol.upper(), self._full_entry(info, time.time()))
+
+    def invalidate(self, ticker_symbol=None):
+        with self._lock:
+            if ticker_symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ticker_symbol.upper(), None)
+
+    def stats(self):
+        """
+        Returns the hit / miss counters and the number of cached tickers.
+        """
+
+        with self._lock:
+            return {**self._counters, "size": len(self._entries)}
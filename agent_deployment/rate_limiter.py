@@ -0,0 +1,114 @@
+import asyncio
+import collections
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError
+from strands.types.exceptions import ModelThrottledException
+
+# Bedrock errors that mean "too much traffic right now": slow down and retry
+THROTTLE_ERROR_CODES = ("ThrottlingException", "ServiceUnavailableException", "ModelNotReadyException")
+
+
+class RetryBudgetExceeded(Exception):
+    """
+    A throttled model call could not be retried within its retry budget.
+    """
+
+
+def is_throttle(error):
+    if isinstance(error, ModelThrottledException):
+        return True
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in THROTTLE_ERROR_CODES
+
+
+def backoff_delay(attempt, base=0.5, cap=20.0):
+    """
+    Full jitter exponential backoff: a random delay between 0 and min(cap, base * 2^attempt) seconds.
+    """
+
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket in front of a model's invocations whose rate adapts to the service (AIMD):
+    a throttle halves the rate (down to min_rate), every success adds `increase` requests/sec
+    back (up to max_rate, when there is one). Throttles of calls admitted before the last cut
+    belong to the same congestion event and do not cut again. The bucket holds at most one second
+    of tokens, so a burst after a quiet period cannot overshoot the current rate by much. Usable
+    from threads and any event loop.
+
+    With a max_rate (the model's known quota) calls are paced at it from the start. Without one
+    calls are not paced at all until the first throttle, which starts pacing at half the rate
+    calls were admitted at over the last second.
+    """
+
+    def __init__(self, max_rate=None, min_rate=0.2, increase=0.2, decrease=0.5):
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        # None while not paced
+        self.rate = max_rate
+        self._tokens = max_rate or 0.0
+        self._updated = time.monotonic()
+        # Grant times of the last second while not paced, to measure the rate at the first throttle
+        self._granted = collections.deque()
+        self._last_cut = float("-inf")
+        self._lock = threading.Lock()
+        self.throttles = 0
+        self.successes = 0
+
+    def _take(self):
+        # Takes a token if one is there; otherwise returns how long until the next one at the current rate
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is None:
+                self._granted.append(now)
+                while self._granted[0] < now - 1.0:
+                    self._granted.popleft()
+                return 0.0
+            self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self):
+        """
+        Waits for a token and returns the time it was granted, to pass to on_throttle.
+        """
+
+        while delay := self._take():
+            await asyncio.sleep(delay)
+        return time.monotonic()
+
+    def on_success(self):
+        with self._lock:
+            self.successes += 1
+            if self.rate is not None:
+                self.rate = min(self.max_rate or float("inf"), self.rate + self.increase)
+
+    def on_throttle(self, granted_at=None):
+        with self._lock:
+            self.throttles += 1
+            if granted_at is not None and granted_at < self._last_cut:
+                return
+            self._last_cut = time.monotonic()
+            if self.rate is None:
+                # First throttle: start from the rate the service just refused
+                while self._granted and self._granted[0] < self._last_cut - 1.0:
+                    self._granted.popleft()
+                self.rate = max(1.0, float(len(self._granted)))
+                self._granted.clear()
+                self._updated = self._last_cut
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            # Drop any saved-up burst so the next calls are paced at the new rate
+            self._tokens = min(self._tokens, 0.0)
+
+    def stats(self):
+        with self._lock:
+            return {"rate": round(self.rate, 2) if self.rate is not None else None, "throttles": self.throttles, "successes": self.successes}
@@ -0,0 +1,294 @@
+import json
+import math
+import re
+from html import escape
+
+CHART_WIDTH = 720
+PRICE_CHART_HEIGHT = 220
+VOLUME_CHART_HEIGHT = 120
+CHART_PADDING = 8
+
+RECOMMENDATION_COLOURS = {"Buy": "#22c55e", "Hold": "#f59e0b", "Sell": "#ef4444"}
+
+# Stands in for the per-user interactions section in the shared report template
+INTERACTIONS_PLACEHOLDER = "<!-- past-interactions -->"
+
+DISCLAIMER = "🔒 <em>This report is generated using advanced AI analysis • For informational purposes only • Not financial advice.</em>"
+
+STYLE = """
+body { margin: 0; background: #0f172a; color: #e2e8f0; font-family: -apple-system, 'Segoe UI', Roboto, Helvetica, Arial, sans-serif; line-height: 1.55; }
+main { max-width: 960px; margin: 0 auto; padding: 32px 20px; }
+header { border-bottom: 1px solid #334155; padding-bottom: 16px; margin-bottom: 24px; }
+h1 { margin: 0 0 4px; font-size: 28px; }
+h2 { font-size: 19px; margin: 0 0 12px; color: #93c5fd; }
+section { background: #1e293b; border: 1px solid #334155; border-radius: 10px; padding: 20px; margin-bottom: 20px; }
+.muted { color: #94a3b8; font-size: 14px; }
+.price { font-size: 22px; font-weight: 600; margin-top: 8px; }
+.up { color: #22c55e; }
+.down { color: #ef4444; }
+.grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(170px, 1fr)); gap: 12px; }
+.card { background: #0f172a; border: 1px solid #334155; border-radius: 8px; padding: 12px; }
+.card .label { color: #94a3b8; font-size: 12px; text-transform: uppercase; letter-spacing: .04em; }
+.card .value { font-size: 18px; font-weight: 600; margin-top: 4px; }
+.badge { display: inline-block; padding: 6px 16px; border-radius: 999px; font-weight: 700; color: #0f172a; }
+.text p { margin: 0 0 12px; }
+pre { white-space: pre-wrap; font-family: inherit; margin: 0; }
+svg { width: 100%; height: auto; display: block; }
+table { width: 100%; border-collapse: collapse; }
+th, td { text-align: left; padding: 8px 10px; border-bottom: 1px solid #334155; }
+th { color: #94a3b8; font-weight: 600; font-size: 13px; }
+footer { text-align: center; color: #94a3b8; font-size: 13px; margin-top: 28px; }
+"""
+
+
+def _text(value):
+    return escape(str(value)) if value is not None else "—"
+
+
+def _number(value, decimals=2, suffix=""):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "—"
+    try:
+        return f"{float(value):,.{decimals}f}{suffix}"
+    except (TypeError, ValueError):
+        return _text(value)
+
+
+def _signed(value, decimals=2, suffix="%"):
+    if value is None or not math.isfinite(float(value)):
+        return "—"
+    return f"{float(value):+,.{decimals}f}{suffix}"
+
+
+def _compact(value):
+    if value is None:
+        return "—"
+    value = float(value)
+    for threshold, unit in ((1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= threshold:
+            return f"{value / threshold:,.2f}{unit}"
+    return f"{value:,.0f}"
+
+
+def _paragraphs(text):
+    if not text:
+        return "<p class=\"muted\">Not available.</p>"
+    blocks = [block.strip() for block in re.split(r"\n\s*\n", str(text)) if block.strip()]
+    return "".join(f"<p>{escape(block).replace(chr(10), '<br>')}</p>" for block in blocks)
+
+
+def _business_model_text(business_model):
+    # The business model agent is asked for JSON; fall back to the raw text otherwise
+    try:
+        parsed = json.loads(business_model)
+    except (TypeError, ValueError):
+        return business_model
+    if isinstance(parsed, dict):
+        return parsed.get("business_model_summary") or "\n\n".join(f"{key}: {value}" for key, value in parsed.items())
+    return business_model
+
+
+def _card(label, value, css_class=""):
+    class_attr = f" {css_class}" if css_class else ""
+    return f"<div class=\"card\"><div class=\"label\">{escape(label)}</div><div class=\"value{class_attr}\">{value}</div></div>"
+
+
+def _direction_class(value):
+    if value is None or not math.isfinite(float(value)):
+        return ""
+    return "up" if value >= 0 else "down"
+
+
+def price_chart_svg(stock_history):
+    """
+    Renders the closing-price line of the OHLCV history as an inline SVG.
+    """
+
+    closes = stock_history["Close"].dropna()
+    if len(closes) < 2:
+        return ""
+
+    low, high = float(closes.min()), float(closes.max())
+    span = high - low or 1.0
+    step = (CHART_WIDTH - 2 * CHART_PADDING) / (len(closes) - 1)
+    usable_height = PRICE_CHART_HEIGHT - 2 * CHART_PADDING
+
+    points = " ".join(
+        f"{CHART_PADDING + i * step:.1f},{CHART_PADDING + (high - float(close)) / span * usable_height:.1f}"
+        for i, close in enumerate(closes)
+    )
+    colour = "#22c55e" if closes.iloc[-1] >= closes.iloc[0] else "#ef4444"
+    area = f"{CHART_PADDING:.1f},{PRICE_CHART_HEIGHT - CHART_PADDING:.1f} {points} {CHART_WIDTH - CHART_PADDING:.1f},{PRICE_CHART_HEIGHT - CHART_PADDING:.1f}"
+
+    return (
+        f"<svg viewBox=\"0 0 {CHART_WIDTH} {PRICE_CHART_HEIGHT}\" role=\"img\" aria-label=\"Closing price\">"
+        f"<polygon points=\"{area}\" fill=\"{colour}\" fill-opacity=\"0.12\"/>"
+        f"<polyline points=\"{points}\" fill=\"none\" stroke=\"{colour}\" stroke-width=\"2\" stroke-linejoin=\"round\"/>"
+        f"<text x=\"{CHART_WIDTH - CHART_PADDING}\" y=\"20\" fill=\"#94a3b8\" font-size=\"12\" text-anchor=\"end\">High {high:,.2f}</text>"
+        f"<text x=\"{CHART_WIDTH - CHART_PADDING}\" y=\"{PRICE_CHART_HEIGHT - 14}\" fill=\"#94a3b8\" font-size=\"12\" text-anchor=\"end\">Low {low:,.2f}</text>"
+        "</svg>"
+        f"<div class=\"muted\">{closes.index[0]:%Y-%m-%d} → {closes.index[-1]:%Y-%m-%d}</div>"
+    )
+
+
+def volume_chart_svg(stock_history):
+    """
+    Renders the daily traded volume of the OHLCV history as inline SVG bars.
+    """
+
+    volumes = stock_history["Volume"].fillna(0)
+    if volumes.empty or float(volumes.max()) <= 0:
+        return ""
+
+    peak = float(volumes.max())
+    slot = (CHART_WIDTH - 2 * CHART_PADDING) / len(volumes)
+    bar_width = max(slot * 0.7, 1.0)
+    usable_height = VOLUME_CHART_HEIGHT - 2 * CHART_PADDING
+
+    bars = "".join(
+        f"<rect x=\"{CHART_PADDING + i * slot:.1f}\" y=\"{VOLUME_CHART_HEIGHT - CHART_PADDING - float(volume) / peak * usable_height:.1f}\" "
+        f"width=\"{bar_width:.1f}\" height=\"{float(volume) / peak * usable_height:.1f}\" fill=\"#60a5fa\"/>"
+        for i, volume in enumerate(volumes)
+    )
+
+    return (
+        f"<svg viewBox=\"0 0 {CHART_WIDTH} {VOLUME_CHART_HEIGHT}\" role=\"img\" aria-label=\"Daily volume\">{bars}"
+        f"<text x=\"{CHART_WIDTH - CHART_PADDING}\" y=\"16\" fill=\"#94a3b8\" font-size=\"12\" text-anchor=\"end\">Peak {_compact(peak)}</text>"
+        "</svg>"
+    )
+
+
+def parse_interaction(text):
+    """
+    Splits a saved memory interaction ("Interaction At: <datetime> (UTC) ... Stock Name: <name>")
+    into its timestamp and stock name.
+    """
+
+    match = re.search(r"Interaction At:\s*(.+?)\s*\(UTC\).*?Stock Name:\s*(.+)", text or "", re.S)
+    if not match:
+        return {"interaction_at": None, "stock_name": (text or "").strip()}
+    return {"interaction_at": match.group(1).strip(), "stock_name": match.group(2).strip()}
+
+
+def render_interactions(past_interactions):
+    rows = []
+    seen = set()
+    for text in (past_interactions or [])[:5]:
+        interaction = parse_interaction(text)
+        key = (interaction["interaction_at"], interaction["stock_name"])
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append(f"<tr><td>{_text(interaction['interaction_at'])}</td><td>{_text(interaction['stock_name'])}</td></tr>")
+
+    if not rows:
+        return "<p class=\"muted\">No previous interactions.</p>"
+
+    return "<table><thead><tr><th>Interaction At</th><th>Stock Name</th></tr></thead><tbody>" + "".join(rows) + "</tbody></table>"
+
+
+def render_report(share_name, ticker_symbol, results, summary, past_interactions, generated_at,
+                  stock_history=None, recommendation=None, commentary=None):
+    """
+    Renders the dark-mode HTML report from the pipeline results.
+
+    past_interactions: list of saved memory interaction texts
+    See render_shared_report for the other arguments.
+    """
+
+    return personalise_report(
+        render_shared_report(share_name, ticker_symbol, results, summary, generated_at,
+                             stock_history=stock_history, recommendation=recommendation, commentary=commentary),
+        past_interactions
+    )
+
+
+def personalise_report(report_template, past_interactions):
+    """
+    Fills the interactions section of a shared report template with one user's past interactions.
+    """
+
+    return report_template.replace(INTERACTIONS_PLACEHOLDER, render_interactions(past_interactions), 1)
+
+
+def render_shared_report(share_name, ticker_symbol, results, summary, generated_at,
+                         stock_history=None, recommendation=None, commentary=None):
+    """
+    Renders the report without anything user-specific: the interactions section holds
+    INTERACTIONS_PLACEHOLDER, so one template can be shared by every user analysing the ticker.
+
+    results: the MasterAgent results dict (stock_information, stock_current_price, stock_technical_metrics,
+             stock_performance, company_business_model_data, stock_related_news)
+    generated_at: timestamp shown in the header; passing it in keeps the output byte-identical
+                  for identical inputs
+    stock_history: optional OHLCV DataFrame used for the price and volume charts
+    commentary: optional free-form commentary text
+    """
+
+    info = results.get("stock_information") or {}
+    metrics = results.get("stock_technical_metrics") or {}
+    currency = info.get("currency") or ""
+    change_percent = info.get("change_percent")
+
+    quote_cards = "".join([
+        _card("Day Change", _signed(change_percent), _direction_class(change_percent)),
+        _card("Day Range", f"{_number(info.get('dayLow'))} – {_number(info.get('dayHigh'))}"),
+        _card("52 Week Change", _signed(info["52WeekChange"] * 100) if info.get("52WeekChange") is not None else "—"),
+        _card("Market Cap", _compact(info.get("marketCap"))),
+        _card("Average Volume", _compact(info.get("averageVolume"))),
+        _card("Sector", _text(info.get("sector"))),
+        _card("Analyst Target (Mean)", _number(info.get("targetMeanPrice"))),
+        _card("Analyst Target Range", f"{_number(info.get('targetLowPrice'))} – {_number(info.get('targetHighPrice'))}"),
+    ])
+
+    metric_cards = "".join([
+        _card("Trend", _text(metrics.get("trend"))),
+        _card("3-Month Change", _signed(metrics.get("percent_change")), _direction_class(metrics.get("percent_change"))),
+        _card("Volatility", f"{_text(metrics.get('volatility_label'))} ({_number(metrics.get('volatility_index'))})"),
+        _card("Max Drawdown", _number(metrics.get("max_drawdown_percent"), suffix="%")),
+        _card("Trend Stability", _number(metrics.get("trend_stability"))),
+        _card("Trend Slope / Day", _number(metrics.get("trend_slope_percent"), suffix="%")),
+    ])
+
+    charts = ""
+    if stock_history is not None and not stock_history.empty:
+        charts = (
+            "<section><h2>📈 Price (3 Months)</h2>" + price_chart_svg(stock_history) + "</section>"
+            "<section><h2>📊 Volume (3 Months)</h2>" + volume_chart_svg(stock_history) + "</section>"
+        )
+
+    badge = ""
+    if recommendation:
+        colour = RECOMMENDATION_COLOURS.get(recommendation, "#94a3b8")
+        badge = f"<p><span class=\"badge\" style=\"background: {colour}\">{escape(recommendation)}</span></p>"
+
+    commentary_section = ""
+    if commentary:
+        commentary_section = f"<section class=\"text\"><h2>💬 Analyst Commentary</h2>{_paragraphs(commentary)}</section>"
+
+    title = f"{share_name} ({ticker_symbol})" if share_name else str(ticker_symbol)
+    website = info.get("website")
+    website_link = f" • <a href=\"{escape(website, quote=True)}\" style=\"color: #93c5fd\">{escape(website)}</a>" if website else ""
+
+    return (
+        "<!DOCTYPE html>\n"
+        "<html lang=\"en\"><head><meta charset=\"utf-8\">"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">"
+        f"<title>{escape(title)} — Financial Report</title><style>{STYLE}</style></head>"
+        "<body><main>"
+        f"<header><h1>{escape(title)}</h1>"
+        f"<div class=\"muted\"><strong>Report Generated on:</strong> {escape(str(generated_at))} (UTC){website_link}</div>"
+        f"<div class=\"price\">Current Price of the Stock: {_text(results.get('stock_current_price'))} "
+        f"<span class=\"{_direction_class(change_percent)}\">{_signed(change_percent)}</span></div></header>"
+        f"<section><h2>💹 Quote &amp; Key Metrics {escape(currency)}</h2><div class=\"grid\">{quote_cards}</div></section>"
+        f"<section><h2>🧮 Technical Metrics</h2><div class=\"grid\">{metric_cards}</div></section>"
+        f"{charts}"
+        f"<section><h2>🎯 Recommendation</h2>{badge}<pre>{_text(results.get('stock_performance'))}</pre></section>"
+        f"<section class=\"text\"><h2>📝 Summary</h2>{_paragraphs(summary)}</section>"
+        f"<section class=\"text\"><h2>🧩 Business Model</h2>{_paragraphs(_business_model_text(results.get('company_business_model_data')))}</section>"
+        f"<section class=\"text\"><h2>📰 News Sentiment</h2>{_paragraphs(results.get('stock_related_news'))}</section>"
+        f"{commentary_section}"
+        f"<section><h2>📜 Last 5 Interactions</h2>{INTERACTIONS_PLACEHOLDER}</section>"
+        f"<footer>{DISCLAIMER}</footer>"
+        "</main></body></html>\n"
+    )
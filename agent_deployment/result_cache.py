@@ -0,0 +1,104 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from botocore.exceptions import ClientError
+
+import tracing
+
+logger = logging.getLogger("financial-agent")
+
+# Legal-form suffixes dropped from company names so "Tata Motors Ltd" and "Tata Motors" match
+COMPANY_SUFFIXES = {"ltd", "limited", "inc", "incorporated", "corp", "corporation", "co", "company", "plc", "llc", "sa", "ag", "nv"}
+
+
+def normalise_company_key(share_name, ticker_symbol=None):
+    """
+    Builds a stable cache key from the ticker symbol and the normalised company name.
+    """
+
+    terms = [term for term in re.findall(r"[a-z0-9]+", (share_name or "").lower()) if term not in COMPANY_SUFFIXES]
+    name = "-".join(terms) or "unknown"
+    ticker = re.sub(r"[^A-Z0-9.\-]", "_", (ticker_symbol or "").upper())
+    return f"{ticker}__{name}" if ticker else name
+
+
+class PersistentResultCache:
+    """
+    Cache of JSON-serialisable analysis results persisted as S3 objects under a key prefix,
+    fronted by an in-process LRU copy of at most `max_entries` entries. An entry is served while
+    it is younger than `max_age_seconds`; a stale local copy is re-read from S3, where another
+    instance may have stored a newer one. Without a bucket the cache only lives in memory.
+    """
+
+    def __init__(self, s3_client, bucket_name, prefix, max_age_seconds, max_entries=1024):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix.rstrip("/")
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _s3_key(self, key):
+        return f"{self.prefix}/{key}.json"
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read(self, key, max_age):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+        if (entry and time.time() - entry["stored_at"] < max_age) or not self.bucket_name:
+            return entry
+
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self._s3_key(key))
+            stored = json.loads(response["Body"].read())
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                logger.info(f"⚠️ Could not read cached result '{key}': {e}")
+            return entry
+
+        if not entry or stored["stored_at"] > entry["stored_at"]:
+            entry = stored
+            self._remember(key, entry)
+        return entry
+
+    def get(self, key, max_age_seconds=None):
+        """
+        Returns the cached value for the key, or None when missing or older than the freshness window.
+        """
+
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        entry = self._read(key, max_age)
+
+        if entry and time.time() - entry["stored_at"] < max_age:
+            tracing.record_cache(self.prefix, "hits")
+            return entry["value"]
+        tracing.record_cache(self.prefix, "misses")
+        return None
+
+    def put(self, key, value):
+        entry = {"stored_at": time.time(), "value": value}
+        self._remember(key, entry)
+
+        if self.bucket_name:
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=self._s3_key(key),
+                    Body=json.dumps(entry).encode("utf-8"),
+                    ContentType="application/json"
+                )
+            except ClientError as e:
+                logger.info(f"⚠️ Could not persist cached result '{key}': {e}")
@@ -0,0 +1,162 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import tracing
+from single_flight import SingleFlight
+
+# Queries containing any of these terms are treated as time-sensitive news searches
+NEWS_TERMS = {"news", "headline", "headlines", "latest", "today", "sentiment", "stock", "shares"}
+
+# Words that do not change what a query finds
+FILLER_TERMS = {"a", "an", "the", "latest", "recent", "today", "todays", "for", "about"}
+
+
+def normalise_query(query):
+    """
+    Normalises a search query so near-identical phrasings share a cache entry:
+    lower case, punctuation and filler words removed, remaining terms sorted.
+    """
+
+    terms = re.findall(r"[a-z0-9&.\-]+", query.lower())
+    terms = sorted({term.strip(".-") for term in terms} - FILLER_TERMS - {""})
+    return " ".join(terms)
+
+
+def query_kind(query):
+    terms = set(re.findall(r"[a-z]+", query.lower()))
+    return "news" if terms & NEWS_TERMS else "reference"
+
+
+def cache_key(query):
+    """
+    Returns the cache key of a query: its kind and normalised form. The kind is part of the key
+    because some news markers ("latest", "today") are filler to normalise_query, so a news query
+    and a reference query can normalise alike while expiring on different TTLs.
+    """
+
+    return f"{query_kind(query)}:{normalise_query(query)}"
+
+
+def _url_key(url):
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    return (parts.netloc.lower().removeprefix("www.") + parts.path.rstrip("/")).lower() + ("?" + parts.query if parts.query else "")
+
+
+def merge_results(*result_lists, limit=None):
+    """
+    Merges search result lists in order, keeping the first result seen for each URL.
+    """
+
+    merged = []
+    seen = set()
+    for results in result_lists:
+        for item in results or []:
+            key = _url_key(item.get("href") or item.get("url")) or json.dumps(item, sort_keys=True)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+
+    return merged[:limit] if limit else merged
+
+
+class SearchCache:
+    """
+    Shared LRU cache in front of the web search tool.
+
+    Queries are normalised and keyed by kind before lookup; news-style queries expire after `news_ttl` seconds and
+    reference queries (business model, company background) after `reference_ttl`. Entries are
+    evicted least-recently-used once their approximate size exceeds `max_bytes`. Concurrent
+    searches for the same normalised query share one upstream call, and results are
+    de-duplicated by URL.
+    """
+
+    def __init__(self, search, news_ttl=900, reference_ttl=86400, max_bytes=16 * 1024 * 1024, max_results=25):
+        """
+        search: callable(query) returning a list of result dicts (title, href, body).
+        """
+
+        self.search_fn = search
+        self.news_ttl = news_ttl
+        self.reference_ttl = reference_ttl
+        self.max_bytes = max_bytes
+        self.max_results = max_results
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "errors": 0}
+
+    def _ttl(self, query):
+        return self.news_ttl if query_kind(query) == "news" else self.reference_ttl
+
+    def _store(self, key, results, expires_at):
+        size = len(json.dumps(results, default=str))
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._size -= previous["size"]
+
+            self._entries[key] = {"results": results, "expires_at": expires_at, "size": size}
+            self._size += size
+
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted["size"]
+                self._counters["evictions"] += 1
+
+    def _fetch(self, key, query, stale_results):
+        results = self.search_fn(query)
+        # Keep the stale hits after the fresh ones (up to max_results) so a refresh never shrinks the answer
+        results = merge_results(results, stale_results, limit=self.max_results)
+        self._store(key, results, time.time() + self._ttl(query))
+        return results
+
+    def search(self, query):
+        """
+        Returns the search results for the query, from the cache when still fresh.
+        """
+
+        key = cache_key(query)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] > time.time():
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                tracing.record_cache("search", "hits")
+                return list(entry["results"])
+            self._counters["misses"] += 1
+
+        stale_results = entry["results"] if entry else None
+
+        try:
+            results, shared = self._single_flight.do(key, lambda: self._fetch(key, query, stale_results))
+        except Exception:
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+
+        if shared:
+            with self._lock:
+                self._counters["misses"] -= 1
+                self._counters["coalesced"] += 1
+
+        tracing.record_cache("search", "coalesced" if shared else "misses")
+
+        return list(results)
+
+    def stats(self):
+        """
+        Returns the hit / miss counters, number of entries and approximate size in bytes.
+        """
+
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries), "bytes": self._size}
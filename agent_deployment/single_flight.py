@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the function,
+    every caller arriving while it is still running waits for and shares its result
+    (or its exception). Nothing is cached once the call has completed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def join(self, key):
+        """
+        Attaches the caller to the key without running anything. Returns a tuple (future, leader):
+        the leader must call complete() once its result is known, the other callers wait on the future.
+        """
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, False
+            future = self._in_flight[key] = Future()
+            return future, True
+
+    def complete(self, key, future, result=None, error=None):
+        """
+        Hands the leader's result (or exception) to every waiting caller and frees the key for a new run.
+        Only the first call for a future has an effect.
+        """
+
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def do(self, key, fn):
+        """
+        Runs fn() for the key unless a call is already in flight.
+        Returns a tuple (result, shared), where shared is True for callers that
+        attached to another caller's run.
+        """
+
+        future, leader = self.join(key)
+        if not leader:
+            return future.result(), True
+
+        try:
+            self.complete(key, future, result=fn())
+        except BaseException as e:
+            self.complete(key, future, error=e)
+
+        return future.result(), False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._in_flight)
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+# Trading days per year, used to annualise the daily log-return volatility
+TRADING_DAYS_PER_YEAR = 252
+
+# Annualised volatility that maps to a volatility index of 1.0 (highly volatile)
+VOLATILITY_CEILING = 0.80
+
+# Net change of the fitted trend line (in %) below which the trend is "flat"
+FLAT_TREND_THRESHOLD = 2.0
+
+# Volatility index bands for the low / medium / high label
+LOW_VOLATILITY_MAX = 0.30
+MEDIUM_VOLATILITY_MAX = 0.60
+
+
+def _volatility_label(volatility_index):
+    if pd.isna(volatility_index):
+        return None
+    if volatility_index < LOW_VOLATILITY_MAX:
+        return "low"
+    if volatility_index < MEDIUM_VOLATILITY_MAX:
+        return "medium"
+    return "high"
+
+
+def _trend_label(trend_change_percent):
+    if pd.isna(trend_change_percent):
+        return None
+    if trend_change_percent > FLAT_TREND_THRESHOLD:
+        return "up"
+    if trend_change_percent < -FLAT_TREND_THRESHOLD:
+        return "down"
+    return "flat"
+
+
+def compute_close_metrics(closes: pd.DataFrame) -> pd.DataFrame:
+    """
+    Computes technical metrics for every column of a Date x Ticker frame of closing prices
+    in a single vectorized pass. Missing bars (NaN) are ignored per ticker.
+
+    Returns a frame indexed by ticker with the columns:
+        first_close, last_close, percent_change, volatility (annualised, log returns),
+        volatility_index (0.0 - 1.0), trend_slope (price units per trading day),
+        trend_slope_percent (slope as % of the mean close), trend_change_percent,
+        trend, trend_stability (R^2 of the linear fit, 0.0 - 1.0), max_drawdown_percent,
+        trading_days
+    """
+
+    closes = closes.astype(float)
+    values = closes.to_numpy()
+    mask = ~np.isnan(values)
+    trading_days = mask.sum(axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Percent change between the first and last available close
+        first_close = closes.bfill().iloc[0].to_numpy()
+        last_close = closes.ffill().iloc[-1].to_numpy()
+        percent_change = (last_close - first_close) / first_close * 100
+
+        # Volatility of daily log returns, annualised and normalised to 0-1.
+        # Returns are taken between consecutive available bars of each ticker.
+        log_closes = np.log(closes)
+        log_returns = log_closes.ffill().diff().where(mask)
+        volatility = log_returns.std(ddof=1).to_numpy() * np.sqrt(TRADING_DAYS_PER_YEAR)
+        volatility_index = np.clip(volatility / VOLATILITY_CEILING, 0.0, 1.0)
+
+        # Ordinary least squares of close against the trading-day index
+        x = np.where(mask, np.arange(len(values))[:, None], 0.0)
+        y = np.where(mask, values, 0.0)
+        x_mean = x.sum(axis=0) / trading_days
+        y_mean = y.sum(axis=0) / trading_days
+        dx = np.where(mask, x - x_mean, 0.0)
+        dy = np.where(mask, y - y_mean, 0.0)
+        sxx = (dx * dx).sum(axis=0)
+        syy = (dy * dy).sum(axis=0)
+        sxy = (dx * dy).sum(axis=0)
+
+        trend_slope = sxy / sxx
+        trend_slope_percent = trend_slope / y_mean * 100
+        # Net move of the fitted line across the window, relative to its starting value
+        first_index = mask.argmax(axis=0)
+        last_index = len(values) - 1 - mask[::-1].argmax(axis=0)
+        fitted_start = y_mean + trend_slope * (first_index - x_mean)
+        trend_change_percent = trend_slope * (last_index - first_index) / fitted_start * 100
+        trend_stability = np.where(syy > 0, sxy * sxy / (sxx * syy), 1.0)
+
+        # Largest peak-to-trough decline of the close
+        drawdown = closes / closes.cummax() - 1
+        max_drawdown_percent = drawdown.min().to_numpy() * 100
+
+    metrics = pd.DataFrame(
+        {
+            "first_close": first_close,
+            "last_close": last_close,
+            "percent_change": percent_change,
+            "volatility": volatility,
+            "volatility_index": volatility_index,
+            "trend_slope": trend_slope,
+            "trend_slope_percent": trend_slope_percent,
+            "trend_change_percent": trend_change_percent,
+            "trend_stability": trend_stability,
+            "max_drawdown_percent": max_drawdown_percent,
+            "trading_days": trading_days,
+        },
+        index=closes.columns,
+    )
+
+    # A regression or return series needs at least two bars
+    metrics.loc[metrics["trading_days"] < 2, metrics.columns.drop(["first_close", "last_close", "trading_days"])] = np.nan
+
+    metrics["trend"] = metrics["trend_change_percent"].map(_trend_label)
+    metrics["volatility_label"] = metrics["volatility_index"].map(_volatility_label)
+
+    return metrics
+
+
+def _to_json_value(value, decimals):
+    if isinstance(value, str) or value is None:
+        return value
+    if pd.isna(value):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    return round(float(value), decimals)
+
+
+def metrics_row_to_dict(row: pd.Series) -> dict:
+    """
+    Converts one row of `compute_close_metrics` into a JSON friendly dict
+    (values rounded to 2 decimals, the volatility index and stability to 4).
+    """
+
+    precise = {"volatility", "volatility_index", "trend_slope_percent", "trend_stability"}
+    return {key: _to_json_value(value, 4 if key in precise else 2) for key, value in row.items()}
+
+
+def compute_stock_metrics(data: pd.DataFrame):
+    """
+    Computes the technical metrics of a single OHLCV frame (as returned by yfinance)
+    and returns them as a dict. Returns None when the frame holds no closing prices.
+    """
+
+    if data is None or data.empty or "Close" not in data:
+        return None
+
+    closes = data[["Close"]].dropna()
+    if closes.empty:
+        return None
+
+    metrics = metrics_row_to_dict(compute_close_metrics(closes).iloc[0])
+
+    if "Volume" in data:
+        metrics["average_volume"] = _to_json_value(data["Volume"].mean(), 0)
+
+    return metrics
+
+
+def compute_batch_metrics(closes: pd.DataFrame, volumes: pd.DataFrame = None) -> dict:
+    """
+    Computes the technical metrics of many tickers at once from Date x Ticker frames of
+    closing prices (and optionally volumes). Returns a dict of ticker -> metrics dict,
+    with None for tickers that have no closing prices.
+    """
+
+    metrics = compute_close_metrics(closes)
+    batch = {}
+
+    for ticker, row in metrics.iterrows():
+        if row["trading_days"] == 0:
+            batch[ticker] = None
+            continue
+
+        batch[ticker] = metrics_row_to_dict(row)
+        if volumes is not None and ticker in volumes:
+            batch[ticker]["average_volume"] = _to_json_value(volumes[ticker].mean(), 0)
+
+    return batch
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# The agent modules are deployed flat next to agent.py, so make them importable by name
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture
+def scripted_model():
+    import benchmark_fakes
+
+    return benchmark_fakes.ScriptedModel(latency_ms=0)
+
+
+@pytest.fixture
+def fakes(tmp_path, monkeypatch, scripted_model):
+    """
+    The agent module with every external dependency faked and empty caches, restored after the test.
+    """
+
+    import agent
+    import benchmark_fakes
+
+    return benchmark_fakes.install_fakes(
+        agent,
+        model=scripted_model,
+        yfinance=benchmark_fakes.FakeYFinance(latency_ms=0),
+        search_latency_ms=0, memory_latency_ms=0, s3_latency_ms=0,
+        store_dir=str(tmp_path),
+        setattr=monkeypatch.setattr,
+    )
@@ -0,0 +1,114 @@
+import asyncio
+import gzip
+from urllib.parse import urlparse
+
+import agent
+
+
+def _analyse(ticker_symbol, actor_id, **kwargs):
+    return agent.MasterAgent().run(f"{ticker_symbol} Holdings", ticker_symbol, actor_id, **kwargs)
+
+
+def _report_html(fakes, url):
+    parsed = urlparse(url)
+    return gzip.decompress(fakes.s3.objects[(parsed.netloc.split(".")[0], parsed.path.lstrip("/"))]["Body"]).decode()
+
+
+def test_fresh_analysis_is_reused_without_llm_stages(fakes):
+    # A second user with a past interaction of their own
+    _analyse("RU00002", "user-b")
+
+    first = _analyse("RU00001", "user-a")
+    model_calls = fakes.model.calls
+    second = _analyse("RU00001", "user-b")
+
+    assert first["reused"] is False and second["reused"] is True
+    assert fakes.model.calls == model_calls
+    assert second["summary"] == first["summary"]
+    assert second["report"] != first["report"]
+
+    first_html, second_html = _report_html(fakes, first["report"]), _report_html(fakes, second["report"])
+    assert "No previous interactions." in first_html
+    assert "RU00002 Holdings</td>" in second_html and "RU00002 Holdings</td>" not in first_html
+    assert first_html.split("Last 5 Interactions")[0] == second_html.split("Last 5 Interactions")[0]
+
+
+def test_price_move_session_change_or_refresh_forces_a_new_analysis(fakes):
+    _analyse("RU00003", "user-a")
+
+    assert _analyse("RU00003", "user-a", reuse_analysis=False)["reused"] is False
+
+    entry = agent.analysis_index.get("RU00003")
+    entry["price"] *= 1 + 2 * agent.ANALYSIS_REUSE_MAX_PRICE_MOVE_PERCENT / 100
+    assert _analyse("RU00003", "user-a")["reused"] is False
+
+    entry = agent.analysis_index.get("RU00003")
+    entry["session"] = "2000-01-03"
+    assert _analyse("RU00003", "user-a")["reused"] is False
+
+    assert _analyse("RU00003", "user-a")["reused"] is True
+
+
+def test_analysis_with_a_failed_stage_is_not_indexed(fakes):
+    agent.remember_analysis("RU00004", False, {"stock_information": {"price": 10.0}}, "Summary", "<html></html>")
+
+    assert agent.analysis_index.get("RU00004") is None
+
+
+def test_streamed_entrypoint_reuses_the_analysis(fakes):
+    async def stream(payload):
+        return [event async for event in await agent.strands_agent_bedrock(payload)]
+
+    payload = {"stock_name": "RU00005 Holdings", "ticker_symbol": "RU00005", "actor_id": "user-a", "stream": True}
+    asyncio.run(stream(payload))
+    events = asyncio.run(stream(payload))
+
+    assert {"stock_information", "stock_performance", "summary", "report"} <= {event["event"] for event in events}
+    assert events[-1]["event"] == "complete" and events[-1]["data"]["reused"] is True
+    assert asyncio.run(stream({**payload, "refresh_analysis": True}))[-1]["data"]["reused"] is False
+
+
+def test_concurrent_requests_coalesce_onto_one_analysis(fakes):
+    fakes.model.latency_ms = 20
+    _analyse("RU00006", "user-warmup")
+    calls_per_analysis = fakes.model.calls
+
+    async def analyse_concurrently():
+        return await asyncio.gather(*(
+            agent.MasterAgent().run_async("RU00007 Holdings", "RU00007", f"user-{i}") for i in range(5)))
+
+    responses = asyncio.run(analyse_concurrently())
+
+    assert fakes.model.calls == 2 * calls_per_analysis
+    assert sorted(response["coalesced"] for response in responses) == [False] + [True] * 4
+    assert len({response["summary"] for response in responses}) == 1
+    # Memory is still read and saved for every caller
+    assert all(fakes.memory_client.get_last_k_turns(agent.MemoryInstance._resolved_memory_id, f"user-{i}", agent.SESSION_ID)
+               for i in range(5))
+    assert agent.analysis_flights.in_flight() == 0
+
+
+def test_requests_waiting_on_a_failed_analysis_share_a_single_rerun(fakes, monkeypatch):
+    fakes.model.latency_ms = 20
+    summariser = agent.summariser_agent_async
+    summaries = []
+
+    async def first_summary_fails(master_agent_result):
+        summaries.append(master_agent_result)
+        if len(summaries) == 1:
+            await asyncio.sleep(0.05)
+            return None
+        return await summariser(master_agent_result)
+
+    monkeypatch.setattr(agent, "summariser_agent_async", first_summary_fails)
+
+    async def analyse_concurrently():
+        return await asyncio.gather(*(
+            agent.MasterAgent().run_async("RU00008 Holdings", "RU00008", f"user-{i}") for i in range(3)))
+
+    responses = asyncio.run(analyse_concurrently())
+
+    # The failed analysis and one re-run, which the remaining waiter replays
+    assert len(summaries) == 2
+    assert sorted(response["coalesced"] for response in responses) == [False, False, True]
+    assert agent.analysis_flights.in_flight() == 0
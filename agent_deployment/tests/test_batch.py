@@ -0,0 +1,31 @@
+import asyncio
+
+import agent
+
+
+def test_a_slow_ticker_does_not_hold_back_the_rest_of_the_batch(fakes, monkeypatch):
+    news_agent = agent.news_agent_bedrock_async
+    summariser = agent.summariser_agent_async
+    other_summarised = asyncio.Event()
+
+    async def slow_news(share_name):
+        if share_name.startswith("BA00001"):
+            # Only finishes once the other ticker went all the way through its stages
+            await asyncio.wait_for(other_summarised.wait(), 5)
+        return await news_agent(share_name=share_name)
+
+    async def summarise(master_agent_result):
+        summary = await summariser(master_agent_result)
+        if master_agent_result["stock_information"]["symbol"] == "BA00002":
+            other_summarised.set()
+        return summary
+
+    monkeypatch.setattr(agent, "news_agent_bedrock_async", slow_news)
+    monkeypatch.setattr(agent, "summariser_agent_async", summarise)
+
+    tickers = agent.parse_batch_tickers(["BA00001", {"ticker_symbol": "BA00002", "stock_name": "BA00002 Holdings"}])
+    response = asyncio.run(agent.MasterAgent().run_batch_async(tickers, max_concurrency=2))
+
+    assert [result["ticker_symbol"] for result in response["results"]] == ["BA00001", "BA00002"]
+    assert all(result["stock_related_news"] and result["summary"] for result in response["results"])
+    assert agent.analysis_slots.stats()["in_use"] == 0
@@ -0,0 +1,95 @@
+import json
+
+import boto3
+from botocore.response import StreamingBody
+
+import benchmark
+import benchmark_fakes
+
+
+def test_compare_with_baseline_flags_throughput_and_latency_regressions():
+    def level(rps, p95):
+        return {"target": "entrypoint", "concurrency": 4, "requests_per_second": rps, "latency_ms": {"p95": p95}}
+
+    baseline = {"results": [level(10.0, 1000.0)]}
+
+    assert benchmark.compare_with_baseline([level(9.5, 1050.0)], baseline, 0.15) == []
+    assert len(benchmark.compare_with_baseline([level(8.0, 1200.0)], baseline, 0.15)) == 2
+
+
+def test_fake_yfinance_matches_the_download_shapes():
+    yf = benchmark_fakes.FakeYFinance(latency_ms=0)
+
+    single = yf.download("AAPL", interval="1d", progress=False)
+    batch = yf.download(["AAPL", "MSFT"], group_by="column", progress=False)
+
+    assert list(single.columns.get_level_values(0)) == ["Open", "High", "Low", "Close", "Volume"]
+    assert list(batch["Close"].columns) == ["AAPL", "MSFT"]
+    assert batch["Close"]["AAPL"].equals(single["Close"]["AAPL"])
+
+
+def test_sweep_runs_offline_through_entrypoint_and_lambda(tmp_path):
+    output = tmp_path / "results.json"
+
+    exit_code = benchmark.main([
+        "--concurrency", "1", "2", "--requests-per-level", "2", "--stream",
+        "--model-latency-ms", "0", "--yfinance-latency-ms", "0", "--search-latency-ms", "0",
+        "--memory-latency-ms", "0", "--s3-latency-ms", "0", "--output", str(output),
+    ])
+
+    results = json.loads(output.read_text())["results"]
+    assert exit_code == 0
+    assert [(level["target"], level["concurrency"]) for level in results] == [
+        ("entrypoint", 1), ("entrypoint", 2), ("lambda", 1), ("lambda", 2)]
+    assert all(level["errors"] == 0 for level in results)
+    assert all(level["coalesced_requests"] == level["reused_requests"] == 0 for level in results)
+    assert {"stage:report", "agent:News Fetching Agent", "tool:duck_duck_go_search"} <= set(results[0]["stages"])
+
+
+def test_throughput_grows_with_concurrency_when_the_model_never_throttles(tmp_path):
+    output = tmp_path / "results.json"
+
+    assert benchmark.main([
+        "--targets", "entrypoint", "--concurrency", "1", "8", "--requests-per-level", "8",
+        "--model-latency-ms", "50", "--yfinance-latency-ms", "0", "--search-latency-ms", "0",
+        "--memory-latency-ms", "0", "--s3-latency-ms", "0", "--output", str(output),
+    ]) == 0
+
+    serial, concurrent = json.loads(output.read_text())["results"]
+    assert concurrent["requests_per_second"] > 2 * serial["requests_per_second"]
+    assert concurrent["throttles"] == {"retried_per_request": 0, "exhausted": 0}
+
+
+def test_legacy_event_collection_keeps_every_data_line():
+    events = [f"data: {json.dumps({'event': name})}\n\n".encode() for name in ("quote", "complete")]
+    body = StreamingBody(benchmark_fakes.TimedEventStream(events + [b": keep-alive\n\n"]), None)
+
+    assert [json.loads(data)["event"] for data in benchmark.legacy_collect_events(body)] == ["quote", "complete"]
+
+
+def test_passthrough_benchmark_compares_the_paths(tmp_path, monkeypatch):
+    # run_passthrough points boto3.client at a fake agent runtime
+    monkeypatch.setattr(boto3, "client", boto3.client)
+    output = tmp_path / "passthrough.json"
+
+    assert benchmark.main(["--passthrough", "--passthrough-events", "5", "--passthrough-event-bytes", "256",
+                           "--passthrough-interval-ms", "10", "--output", str(output)]) == 0
+
+    results = json.loads(output.read_text())["passthrough"]
+    assert set(results) == {"legacy", "buffered", "streaming"}
+    assert all(result["events"] == 5 for result in results.values())
+    assert results["streaming"]["first_event_ms"] < results["buffered"]["first_event_ms"]
+
+
+def test_import_times_are_parsed_per_direct_import():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 | site",
+        "import time:       300 |       2000 |     strands.models",
+        "import time:       500 |       5000 |   strands",
+        "import time:       200 |       1500 |   report_renderer",
+        "import time:      1000 |       7500 | agent",
+    ])
+
+    assert benchmark.parse_import_times(stderr, "agent") == (7.5, {"strands": 5.0, "report_renderer": 1.5})
+    assert benchmark.compare_import_profiles({"module": "agent", "import_ms": 900.0}, {"import_ms": 700.0}, 0.15)
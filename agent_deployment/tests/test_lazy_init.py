@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from lazy_init import LazyModule, LazyObject, is_loaded, resolve
+
+AGENT_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def test_lazy_module_imports_on_first_attribute_access():
+    module = LazyModule("colorsys")
+
+    assert not is_loaded(module)
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert is_loaded(module)
+
+
+def test_lazy_object_is_built_once_and_forwards_attributes():
+    builds = []
+
+    def build():
+        time.sleep(0.01)
+        builds.append(1)
+        return type("Client", (), {"region": "us-east-1"})()
+
+    client = LazyObject(build)
+    threads = [threading.Thread(target=lambda: client.region) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    client.region = "eu-west-1"
+    assert (len(builds), client.region) == (1, "eu-west-1")
+
+
+def test_resolve_leaves_non_lazy_values_alone():
+    client = LazyObject(dict)
+    fake = object()
+
+    resolve(client, fake)
+
+    assert is_loaded(client) and is_loaded(fake)
+
+
+def test_agent_import_defers_data_libraries_and_clients():
+    code = ("import sys, agent, lazy_init\n"
+            "print(sorted(name for name in ('yfinance', 'pandas', 'ddgs') if name in sys.modules))\n"
+            "print(any(lazy_init.is_loaded(client) for client in (agent.model, agent.memory_client, agent.s3_client)))")
+
+    output = subprocess.run([sys.executable, "-c", code], cwd=AGENT_DIR, capture_output=True, text=True, check=True).stdout
+
+    assert output.split("\n")[:2] == ["[]", "False"]
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+import agent
+
+
+class PagedMemoryClient:
+    """
+    MemoryClient stand-in listing memories a page at a time. `created_elsewhere` is a memory id
+    another instance creates just before this one tries to.
+    """
+
+    def __init__(self, pages, created_elsewhere=None):
+        self.pages = pages
+        self.created_elsewhere = created_elsewhere
+        self.list_calls = []
+        self.creates = 0
+        self.gmcp_client = SimpleNamespace(list_memories=self._list_memories)
+
+    def _list_memories(self, maxResults=100, nextToken=None):
+        self.list_calls.append(nextToken)
+        page = int(nextToken or 0)
+        response = {"memories": self.pages[page]}
+        if page + 1 < len(self.pages):
+            response["nextToken"] = str(page + 1)
+        return response
+
+    def create_memory_and_wait(self, name, **kwargs):
+        self.creates += 1
+        if self.created_elsewhere:
+            self.pages[-1].append({"id": self.created_elsewhere})
+            raise ClientError({"Error": {"Code": "ValidationException", "Message": f"Memory {name} already exists"}},
+                              "CreateMemory")
+        return {"id": f"{name}-created"}
+
+
+def _not_found():
+    return ClientError({"Error": {"Code": "ResourceNotFoundException"}}, "CreateEvent")
+
+
+@pytest.fixture
+def memory_client(fakes, monkeypatch):
+    def install(**kwargs):
+        client = PagedMemoryClient(**kwargs)
+        monkeypatch.setattr(agent, "memory_client", client)
+        return client
+
+    return install
+
+
+def test_memory_on_a_later_page_is_found(memory_client):
+    client = memory_client(pages=[[{"id": "OtherMemory-1"}], [{"memoryId": "FinanceAgentMemory-abc"}]])
+
+    assert agent.MemoryInstance().resolve_memory_id() == "FinanceAgentMemory-abc"
+    assert agent.MemoryInstance().resolve_memory_id() == "FinanceAgentMemory-abc"
+    assert client.list_calls == [None, "1"]
+    assert client.creates == 0
+
+
+def test_memory_created_by_another_instance_is_looked_up(memory_client):
+    client = memory_client(pages=[[]], created_elsewhere="FinanceAgentMemory-other")
+
+    assert agent.MemoryInstance().resolve_memory_id() == "FinanceAgentMemory-other"
+    assert client.creates == 1
+
+
+def test_deleted_memory_is_resolved_again_and_retried_once(memory_client, monkeypatch):
+    memory_client(pages=[[{"id": "FinanceAgentMemory-new"}]])
+    monkeypatch.setattr(agent.MemoryInstance, "_resolved_memory_id", "FinanceAgentMemory-old")
+    calls = []
+
+    def create_event(memory_id):
+        calls.append(memory_id)
+        if memory_id == "FinanceAgentMemory-old":
+            raise _not_found()
+        return "saved"
+
+    assert agent.MemoryInstance()._with_memory_id("FinanceAgentMemory-old", create_event) == "saved"
+    assert calls == ["FinanceAgentMemory-old", "FinanceAgentMemory-new"]
+    assert agent.MemoryInstance._resolved_memory_id == "FinanceAgentMemory-new"
+
+    def always_missing(memory_id):
+        calls.append(memory_id)
+        raise _not_found()
+
+    calls.clear()
+    with pytest.raises(ClientError):
+        agent.MemoryInstance()._with_memory_id("FinanceAgentMemory-new", always_missing)
+    assert len(calls) == 2
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from model_registry import ModelRegistry, ModelSlots, parse_model_limits, parse_stage_settings
+
+
+class SlowModel:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get_config(self):
+        return {"model_id": "slow"}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.02)
+        with self._lock:
+            self.in_flight -= 1
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+async def _consume(model):
+    return [event async for event in model.stream([])]
+
+
+def test_settings_are_parsed_and_validated():
+    assert parse_stage_settings("news=us.amazon.nova-lite-v1:0, summariser=haiku") == {
+        "news": "us.amazon.nova-lite-v1:0", "summariser": "haiku"}
+    assert parse_stage_settings("news=800", int) == {"news": 800}
+    assert parse_model_limits("us.amazon.nova-lite-v1:0=16,haiku=4") == {"us.amazon.nova-lite-v1:0": 16, "haiku": 4}
+    with pytest.raises(ValueError):
+        parse_stage_settings("headlines=haiku")
+    with pytest.raises(ValueError):
+        parse_model_limits("haiku=0")
+
+
+def test_routes_come_from_the_config_file_overridden_by_settings(tmp_path):
+    config = tmp_path / "routing.json"
+    config.write_text(json.dumps({"stages": {"news": {"model_id": "lite", "max_tokens": 600},
+                                             "summariser": {"model_id": "lite"}},
+                                  "max_concurrency": {"lite": 2}}))
+    built = []
+
+    registry = ModelRegistry.from_config(lambda model_id, max_tokens: built.append((model_id, max_tokens)) or object(),
+                                         "large", config_path=str(config), stage_max_tokens="news=800",
+                                         model_max_concurrency="large=3")
+
+    assert registry.routes["news"] == {"model_id": "lite", "max_tokens": 800}
+    assert registry.routes["performance"] == {"model_id": "large", "max_tokens": None}
+    news, summariser, performance = (registry.model(stage) for stage in ("news", "summariser", "performance"))
+    registry.model("news")
+    assert built == [("lite", 800), ("lite", None), ("large", None)]
+    assert news.slots is summariser.slots and news.slots.limit == 2
+    assert performance.slots.limit == 3
+
+
+def test_model_calls_are_bounded_across_event_loops_and_threads():
+    model = SlowModel()
+    registry = ModelRegistry(lambda model_id, max_tokens: model, "large", max_concurrency={"large": 2})
+
+    async def burst():
+        await asyncio.gather(*(_consume(registry.model("news")) for _ in range(4)))
+
+    threads = [threading.Thread(target=asyncio.run, args=(burst(),)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model.peak == 2
+    assert registry.stats() == {"large": {"limit": 2, "in_use": 0, "waiting": 0,
+                                          "rate": None, "throttles": 0, "successes": 12}}
+
+
+def test_cancelled_waiter_does_not_keep_a_slot():
+    slots = ModelSlots(1)
+
+    async def scenario():
+        await slots.acquire()
+        waiter = asyncio.create_task(slots.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        slots.release()
+        await asyncio.wait_for(slots.acquire(), timeout=1)
+        slots.release()
+
+    asyncio.run(scenario())
+    assert slots.stats() == {"limit": 1, "in_use": 0, "waiting": 0}
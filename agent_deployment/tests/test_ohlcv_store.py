@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+from ohlcv_store import OHLCVStore
+
+
+class FakeDownloader:
+
+    def __init__(self, days=400):
+        end = pd.Timestamp.today().normalize()
+        index = pd.date_range(end - pd.Timedelta(days=days), end, freq="D", name="Date")
+        closes = np.arange(len(index), dtype=float) + 100
+        self.frame = pd.DataFrame(
+            {"Open": closes, "High": closes + 1, "Low": closes - 1, "Close": closes, "Volume": 1000.0},
+            index=index,
+        )
+        self.calls = []
+
+    def __call__(self, ticker_symbol, start_date, end_date):
+        self.calls.append((ticker_symbol, pd.Timestamp(start_date), pd.Timestamp(end_date)))
+        return self.frame[(self.frame.index >= start_date) & (self.frame.index < end_date)]
+
+
+def test_window_is_served_from_store_until_refresh(tmp_path):
+    downloader = FakeDownloader()
+    store = OHLCVStore(downloader, str(tmp_path), retention_days=365, refresh_seconds=3600)
+
+    first = store.get_window("tatamotors.ns", days=90)
+    second = store.get_window("TATAMOTORS.NS", days=30)
+
+    assert len(downloader.calls) == 1
+    assert len(first) == 91
+    assert second.index[0] == first.index[-31]
+    pd.testing.assert_frame_equal(second, first.iloc[-31:])
+
+
+def test_stale_store_only_downloads_from_last_bar(tmp_path):
+    downloader = FakeDownloader()
+    store = OHLCVStore(downloader, str(tmp_path), retention_days=365, refresh_seconds=0)
+
+    store.get_window("AAPL", days=90)
+    store.get_window("AAPL", days=90)
+
+    _, start, _ = downloader.calls[-1]
+    assert start == pd.Timestamp.today().normalize()
+
+
+def test_longer_window_backfills_and_retention_caps_history(tmp_path):
+    downloader = FakeDownloader()
+    store = OHLCVStore(downloader, str(tmp_path), retention_days=120, refresh_seconds=3600)
+
+    store.get_window("AAPL", days=30)
+    window = store.get_window("AAPL", days=365)
+
+    assert len(downloader.calls) == 3
+    assert window.index[0] == pd.Timestamp.today().normalize() - pd.Timedelta(days=120)
+    assert window.index.is_monotonic_increasing and window.index.is_unique
+
+
+def test_window_longer_than_retention_is_served_from_store(tmp_path):
+    downloader = FakeDownloader()
+    store = OHLCVStore(downloader, str(tmp_path), retention_days=120, refresh_seconds=3600)
+
+    first = store.get_window("AAPL", days=365)
+    second = store.get_window("AAPL", days=365)
+
+    assert len(downloader.calls) == 1
+    assert len(first) == 121
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_unknown_ticker_returns_none(tmp_path):
+    store = OHLCVStore(lambda *args: None, str(tmp_path))
+    assert store.get_window("NOPE") is None
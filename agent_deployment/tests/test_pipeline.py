@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+
+from pipeline import AsyncDAGExecutor, Stage
+
+
+def _sleep(seconds, value):
+    def fn(**kwargs):
+        time.sleep(seconds)
+        return value if not kwargs else (value, kwargs)
+    return fn
+
+
+def _run(executor):
+    async def collect():
+        return [result.name async for result in executor.run()]
+    return asyncio.run(collect())
+
+
+def test_independent_stages_start_together_and_inputs_are_passed():
+    executor = AsyncDAGExecutor([
+        Stage("a", _sleep(0.1, "A")),
+        Stage("b", _sleep(0.1, "B")),
+        Stage("c", lambda a, b: a + b, inputs=("a", "b")),
+    ])
+
+    started = time.perf_counter()
+    order = _run(executor)
+
+    assert time.perf_counter() - started < 0.19
+    assert order[-1] == "c"
+    assert executor.results["c"].value == "AB"
+
+
+def test_failed_stage_yields_none_and_dependents_still_run():
+    def fail():
+        raise RuntimeError("boom")
+
+    executor = AsyncDAGExecutor([Stage("a", fail), Stage("b", lambda a: a is None, inputs=("a",))])
+    _run(executor)
+
+    assert isinstance(executor.results["a"].error, RuntimeError)
+    assert executor.results["b"].value is True
+
+
+def test_critical_path_follows_latest_finishing_inputs():
+    executor = AsyncDAGExecutor([
+        Stage("fast", _sleep(0.01, 1)),
+        Stage("slow", _sleep(0.1, 2)),
+        Stage("join", lambda fast, slow: fast + slow, inputs=("fast", "slow")),
+        Stage("side", _sleep(0.01, 3)),
+    ])
+    _run(executor)
+
+    assert [result.name for result in executor.critical_path()] == ["slow", "join"]
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        AsyncDAGExecutor([Stage("a", lambda missing: None, inputs=("missing",))])
+    with pytest.raises(ValueError):
+        AsyncDAGExecutor([Stage("a", lambda b: None, inputs=("b",)), Stage("b", lambda a: None, inputs=("a",))])
+
+
+def test_async_executor_mixes_coroutines_and_blocking_stages():
+    async def fetch():
+        await asyncio.sleep(0.1)
+        return "A"
+
+    executor = AsyncDAGExecutor([
+        Stage("a", fetch),
+        Stage("b", _sleep(0.1, "B")),
+        Stage("c", lambda a, b: a + b, inputs=("a", "b")),
+    ])
+
+    started = time.perf_counter()
+    order = _run(executor)
+
+    assert time.perf_counter() - started < 0.19
+    assert order[-1] == "c"
+    assert executor.results["c"].value == "AB"
+    assert [result.name for result in executor.critical_path()][-1] == "c"
@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import agent
+import precompute_watchlist
+
+
+def _precompute(tickers, checkpoint_path, **kwargs):
+    return asyncio.run(precompute_watchlist.precompute_watchlist(
+        agent.parse_batch_tickers(tickers), fetch_workers=0, max_concurrency=2,
+        checkpoint_path=str(checkpoint_path), **kwargs))
+
+
+def test_watchlist_files_are_parsed(tmp_path):
+    text = tmp_path / "watchlist.txt"
+    text.write_text("# morning list\naapl\nTATAMOTORS.NS, Tata Motors  # NSE\n\nAAPL\n")
+    assert precompute_watchlist.read_watchlist(str(text)) == [
+        {"ticker_symbol": "AAPL", "stock_name": None},
+        {"ticker_symbol": "TATAMOTORS.NS", "stock_name": "Tata Motors"},
+    ]
+
+    payload = tmp_path / "watchlist.json"
+    payload.write_text(json.dumps({"tickers": ["msft", {"ticker_symbol": "HDFCBANK.NS", "stock_name": "HDFC Bank"}]}))
+    assert [ticker["ticker_symbol"] for ticker in precompute_watchlist.read_watchlist(str(payload))] == ["MSFT", "HDFCBANK.NS"]
+
+
+def test_precomputed_analysis_is_reused_by_interactive_requests(fakes, tmp_path):
+    outcomes = _precompute(["PW00001", "PW00002"], tmp_path / "checkpoint.jsonl")
+    assert outcomes == {"PW00001": "indexed", "PW00002": "indexed"}
+
+    model_calls = fakes.model.calls
+    response = agent.MasterAgent().run("PW00001 Holdings", "PW00001", "user-a")
+    assert response["reused"] is True
+    assert fakes.model.calls == model_calls
+
+    # A second run only checks the index
+    assert _precompute(["PW00001", "PW00002"], tmp_path / "checkpoint.jsonl") == {"PW00001": "fresh", "PW00002": "fresh"}
+    assert fakes.model.calls == model_calls
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(fakes, tmp_path, monkeypatch):
+    checkpoint_path = tmp_path / "checkpoint.jsonl"
+
+    async def no_summary(result):
+        return None
+
+    with monkeypatch.context() as patch:
+        patch.setattr(agent, "summariser_agent_async", no_summary)
+        assert _precompute(["PW00003"], checkpoint_path) == {"PW00003": "failed"}
+
+    stages = {json.loads(line)["stage"] for line in checkpoint_path.read_text().splitlines()}
+    assert stages == {"stock_related_news", "company_business_model_data", "stock_performance"}
+
+    model_calls = fakes.model.calls
+    assert _precompute(["PW00003"], checkpoint_path) == {"PW00003": "indexed"}
+    # Only the summariser ran again
+    assert fakes.model.calls == model_calls + 1
+    assert precompute_watchlist.PrecomputeCheckpoint(str(checkpoint_path)).stages("PW00003", "any", 1.0) == {}
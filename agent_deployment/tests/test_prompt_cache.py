@@ -0,0 +1,39 @@
+import pytest
+
+import agent
+import benchmark_fakes
+
+
+@pytest.fixture
+def scripted_model():
+    # Small enough that the test prompts reach it
+    return benchmark_fakes.ScriptedModel(latency_ms=0, min_cache_tokens=100)
+
+
+AGENT_CONFIGS = (agent.PERFORMANCE_AGENT, agent.NEWS_AGENT, agent.BUSINESS_MODEL_AGENT, agent.COMMENTARY_AGENT,
+                 agent.SUMMARISER_AGENT)
+
+
+def test_system_prompts_hold_no_request_data():
+    result = {"stock_information": {"symbol": "PC00001", "price": 101.5}, "stock_related_news": "Shares rallied."}
+
+    user_turn = agent.performance_prompt("PC00001", result)
+
+    assert "PC00001" in user_turn and "Shares rallied." in user_turn
+    assert "Today Date and Time" in agent.company_prompt("PC00001 Holdings")
+    for config in AGENT_CONFIGS:
+        assert "{" not in config.system_prompt and "PC00001" not in config.system_prompt
+        assert config.new_agent() is not config.new_agent()
+        assert config.new_agent().system_prompt is config.system_prompt
+
+
+def test_second_analysis_reads_the_static_prefixes_from_the_prompt_cache(fakes):
+    first = agent.MasterAgent().run("PC00002 Holdings", "PC00002", "user-a", reuse_analysis=False)
+    second = agent.MasterAgent().run("PC00003 Holdings", "PC00003", "user-a", reuse_analysis=False)
+
+    # Single-call stages write their prefix on the first request; tool-using agents read it back on their second call
+    assert not any("tokens.cache_read" in first["tokens"][stage] for stage in ("stock_performance", "summary"))
+    assert first["tokens"]["stock_related_news"]["tokens.cache_read"] > 0
+    assert {"stock_performance", "stock_related_news", "company_business_model_data", "summary"} <= {
+        stage for stage, tokens in second["tokens"].items() if tokens.get("tokens.cache_read")}
+    assert first["tokens"]["summary"]["tokens.cache_write"] == second["tokens"]["summary"]["tokens.cache_read"]
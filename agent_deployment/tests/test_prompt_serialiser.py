@@ -0,0 +1,60 @@
+import pytest
+
+from prompt_serialiser import compact_number, parse_section_budgets, serialise_results
+
+RESULTS = {
+    "stock_information": {
+        "symbol": "AAPL", "price": 189.32419, "currency": "USD", "change_percent": -0.4128, "dayHigh": None,
+        "marketCap": 2934567890123.0, "timestamp": "2025-10-14T10:00:00", "website": "https://apple.com",
+    },
+    "stock_current_price": "189.32419 USD",
+    "stock_technical_metrics": {"percent_change": 4.1234, "volatility_index": 0.23456, "trend": "up",
+                                "trading_days": 62, "max_drawdown_percent": None},
+    "company_business_model_data": "Apple sells iPhones, Macs and services.\n\n\n\nServices revenue keeps growing fast.",
+    "stock_related_news": "Services revenue keeps growing fast.\nInvestors are optimistic about the new product cycle.",
+    "stock_performance": None,
+}
+
+
+def test_compact_number():
+    assert compact_number(2934567890123.0) == 2934567890123
+    assert compact_number(189.32419) == 189.32
+    assert compact_number(0.23456) == 0.235
+    assert compact_number(4.0) == 4
+    assert compact_number(float("nan")) is None
+    assert compact_number("USD") == "USD"
+
+
+def test_serialise_results_follows_the_schema():
+    text = serialise_results(RESULTS)
+
+    assert text.split("\n\n")[0] == "## quote\nsymbol=AAPL; price=189.32; currency=USD; change_percent=-0.413; marketCap=2934567890123"
+    assert "## technical_metrics\npercent_change=4.12; volatility_index=0.235; trend=up; trading_days=62" in text
+    # Fields outside the schema, None fields, empty sections and the duplicated price string are dropped
+    for dropped in ("timestamp", "website", "dayHigh", "max_drawdown_percent", "## performance", "189.32419"):
+        assert dropped not in text
+
+
+def test_serialise_results_sends_repeated_lines_once():
+    text = serialise_results(RESULTS)
+
+    assert text.count("Services revenue keeps growing fast.") == 1
+    assert "## news_sentiment\nInvestors are optimistic" in text
+    assert "\n\n\n" not in text
+
+
+def test_serialise_results_selects_sections_and_enforces_budgets():
+    long_news = " ".join(f"Sentence number {i} about the stock." for i in range(200))
+    text = serialise_results({**RESULTS, "stock_related_news": long_news}, sections=("news_sentiment",),
+                             budgets={"news_sentiment": 50})
+
+    assert text.startswith("## news_sentiment\nSentence number 0")
+    assert text.endswith(". …")
+    assert len(text) <= len("## news_sentiment\n") + 50 * 4 + 2
+
+
+def test_parse_section_budgets():
+    assert parse_section_budgets("news_sentiment=600, business_model=400") == {"news_sentiment": 600, "business_model": 400}
+    assert parse_section_budgets("") == {}
+    with pytest.raises(ValueError):
+        parse_section_budgets("headlines=10")
@@ -0,0 +1,50 @@
+import asyncio
+import gzip
+import os
+
+import pytest
+
+import agent
+from benchmark_fakes import FakeS3
+
+REPORT_HTML = "<!DOCTYPE html><html><body>" + "<p>Tata Motors analysis</p>" * 200 + "</body></html>"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    fake = FakeS3(latency_ms=0)
+    monkeypatch.setattr(agent, "s3_client", fake)
+    monkeypatch.setattr(agent, "S3_BUCKET_NAME", "reports")
+    return fake
+
+
+def _stored(s3):
+    [(key, stored)] = [((bucket, key), stored) for (bucket, key), stored in s3.objects.items()]
+    return key, stored
+
+
+def test_report_is_uploaded_gzipped_from_memory(s3):
+    tmp_files = set(os.listdir("/tmp"))
+
+    url = asyncio.run(agent.publish_report_async("Tata Motors", "TATAMOTORS.NS", REPORT_HTML))
+
+    (bucket, key), stored = _stored(s3)
+    assert bucket == "reports"
+    assert key.startswith("analysis-result-Tata Motors-TATAMOTORS.NS/Tata Motors_report_") and key.endswith(".html")
+    assert stored["ContentType"] == "text/html; charset=utf-8"
+    assert stored["ContentEncoding"] == "gzip"
+    assert gzip.decompress(stored["Body"]).decode("utf-8") == REPORT_HTML
+    assert len(stored["Body"]) < len(REPORT_HTML) / 10
+    assert url.startswith(f"https://reports.s3.local/{key}?")
+    assert set(os.listdir("/tmp")) <= tmp_files
+
+
+def test_no_url_without_a_report_or_when_the_upload_fails(s3, monkeypatch):
+    assert asyncio.run(agent.publish_report_async("Tata Motors", "TATAMOTORS.NS", None)) is None
+
+    def failing_put_object(**kwargs):
+        raise agent.ClientError({"Error": {"Code": "AccessDenied", "Message": "Denied"}}, "PutObject")
+
+    monkeypatch.setattr(s3, "put_object", failing_put_object)
+
+    assert asyncio.run(agent.publish_report_async("Tata Motors", "TATAMOTORS.NS", REPORT_HTML)) is None
@@ -0,0 +1,77 @@
+import threading
+import time
+
+from quote_cache import QuoteCache
+
+
+class FakeQuotes:
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.full_calls = 0
+        self.fast_calls = 0
+
+    def full(self, ticker_symbol):
+        self.full_calls += 1
+        time.sleep(self.delay)
+        return {"symbol": ticker_symbol, "sector": "Tech", "regularMarketPrice": 100.0, "dayHigh": 101.0}
+
+    def fast(self, ticker_symbol):
+        self.fast_calls += 1
+        return {"regularMarketPrice": 105.0, "regularMarketChangePercent": 5.0, "dayHigh": 106.0, "dayLow": 99.0}
+
+
+def test_hit_within_both_ttls():
+    quotes = FakeQuotes()
+    cache = QuoteCache(quotes.full, quotes.fast, fast_ttl=60, slow_ttl=600)
+
+    assert cache.get("aapl")["regularMarketPrice"] == 100.0
+    assert cache.get("AAPL")["sector"] == "Tech"
+
+    assert quotes.full_calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_fast_fields_only_refresh_fast_part():
+    quotes = FakeQuotes()
+    cache = QuoteCache(quotes.full, quotes.fast, fast_ttl=0, slow_ttl=600)
+
+    cache.get("AAPL")
+    info = cache.get("AAPL")
+
+    assert (quotes.full_calls, quotes.fast_calls) == (1, 1)
+    assert info["regularMarketPrice"] == 105.0
+    assert info["sector"] == "Tech"
+    assert cache.stats()["fast_refreshes"] == 1
+
+
+def test_concurrent_lookups_share_one_fetch():
+    quotes = FakeQuotes(delay=0.2)
+    cache = QuoteCache(quotes.full, quotes.fast)
+
+    threads = [threading.Thread(target=cache.get, args=("AAPL",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert quotes.full_calls == 1
+    assert cache.stats()["misses"] + cache.stats()["coalesced"] + cache.stats()["hits"] == 8
+
+
+def test_least_recently_used_tickers_are_evicted():
+    quotes = FakeQuotes()
+    cache = QuoteCache(quotes.full, quotes.fast, fast_ttl=60, slow_ttl=600, max_entries=2)
+
+    cache.get("AAPL")
+    cache.get("MSFT")
+    cache.get("AAPL")
+    cache.put("TSLA", quotes.full("TSLA"))
+
+    assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+    full_calls = quotes.full_calls
+    cache.get("AAPL")
+    assert quotes.full_calls == full_calls
+    cache.get("MSFT")
+    assert quotes.full_calls == full_calls + 1
@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+from strands.types.exceptions import ModelThrottledException
+
+import model_registry
+import tracing
+from model_registry import ModelRegistry
+from rate_limiter import AdaptiveRateLimiter, RetryBudgetExceeded, backoff_delay, is_throttle
+
+
+class ThrottledModel:
+    """
+    Throttles its first `throttles` calls, then answers.
+    """
+
+    def __init__(self, throttles, error=None):
+        self.throttles = throttles
+        self.error = error or ModelThrottledException("Too many requests")
+        self.calls = 0
+
+    def get_config(self):
+        return {"model_id": "throttled"}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        if self.calls <= self.throttles:
+            raise self.error
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+
+
+async def _consume(model):
+    return [event async for event in model.stream([])]
+
+
+def _run_in_stage(registry, stage="news"):
+    trace = tracing.Tracer().start_trace("analysis")
+
+    async def scenario():
+        with trace.span(stage, "stage"):
+            return await _consume(registry.model(stage))
+
+    try:
+        return trace, asyncio.run(scenario()), None
+    except Exception as e:
+        return trace, None, e
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(model_registry, "backoff_delay", lambda attempt: 0.01)
+
+
+def test_rate_halves_on_throttle_and_recovers_additively():
+    limiter = AdaptiveRateLimiter(max_rate=8, min_rate=1, increase=0.5)
+
+    for _ in range(4):
+        limiter.on_throttle()
+    assert limiter.rate == 1
+
+    limiter.on_success()
+    limiter.on_success()
+    assert limiter.rate == 2
+
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.stats() == {"rate": 8, "throttles": 4, "successes": 22}
+
+
+def test_without_a_quota_calls_are_not_paced_until_the_first_throttle():
+    limiter = AdaptiveRateLimiter()
+
+    async def burst():
+        return [await limiter.acquire() for _ in range(40)]
+
+    started = time.perf_counter()
+    granted = asyncio.run(burst())
+    assert time.perf_counter() - started < 0.05
+    assert limiter.stats()["rate"] is None
+
+    # Pacing starts at half the rate the service refused
+    limiter.on_throttle(granted[-1])
+    assert limiter.rate == 20
+
+
+def test_throttles_of_calls_admitted_before_a_cut_do_not_cut_again():
+    limiter = AdaptiveRateLimiter(max_rate=16)
+    granted = [asyncio.run(limiter.acquire()) for _ in range(4)]
+
+    for granted_at in granted:
+        limiter.on_throttle(granted_at)
+    assert limiter.rate == 8
+
+    limiter.on_throttle(asyncio.run(limiter.acquire()))
+    assert limiter.stats() == {"rate": 4, "throttles": 5, "successes": 0}
+
+
+def test_calls_are_paced_at_the_reduced_rate():
+    limiter = AdaptiveRateLimiter(max_rate=100)
+    limiter.on_throttle()
+
+    async def burst():
+        for _ in range(5):
+            await limiter.acquire()
+
+    started = time.perf_counter()
+    asyncio.run(burst())
+    # 5 calls at 50/s with the saved-up burst dropped
+    assert time.perf_counter() - started >= 0.09
+
+
+def test_throttles_are_recognised_and_backoff_is_capped():
+    assert is_throttle(ModelThrottledException("slow down"))
+    assert is_throttle(ClientError({"Error": {"Code": "ThrottlingException"}}, "ConverseStream"))
+    assert not is_throttle(ClientError({"Error": {"Code": "ValidationException"}}, "ConverseStream"))
+    assert all(0 <= backoff_delay(attempt, base=0.5, cap=2) <= 2 for attempt in range(12))
+
+
+def test_throttled_call_is_retried_and_counted(no_backoff):
+    model = ThrottledModel(throttles=2)
+    registry = ModelRegistry(lambda model_id, max_tokens: model, "large", max_requests_per_second={"large": 20})
+
+    trace, events, error = _run_in_stage(registry)
+
+    assert error is None and len(events) == 2
+    assert model.calls == 3
+    assert trace.stage_totals()["news"] == {"throttle.retried": 2}
+    assert registry.stats()["large"] == {"limit": 16, "in_use": 0, "waiting": 0,
+                                         "rate": 5.2, "throttles": 2, "successes": 1}
+
+
+def test_retries_stop_at_the_retry_budget(no_backoff):
+    model = ThrottledModel(throttles=1000)
+    registry = ModelRegistry(lambda model_id, max_tokens: model, "large", retry_budget_seconds=0.1)
+
+    trace, events, error = _run_in_stage(registry)
+
+    assert isinstance(error, RetryBudgetExceeded)
+    assert trace.stage_totals()["news"]["throttle.exhausted"] == 1
+    assert registry.stats()["large"]["in_use"] == 0
+
+
+def test_other_errors_are_not_retried(no_backoff):
+    model = ThrottledModel(throttles=1, error=ClientError({"Error": {"Code": "ValidationException"}}, "ConverseStream"))
+    registry = ModelRegistry(lambda model_id, max_tokens: model, "large")
+
+    trace, events, error = _run_in_stage(registry)
+
+    assert isinstance(error, ClientError)
+    assert model.calls == 1
+    assert registry.stats()["large"]["throttles"] == 0
+
+
+def test_call_cancelled_while_waiting_for_a_token_frees_its_slot():
+    model = ThrottledModel(throttles=0)
+    registry = ModelRegistry(lambda model_id, max_tokens: model, "large", default_max_requests_per_second=1)
+
+    async def scenario():
+        await _consume(registry.model("news"))
+        # The bucket is empty: the next call waits about a second for a token
+        blocked = asyncio.create_task(_consume(registry.model("news")))
+        await asyncio.sleep(0.05)
+        assert registry.stats()["large"]["in_use"] == 1
+        blocked.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await blocked
+
+    asyncio.run(scenario())
+    assert registry.stats()["large"]["in_use"] == 0
+    assert model.calls == 1
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from report_renderer import INTERACTIONS_PLACEHOLDER, parse_interaction, personalise_report, render_report, render_shared_report
+
+
+def _inputs():
+    index = pd.date_range("2025-07-01", periods=30, freq="B", name="Date")
+    closes = 100 + np.arange(30, dtype=float)
+    history = pd.DataFrame({"Close": closes, "Volume": closes * 1000}, index=index)
+    results = {
+        "stock_information": {"symbol": "AAPL", "currency": "USD", "change_percent": 1.5, "marketCap": 3.2e12},
+        "stock_current_price": "129.0 USD",
+        "stock_technical_metrics": {"trend": "up", "percent_change": 29.0, "volatility_index": 0.1},
+        "stock_performance": "Recommendation: Buy",
+        "company_business_model_data": '{"business_model_summary": "Devices & services"}',
+        "stock_related_news": "<b>Positive</b> outlook",
+    }
+    interactions = ["Interaction At: 2025-10-14 10:00:00 (UTC) \n\n Stock Name: Apple Inc"]
+    return ("Apple Inc", "AAPL", results, "Summary text", interactions, "2025-10-15 09:00:00"), history
+
+
+def test_identical_inputs_render_identical_bytes():
+    args, history = _inputs()
+    first = render_report(*args, stock_history=history, recommendation="Buy")
+    second = render_report(*args, stock_history=history.copy(), recommendation="Buy")
+    assert first.encode() == second.encode()
+
+
+def test_report_contains_sections_charts_and_escaped_text():
+    args, history = _inputs()
+    html = render_report(*args, stock_history=history, recommendation="Buy", commentary="Watch margins.")
+
+    assert "<polyline" in html and "<rect" in html
+    assert "Report Generated on:</strong> 2025-10-15 09:00:00" in html
+    assert "Devices &amp; services" in html
+    assert "&lt;b&gt;Positive&lt;/b&gt;" in html
+    assert "<td>2025-10-14 10:00:00</td><td>Apple Inc</td>" in html
+    assert "Analyst Commentary" in html
+    assert "3.20T" in html
+
+
+def test_report_renders_without_history_or_data():
+    html = render_report("X", "X", {}, None, None, "2025-10-15 09:00:00")
+    assert "<svg" not in html
+    assert "No previous interactions." in html
+
+
+def test_missing_changes_render_as_a_dash():
+    args, history = _inputs()
+    results = args[2]
+    results["stock_information"]["change_percent"] = float("nan")
+    results["stock_technical_metrics"]["percent_change"] = float("inf")
+    html = render_report(*args, stock_history=history)
+
+    assert "nan%" not in html and "inf%" not in html
+    assert '<div class="label">Day Change</div><div class="value">—</div>' in html
+    assert '<div class="label">3-Month Change</div><div class="value">—</div>' in html
+
+
+def test_shared_template_leaves_out_the_interactions():
+    args, history = _inputs()
+    share_name, ticker_symbol, results, summary, interactions, generated_at = args
+    template = render_shared_report(share_name, ticker_symbol, results, summary, generated_at, stock_history=history)
+
+    assert "Apple Inc</td>" not in template
+    assert template.count(INTERACTIONS_PLACEHOLDER) == 1
+    assert personalise_report(template, interactions) == render_report(*args, stock_history=history)
+
+
+def test_parse_interaction():
+    assert parse_interaction("Interaction At: 2025-10-14 10:00:00 (UTC) \n\n Stock Name: Tata Motors") == {
+        "interaction_at": "2025-10-14 10:00:00",
+        "stock_name": "Tata Motors",
+    }
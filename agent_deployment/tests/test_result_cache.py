@@ -0,0 +1,67 @@
+import io
+import time
+
+from botocore.exceptions import ClientError
+
+from result_cache import PersistentResultCache, normalise_company_key
+
+
+class FakeS3:
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+def test_company_key_ignores_case_punctuation_and_legal_suffix():
+    assert normalise_company_key("Tata Motors Ltd.", "tatamotors.ns") == normalise_company_key("TATA MOTORS", "TATAMOTORS.NS")
+    assert normalise_company_key("Tata Motors", "TATAMOTORS.NS") == "TATAMOTORS.NS__tata-motors"
+
+
+def test_values_persist_across_processes():
+    s3 = FakeS3()
+    PersistentResultCache(s3, "bucket", "business-model-cache", 3600).put("k", "summary")
+
+    assert ("bucket", "business-model-cache/k.json") in s3.objects
+    assert PersistentResultCache(s3, "bucket", "business-model-cache", 3600).get("k") == "summary"
+
+
+def test_stale_and_missing_entries_return_none(monkeypatch):
+    cache = PersistentResultCache(FakeS3(), "bucket", "business-model-cache", 3600)
+    stored_at = time.time() - 7200
+    with monkeypatch.context() as patch:
+        patch.setattr(time, "time", lambda: stored_at)
+        cache.put("k", "summary")
+
+    assert cache.get("k") is None
+    assert cache.get("k", max_age_seconds=86400) == "summary"
+    assert cache.get("missing") is None
+
+
+def test_stale_local_copy_is_refreshed_from_s3():
+    s3 = FakeS3()
+    local = PersistentResultCache(s3, "bucket", "business-model-cache", 3600)
+    local.put("k", "old summary")
+    local._entries["k"]["stored_at"] = time.time() - 7200
+
+    # Another instance stores a newer value
+    PersistentResultCache(s3, "bucket", "business-model-cache", 3600).put("k", "new summary")
+
+    assert local.get("k") == "new summary"
+
+
+def test_local_copies_are_bounded():
+    cache = PersistentResultCache(FakeS3(), "bucket", "business-model-cache", 3600, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, key)
+
+    assert list(cache._entries) == ["b", "c"]
+    # Evicted entries are still read back from S3
+    assert cache.get("a") == "a"
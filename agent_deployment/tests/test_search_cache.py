@@ -0,0 +1,99 @@
+import threading
+import time
+
+from search_cache import SearchCache, cache_key, merge_results, normalise_query, query_kind
+
+
+class FakeSearch:
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        time.sleep(self.delay)
+        return [
+            {"title": "A", "href": "https://www.example.com/a/", "body": query},
+            {"title": "A again", "href": "https://example.com/a", "body": query},
+            {"title": "B", "href": "https://example.com/b", "body": query},
+        ]
+
+
+def test_near_identical_queries_normalise_together():
+    assert normalise_query("Tata Motors stock news") == normalise_query("  latest TATA motors, stock NEWS ")
+    assert normalise_query("Tata Motors business model") != normalise_query("Tata Motors stock news")
+
+
+def test_query_kind():
+    assert query_kind("Tata Motors stock news") == "news"
+    assert query_kind("Tata Motors business model") == "reference"
+
+
+def test_news_and_reference_queries_that_normalise_alike_do_not_share_an_entry():
+    assert normalise_query("Tata Motors today") == normalise_query("Tata Motors")
+    assert cache_key("Tata Motors today") != cache_key("Tata Motors")
+
+    search = FakeSearch()
+    cache = SearchCache(search, news_ttl=0, reference_ttl=3600)
+
+    cache.search("Tata Motors")
+    cache.search("Tata Motors today")
+    cache.search("Tata Motors")
+
+    assert search.queries == ["Tata Motors", "Tata Motors today"]
+
+
+def test_merge_results_dedupes_by_url():
+    merged = merge_results([{"href": "https://x.com/1"}], [{"href": "http://www.x.com/1/"}, {"href": "https://x.com/2"}])
+    assert [item["href"] for item in merged] == ["https://x.com/1", "https://x.com/2"]
+
+
+def test_cached_results_are_deduplicated_and_reused():
+    search = FakeSearch()
+    cache = SearchCache(search)
+
+    first = cache.search("Tata Motors business model")
+    second = cache.search("tata motors business model")
+
+    assert len(search.queries) == 1
+    assert [item["title"] for item in first] == ["A", "B"]
+    assert second == first
+    assert cache.stats()["hits"] == 1
+
+
+def test_news_queries_use_short_ttl():
+    search = FakeSearch()
+    cache = SearchCache(search, news_ttl=0, reference_ttl=3600)
+
+    cache.search("Tata Motors stock news")
+    cache.search("Tata Motors stock news")
+    cache.search("Tata Motors business model")
+    cache.search("Tata Motors business model")
+
+    assert len(search.queries) == 3
+
+
+def test_lru_eviction_respects_memory_cap():
+    cache = SearchCache(FakeSearch(), max_bytes=300)
+
+    cache.search("one business model")
+    cache.search("two business model")
+    cache.search("three business model")
+
+    assert cache.stats()["bytes"] <= 300 or cache.stats()["entries"] == 1
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_concurrent_identical_searches_share_one_upstream_call():
+    search = FakeSearch(delay=0.2)
+    cache = SearchCache(search)
+
+    threads = [threading.Thread(target=cache.search, args=("Tata Motors stock news",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(search.queries) == 1
+    assert cache.stats()["coalesced"] >= 1
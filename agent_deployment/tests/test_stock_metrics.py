@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_metrics import (
+    TRADING_DAYS_PER_YEAR,
+    VOLATILITY_CEILING,
+    compute_batch_metrics,
+    compute_close_metrics,
+    compute_stock_metrics,
+)
+
+
+def _frame(closes, volumes=None):
+    index = pd.date_range("2025-01-01", periods=len(closes), freq="B", name="Date")
+    data = {"Close": closes}
+    if volumes is not None:
+        data["Volume"] = volumes
+    return pd.DataFrame(data, index=index)
+
+
+def test_percent_change_uses_first_and_last_close():
+    metrics = compute_stock_metrics(_frame([100.0, 90.0, 120.0, 125.0]))
+    assert metrics["percent_change"] == 25.0
+    assert metrics["first_close"] == 100.0
+    assert metrics["last_close"] == 125.0
+
+
+def test_volatility_is_annualised_log_return_std_normalised():
+    closes = [100.0, 101.0, 99.0, 102.0, 100.5]
+    expected = np.std(np.diff(np.log(closes)), ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    metrics = compute_stock_metrics(_frame(closes))
+
+    assert metrics["volatility"] == round(expected, 4)
+    assert metrics["volatility_index"] == round(min(expected / VOLATILITY_CEILING, 1.0), 4)
+
+
+def test_volatility_index_is_capped_at_one():
+    metrics = compute_stock_metrics(_frame([100.0, 150.0, 80.0, 160.0]))
+    assert metrics["volatility_index"] == 1.0
+    assert metrics["volatility_label"] == "high"
+
+
+def test_linear_series_has_exact_slope_and_full_stability():
+    metrics = compute_stock_metrics(_frame([10.0, 12.0, 14.0, 16.0, 18.0]))
+    assert metrics["trend_slope"] == 2.0
+    assert metrics["trend_stability"] == 1.0
+    assert metrics["trend_change_percent"] == 80.0
+    assert metrics["trend"] == "up"
+
+
+def test_constant_series_is_flat_and_stable():
+    metrics = compute_stock_metrics(_frame([50.0] * 6))
+    assert metrics["trend_slope"] == 0.0
+    assert metrics["trend"] == "flat"
+    assert metrics["volatility_index"] == 0.0
+    assert metrics["volatility_label"] == "low"
+    assert metrics["max_drawdown_percent"] == 0.0
+
+
+def test_max_drawdown_is_largest_peak_to_trough_fall():
+    metrics = compute_stock_metrics(_frame([100.0, 120.0, 90.0, 110.0, 60.0, 130.0]))
+    assert metrics["max_drawdown_percent"] == -50.0
+
+
+def test_downtrend_is_labelled_down():
+    metrics = compute_stock_metrics(_frame([100.0, 95.0, 97.0, 90.0, 85.0]))
+    assert metrics["trend"] == "down"
+    assert metrics["trend_slope"] < 0
+
+
+def test_average_volume_is_reported():
+    metrics = compute_stock_metrics(_frame([1.0, 2.0, 3.0], volumes=[100, 200, 600]))
+    assert metrics["average_volume"] == 300.0
+
+
+def test_empty_or_single_bar_frames():
+    assert compute_stock_metrics(None) is None
+    assert compute_stock_metrics(_frame([])) is None
+
+    metrics = compute_stock_metrics(_frame([42.0]))
+    assert metrics["trading_days"] == 1
+    assert metrics["percent_change"] is None
+    assert metrics["trend"] is None
+
+
+def test_batch_matches_single_ticker_and_skips_missing_bars():
+    closes = pd.DataFrame(
+        {
+            "AAA": [10.0, 11.0, np.nan, 13.0, 14.0],
+            "BBB": [np.nan, 20.0, 19.0, 18.0, 16.0],
+        }
+    )
+
+    batch = compute_close_metrics(closes)
+
+    for ticker in closes.columns:
+        single = compute_close_metrics(closes[[ticker]].dropna().reset_index(drop=True))
+        assert batch.loc[ticker, "percent_change"] == pytest.approx(single.iloc[0]["percent_change"])
+        assert batch.loc[ticker, "volatility"] == pytest.approx(single.iloc[0]["volatility"], nan_ok=True)
+        assert batch.loc[ticker, "max_drawdown_percent"] == pytest.approx(single.iloc[0]["max_drawdown_percent"])
+
+    assert batch.loc["AAA", "trend_slope"] == pytest.approx(1.0)
+    assert batch.loc["AAA", "trend_stability"] == pytest.approx(1.0)
+    assert batch.loc["BBB", "percent_change"] == pytest.approx(-20.0)
+
+
+def test_batch_metrics_returns_dict_per_ticker():
+    closes = pd.DataFrame({"AAA": [10.0, 12.0, 14.0], "BBB": [np.nan, np.nan, np.nan]})
+    volumes = pd.DataFrame({"AAA": [100.0, 200.0, 300.0], "BBB": [np.nan, np.nan, np.nan]})
+
+    batch = compute_batch_metrics(closes, volumes)
+
+    assert batch["BBB"] is None
+    assert batch["AAA"]["percent_change"] == 40.0
+    assert batch["AAA"]["average_volume"] == 200.0
+    assert batch["AAA"] == compute_stock_metrics(_frame([10.0, 12.0, 14.0], [100.0, 200.0, 300.0]))
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import tracing
+from pipeline import AsyncDAGExecutor, Stage
+
+
+def test_spans_nest_under_the_span_they_are_opened_in():
+    trace = tracing.Tracer().start_trace("analysis", ticker="AAPL")
+
+    with trace.span("news", "stage") as stage:
+        with tracing.span("Agent", "agent") as agent:
+            tracing.record_tokens({"inputTokens": 120, "outputTokens": 30, "totalTokens": 150})
+            with tracing.span("duck_duck_go_search", "tool"):
+                tracing.record_cache("search", "hits")
+
+    trace.finish()
+    spans = {span.name: span for span in trace.spans}
+
+    assert agent.parent_id == stage.span_id
+    assert spans["duck_duck_go_search"].parent_id == agent.span_id
+    assert stage.parent_id == trace.root.span_id
+    assert agent.attributes == {"tokens.input": 120, "tokens.output": 30}
+    assert trace.root.attributes["tokens.input"] == 120
+    assert trace.root.attributes["cache.search.hits"] == 1
+    assert trace.stage_totals() == {"news": {"tokens.input": 120, "tokens.output": 30}}
+
+
+def test_span_outside_a_trace_is_not_recorded():
+    with tracing.span("duck_duck_go_search", "tool") as span:
+        tracing.record_cache("search", "hits")
+
+    assert span.trace is None
+    assert tracing.current_span() is None
+
+
+def test_failed_span_records_the_error():
+    trace = tracing.Tracer().start_trace("analysis")
+
+    with pytest.raises(RuntimeError):
+        with trace.span("report", "stage"):
+            raise RuntimeError("S3 down")
+
+    assert str(trace.spans[1].error) == "S3 down"
+    assert trace.spans[1].end_ns is not None
+
+
+def test_histogram_percentiles():
+    histograms = tracing.LatencyHistograms()
+    for duration_ms in range(1, 101):
+        histograms.record("stage:news", float(duration_ms))
+
+    summary = histograms.summary()["stage:news"]
+
+    assert summary["count"] == 100
+    assert summary["max_ms"] == 100.0
+    assert summary["p50_ms"] == pytest.approx(50, rel=0.05)
+    assert summary["p95_ms"] == pytest.approx(95, rel=0.05)
+    assert summary["p99_ms"] == pytest.approx(99, rel=0.05)
+
+
+def test_exporters_write_json_lines_and_otlp(tmp_path):
+    jsonl_path, otlp_path = tmp_path / "spans.jsonl", tmp_path / "traces.otlp.jsonl"
+    tracer = tracing.Tracer(exporters=[tracing.JsonLinesExporter(str(jsonl_path)),
+                                       tracing.JsonLinesExporter(str(otlp_path), format="otlp")])
+
+    trace = tracer.start_trace("analysis")
+    with trace.span("stock_history", "stage"):
+        tracing.record_cache("ohlcv", "hits")
+    trace.finish()
+    trace.finish()
+
+    spans = [json.loads(line) for line in jsonl_path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["analysis", "stock_history"]
+    assert spans[1]["parent_id"] == spans[0]["span_id"]
+
+    [request] = [json.loads(line) for line in otlp_path.read_text().splitlines()]
+    otlp_spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert otlp_spans[1]["parentSpanId"] == otlp_spans[0]["spanId"]
+    assert {"key": "cache.ohlcv.hits", "value": {"intValue": "1"}} in otlp_spans[1]["attributes"]
+
+
+def test_executor_records_a_span_per_stage():
+    def fetch():
+        with tracing.span("fetch_history", "tool"):
+            time.sleep(0.01)
+        return 1
+
+    tracer = tracing.Tracer()
+    trace = tracer.start_trace("analysis")
+    executor = AsyncDAGExecutor([Stage("history", fetch), Stage("analysis", lambda history: history + 1, inputs=("history",))],
+                                trace=trace)
+
+    async def consume():
+        return [result async for result in executor.run()]
+    asyncio.run(consume())
+
+    spans = {span.name: span for span in trace.spans}
+    assert spans["fetch_history"].parent_id == spans["history"].span_id
+    assert spans["analysis"].parent_id == trace.root.span_id
+    assert set(tracer.summary()) == {"stage:history", "stage:analysis", "tool:fetch_history"}
@@ -0,0 +1,363 @@
+import bisect
+import contextlib
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger("financial-agent")
+
+# Span the current code runs in (a stage, a tool call or an agent invocation)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# Latency histogram buckets: 1 ms to ~30 min, each ~5% wider than the previous one
+_BUCKET_GROWTH = 1.05
+_BUCKET_BOUNDS_MS = [math.pow(_BUCKET_GROWTH, i) for i in range(int(math.log(1_800_000, _BUCKET_GROWTH)) + 2)]
+
+# Token usage keys reported by Strands (Bedrock Converse usage) -> span attribute names
+TOKEN_ATTRIBUTES = {
+    "inputTokens": "tokens.input",
+    "outputTokens": "tokens.output",
+    "cacheReadInputTokens": "tokens.cache_read",
+    "cacheWriteInputTokens": "tokens.cache_write",
+}
+
+# Span attributes summed over a trace
+COUNTER_PREFIXES = ("tokens.", "cache.", "throttle.")
+
+
+class Span:
+    """
+    One timed operation of a request. Attributes hold token counts, cache outcomes and any
+    other facts worth keeping; counters are plain numeric attributes incremented with `add`.
+    """
+
+    def __init__(self, trace, name, kind, parent_id=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @property
+    def duration_ms(self):
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None
+
+    def set(self, **attributes):
+        with self._lock:
+            self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def add(self, key, amount=1):
+        with self._lock:
+            self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def end(self, error=None):
+        if self.end_ns is None:
+            self.end_ns = self.start_ns + int((time.perf_counter() - self._started) * 1e9)
+            self.error = error
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3) if self.end_ns else None,
+            "error": str(self.error) if self.error else None,
+            "attributes": dict(self.attributes),
+        }
+
+
+class Trace:
+    """
+    All spans of one request. The root span covers the whole request; `span()` opens a child
+    of the span the caller currently runs in, or of the root when there is none.
+    """
+
+    def __init__(self, tracer, name, attributes=None):
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex
+        self.root = Span(self, name, "request", attributes=attributes)
+        self.spans = [self.root]
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name, kind="internal", **attributes):
+        parent = _current_span.get()
+        parent_id = parent.span_id if parent is not None and parent.trace is self else self.root.span_id
+
+        span = Span(self, name, kind, parent_id, attributes)
+        with self._lock:
+            self.spans.append(span)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.end(error=e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self.tracer.histograms.record(f"{kind}:{name}", span.duration_ms)
+
+    def totals(self):
+        """
+        Sums the token, cache and throttle counters over all spans of the trace.
+        """
+
+        totals = {}
+        for span in self.spans[1:]:
+            for key, value in span.attributes.items():
+                if key.startswith(COUNTER_PREFIXES) and isinstance(value, (int, float)):
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def stage_totals(self):
+        """
+        Sums the token and throttle counters per stage over the spans nested under each stage span:
+        {stage name: {"tokens.input": ..., "tokens.cache_read": ..., "throttle.retried": ...}}.
+        """
+
+        spans = {span.span_id: span for span in self.spans}
+        totals = {}
+        for span in self.spans[1:]:
+            counters = {key: value for key, value in span.attributes.items()
+                        if key.startswith(("tokens.", "throttle.")) and isinstance(value, (int, float))}
+            stage = span
+            while stage is not None and stage.kind != "stage":
+                stage = spans.get(stage.parent_id)
+            if not counters or stage is None:
+                continue
+            stage_totals = totals.setdefault(stage.name, {})
+            for key, value in counters.items():
+                stage_totals[key] = stage_totals.get(key, 0) + value
+        return totals
+
+    def finish(self, error=None):
+        """
+        Ends the root span, rolls the totals up onto it and hands the trace to the exporters.
+        Only the first call has an effect.
+        """
+
+        if self.root.end_ns is not None:
+            return
+        self.root.set(**self.totals())
+        self.root.end(error=error)
+        self.tracer.histograms.record(f"request:{self.root.name}", self.root.duration_ms)
+        self.tracer.export(self)
+
+    def to_dict(self):
+        return {"trace_id": self.trace_id, "spans": [span.to_dict() for span in self.spans]}
+
+
+class LatencyHistograms:
+    """
+    Process-wide latency histograms, one per span name, with log-spaced buckets so memory stays
+    constant however many requests are recorded. Percentiles are accurate to about 5%.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, duration_ms):
+        if duration_ms is None:
+            return
+        bucket = bisect.bisect_left(_BUCKET_BOUNDS_MS, duration_ms)
+        with self._lock:
+            histogram = self._histograms.setdefault(name, {"counts": {}, "count": 0, "sum": 0.0, "max": 0.0})
+            histogram["counts"][bucket] = histogram["counts"].get(bucket, 0) + 1
+            histogram["count"] += 1
+            histogram["sum"] += duration_ms
+            histogram["max"] = max(histogram["max"], duration_ms)
+
+    @staticmethod
+    def _percentile(histogram, fraction):
+        rank = math.ceil(fraction * histogram["count"])
+        seen = 0
+        for bucket in sorted(histogram["counts"]):
+            seen += histogram["counts"][bucket]
+            if seen >= rank:
+                upper = _BUCKET_BOUNDS_MS[bucket] if bucket < len(_BUCKET_BOUNDS_MS) else histogram["max"]
+                return round(min(upper, histogram["max"]), 1)
+        return round(histogram["max"], 1)
+
+    def summary(self):
+        """
+        Returns {span name: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}.
+        """
+
+        with self._lock:
+            histograms = {name: {**h, "counts": dict(h["counts"])} for name, h in self._histograms.items()}
+
+        return {
+            name: {
+                "count": h["count"],
+                "mean_ms": round(h["sum"] / h["count"], 1),
+                "p50_ms": self._percentile(h, 0.50),
+                "p95_ms": self._percentile(h, 0.95),
+                "p99_ms": self._percentile(h, 0.99),
+                "max_ms": round(h["max"], 1),
+            }
+            for name, h in sorted(histograms.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+def to_otlp(trace, service_name="financial-agent"):
+    """
+    Converts a trace to the OTLP/JSON ExportTraceServiceRequest shape, which an OpenTelemetry
+    Collector (otlpjsonfile receiver) or any OTLP/HTTP JSON endpoint accepts as is.
+    """
+
+    def attribute(key, value):
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    spans = []
+    for span in trace.spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            # SPAN_KIND_SERVER for the request, SPAN_KIND_INTERNAL for everything inside it
+            "kind": 2 if span.kind == "request" else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+            "attributes": [attribute("span.kind", span.kind)] +
+                          [attribute(key, value) for key, value in sorted(span.attributes.items())],
+            "status": {"code": 2, "message": str(span.error)} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", service_name)]},
+            "scopeSpans": [{"scope": {"name": "financial-agent.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class JsonLinesExporter:
+    """
+    Appends finished traces to a file: one span per line ("jsonl") or one OTLP/JSON
+    ExportTraceServiceRequest per trace ("otlp").
+    """
+
+    def __init__(self, path, format="jsonl"):
+        if format not in ("jsonl", "otlp"):
+            raise ValueError(f"Unknown trace export format: {format}")
+        self.path = path
+        self.format = format
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __call__(self, trace):
+        if self.format == "otlp":
+            lines = [json.dumps(to_otlp(trace))]
+        else:
+            lines = [json.dumps(span.to_dict()) for span in trace.spans]
+
+        with self._lock, open(self.path, "a") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class Tracer:
+
+    def __init__(self, exporters=()):
+        self.exporters = list(exporters)
+        self.histograms = LatencyHistograms()
+
+    def start_trace(self, name, **attributes):
+        return Trace(self, name, attributes)
+
+    def export(self, trace):
+        for exporter in self.exporters:
+            try:
+                exporter(trace)
+            except Exception as e:
+                logger.info(f"⚠️ Trace export failed: {e}")
+
+    def summary(self):
+        return self.histograms.summary()
+
+
+@contextlib.contextmanager
+def span(name, kind="internal", **attributes):
+    """
+    Opens a child span of the span the caller runs in. Outside a traced request this
+    yields a detached span that is neither recorded nor exported.
+    """
+
+    parent = _current_span.get()
+    if parent is None:
+        yield Span(None, name, kind, attributes=attributes)
+        return
+
+    with parent.trace.span(name, kind, **attributes) as child:
+        yield child
+
+
+def current_span():
+    return _current_span.get()
+
+
+def record_tokens(usage):
+    """
+    Adds a Strands / Bedrock usage dict (inputTokens, outputTokens, cacheReadInputTokens, ...)
+    to the current span.
+    """
+
+    span = _current_span.get()
+    if span is None or not usage:
+        return
+    for key, attribute in TOKEN_ATTRIBUTES.items():
+        if usage.get(key):
+            span.add(attribute, usage[key])
+
+
+def record_throttle(outcome):
+    """
+    Counts a throttled model call ("retried", "exhausted") on the current span.
+    """
+
+    span = _current_span.get()
+    if span is not None:
+        span.add(f"throttle.{outcome}")
+
+
+def record_cache(cache_name, outcome):
+    """
+    Counts a cache lookup outcome ("hit", "miss", "coalesced", ...) on the current span.
+    """
+
+    span = _current_span.get()
+    if span is not None:
+        span.add(f"cache.{cache_name}.{outcome}")
@@ -1,7 +1,118 @@
 import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
 import boto3
 from botocore.config import Config
 import requests
+from requests.adapters import HTTPAdapter
+from symbol_index import SymbolIndex
+
+STOCK_SEARCH_URL = "https://query1.finance.yahoo.com/v1/finance/search"
+STOCK_SEARCH_TIMEOUT_SECONDS = float(os.environ.get("STOCK_SEARCH_TIMEOUT_SECONDS", 5))
+STOCK_SEARCH_CACHE_TTL_SECONDS = int(os.environ.get("STOCK_SEARCH_CACHE_TTL_SECONDS", 300))
+STOCK_SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("STOCK_SEARCH_CACHE_MAX_ENTRIES", 2048))
+AGENT_STREAM_CHUNK_BYTES = int(os.environ.get("AGENT_STREAM_CHUNK_BYTES", 64 * 1024))
+AGENT_STREAM_MAX_EVENT_BYTES = int(os.environ.get("AGENT_STREAM_MAX_EVENT_BYTES", 8 * 1024 * 1024))
+SYMBOL_INDEX_PATH = os.environ.get("SYMBOL_INDEX_PATH",
+                                   os.path.join(os.path.dirname(os.path.abspath(__file__)), "symbol_index.bin"))
+
+# Pooled keep-alive connections to Yahoo, reused by every invocation of a warm Lambda container
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=10))
+http_session.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/125.0.0.0 Safari/537.36"
+})
+
+
+def normalise_search_query(query):
+    return " ".join((query or "").lower().split())
+
+
+def matches_search_query(item, query):
+    """
+    True when every term of the normalised query starts a word of the result's symbol or names.
+    """
+
+    words = re.findall(r"[a-z0-9]+", " ".join(str(item.get(field) or "") for field in ("symbol", "shortname", "longname")).lower())
+    return all(any(word.startswith(term) for word in words) for term in re.findall(r"[a-z0-9]+", query))
+
+
+class TypeaheadCache:
+    """
+    LRU + TTL cache of search results by normalised query. A result is complete when Yahoo returned
+    fewer quotes than were asked for, i.e. every match of the query: a longer query starting with
+    it is then answered by filtering that result instead of calling Yahoo again.
+    """
+
+    def __init__(self, max_entries=STOCK_SEARCH_CACHE_MAX_ENTRIES, ttl_seconds=STOCK_SEARCH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fresh(self, key):
+        entry = self._entries.get(key)
+        if entry and entry["expires_at"] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry
+        self._entries.pop(key, None)
+        return None
+
+    def get(self, options, query):
+        """
+        Returns (results, cache status): "HIT" for a cached query, "PREFIX" when filtered from the
+        complete result of a shorter one, (None, "MISS") otherwise.
+        """
+
+        with self._lock:
+            entry = self._fresh((options, query))
+            if entry:
+                return entry["results"], "HIT"
+
+            for end in range(len(query) - 1, 0, -1):
+                entry = self._fresh((options, query[:end].rstrip()))
+                if entry and entry["complete"]:
+                    return [item for item in entry["results"] if matches_search_query(item, query)], "PREFIX"
+
+        return None, "MISS"
+
+    def put(self, options, query, results, complete):
+        with self._lock:
+            self._entries[(options, query)] = {
+                "results": results,
+                "complete": complete,
+                "expires_at": time.monotonic() + self.ttl_seconds,
+            }
+            self._entries.move_to_end((options, query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+search_cache = TypeaheadCache()
+
+# Local symbol index, opened on first search: None until then, False when there is none
+symbol_index = None
+
+
+def local_symbol_index():
+    global symbol_index
+
+    if symbol_index is None:
+        try:
+            symbol_index = SymbolIndex(SYMBOL_INDEX_PATH)
+            print(f"Symbol index loaded: {symbol_index.record_count} symbols")
+        except (OSError, ValueError) as e:
+            print(f"No local symbol index, searching Yahoo Finance only: {e}")
+            symbol_index = False
+
+    return symbol_index or None
+
 
 def search_stocks(
     query: str,
@@ -20,10 +131,30 @@ def search_stocks(
     enable_lists: bool = False,
     recommend_count: int = 5,
     enable_ccc_boost: bool = True,
-    enable_private_company: bool = True
+    enable_private_company: bool = True,
+    quotes_count: int = 10
 ):
+    """
+    Searches the local symbol index for equities matching the query, and Yahoo Finance when it has none.
+    Returns (results, cache status) where the status is "LOCAL" for an index answer, otherwise
+    "HIT", "PREFIX" or "MISS" (see TypeaheadCache).
+    """
 
-    url = "https://query1.finance.yahoo.com/v1/finance/search"
+    query = normalise_search_query(query)
+
+    index = local_symbol_index()
+    if index:
+        matches = index.search(query, limit=quotes_count)
+        if matches:
+            return [{
+                "exchange": match["exchange"],
+                "symbol": match["symbol"],
+                "shortname": match["shortname"],
+                "sector": match["sector"],
+                "longname": match["longname"],
+                "quote_type": "EQUITY",
+                "score": match["score"],
+            } for match in matches], "LOCAL"
 
     params = {
         "q": query,
@@ -43,15 +174,16 @@ def search_stocks(
         "recommendCount": recommend_count,
         "enableCccBoost": str(enable_ccc_boost).lower(),
         "enablePrivateCompany": str(enable_private_company).lower(),
+        "quotesCount": quotes_count,
     }
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/125.0.0.0 Safari/537.36"
-    }
+    # Every parameter but the query is part of the cache key
+    options = tuple(sorted((key, value) for key, value in params.items() if key != "q"))
+    results, cache_status = search_cache.get(options, query)
+    if results is not None:
+        return results, cache_status
 
-    response = requests.get(url, params=params, headers=headers)
+    response = http_session.get(STOCK_SEARCH_URL, params=params, timeout=STOCK_SEARCH_TIMEOUT_SECONDS)
     response.raise_for_status()
 
     data = response.json()
@@ -69,8 +201,80 @@ def search_stocks(
                 "score": item.get("score"),
             })
 
-    return results
+    search_cache.put(options, query, results, complete=len(data.get("quotes", [])) < quotes_count)
+
+    return results, cache_status
+
+
 
+def read_available(body, chunk_size=AGENT_STREAM_CHUNK_BYTES):
+    """
+    Yields the bytes of a streaming response as they arrive, at most chunk_size bytes per read.
+    """
+
+    # botocore's StreamingBody.read(n) blocks until n bytes have arrived; urllib3's read1 returns
+    # whatever is already there, so large reads do not delay the first event
+    raw = getattr(body, "_raw_stream", body)
+    read = getattr(raw, "read1", None) or raw.read
+    while chunk := read(chunk_size):
+        yield chunk
+
+
+def sse_event_data(event):
+    lines = [line.rstrip(b"\r") for line in event.split(b"\n")]
+    data = [line[5:].removeprefix(b" ") for line in lines if line.startswith(b"data:")]
+    return b"\n".join(data).decode("utf-8") if data else None
+
+
+def iter_sse_events(body, chunk_size=AGENT_STREAM_CHUNK_BYTES, max_event_bytes=AGENT_STREAM_MAX_EVENT_BYTES):
+    """
+    Yields the data of each server-sent event of the body as soon as the event is complete.
+    Only the event being received is buffered; an event larger than max_event_bytes raises ValueError.
+    """
+
+    buffer = bytearray()
+    for chunk in read_available(body, chunk_size):
+        # An event boundary may straddle two chunks
+        start = max(len(buffer) - 1, 0)
+        buffer += chunk
+
+        while (end := buffer.find(b"\n\n", start)) != -1:
+            data = sse_event_data(bytes(buffer[:end]))
+            del buffer[:end + 2]
+            start = 0
+            if data is not None:
+                yield data
+
+        if len(buffer) > max_event_bytes:
+            raise ValueError(f"Agent event larger than {max_event_bytes} bytes")
+
+    data = sse_event_data(bytes(buffer))
+    if data is not None:
+        yield data
+
+
+def invoke_agent(query_parameters, stream=None):
+    boto_config = Config(
+        connect_timeout=10,
+        read_timeout=900,
+        retries={"max_attempts": 1, "mode": "standard"}
+    )
+
+    client = boto3.client('bedrock-agentcore', region_name='us-east-1', config=boto_config)
+
+    payload = json.dumps({
+        "stock_name": query_parameters.get('stockname'),
+        "ticker_symbol": query_parameters.get('ticker_symbol'),
+        "actor_id": query_parameters.get('actor_id'),
+        "stream": query_parameters.get('stream') == 'true' if stream is None else stream
+    })
+
+    return client.invoke_agent_runtime(
+        agentRuntimeArn='',
+        runtimeSessionId='',  # Must be 33+ chars
+        payload=payload,
+        qualifier="DEFAULT"  # Optional
+    )
 
 
 def lambda_handler(event, context):
@@ -85,45 +289,21 @@ def lambda_handler(event, context):
 
     if "/search" in event.get('rawPath'):
         _q = query_parameters.get('_q')
-        search_results = search_stocks(query=_q)
+        search_results, cache_status = search_stocks(query=_q)
 
         return {
             "statusCode": 200,
             "message": "Success",
+            "headers": {"X-Cache": cache_status},
             "body": json.dumps(search_results)
         }
 
     else:
 
-        boto_config = Config(
-            connect_timeout=10,
-            read_timeout=900,
-            retries={"max_attempts": 1, "mode": "standard"}
-        )
-
-        client = boto3.client('bedrock-agentcore', region_name='us-east-1', config=boto_config)
-
-        payload = json.dumps({
-            "stock_name": query_parameters.get('stockname'),
-            "ticker_symbol": query_parameters.get('ticker_symbol'),
-            "actor_id": query_parameters.get('actor_id')
-        })
-
-        response = client.invoke_agent_runtime(
-            agentRuntimeArn='',
-            runtimeSessionId='',  # Must be 33+ chars
-            payload=payload,
-            qualifier="DEFAULT"  # Optional
-        )
+        response = invoke_agent(query_parameters)
 
         if "text/event-stream" in response.get("contentType", ""):
-            content = []
-            for line in response["response"].iter_lines(chunk_size=1):
-                if line:
-                    line = line.decode("utf-8")
-                    if line.startswith("data: "):
-                        line = line[6:]
-                        content.append(line)
+            content = list(iter_sse_events(response["response"]))
 
             return json.dumps({
                 "statusCode": 200,
@@ -151,4 +331,37 @@ def lambda_handler(event, context):
                 "statusCode": 200,
                 "message": "Success",
                 "response": json.dumps(response)
-            })
\ No newline at end of file
+            })
+
+
+def streaming_app(environ, start_response):
+    """
+    WSGI app for a response-streaming deployment (Lambda Web Adapter with a RESPONSE_STREAM function
+    URL): the agent's event stream is passed through to the client chunk by chunk as it arrives,
+    instead of being collected into one JSON response. /search answers as lambda_handler does.
+    """
+
+    path = environ.get("PATH_INFO", "")
+    query_parameters = {key: values[-1] for key, values in parse_qs(environ.get("QUERY_STRING", "")).items()}
+
+    if not query_parameters or "/search" in path:
+        response = lambda_handler({"rawPath": path, "queryStringParameters": query_parameters}, None)
+        start_response("200 OK" if response["statusCode"] == 200 else "400 Bad Request",
+                       [("Content-Type", "application/json")] + list(response.get("headers", {}).items()))
+        return [response["body"].encode("utf-8")]
+
+    response = invoke_agent(query_parameters, stream=True)
+
+    if "text/event-stream" in response.get("contentType", ""):
+        start_response("200 OK", [("Content-Type", "text/event-stream"), ("Cache-Control", "no-cache")])
+        return read_available(response["response"])
+
+    start_response("200 OK", [("Content-Type", response.get("contentType") or "application/json")])
+    return [chunk if isinstance(chunk, bytes) else chunk.encode("utf-8") for chunk in response.get("response", [])]
+
+
+if __name__ == "__main__":
+    # Entry point of the streaming deployment: the Lambda Web Adapter forwards requests to this port
+    from wsgiref.simple_server import make_server
+
+    make_server("0.0.0.0", int(os.environ.get("PORT", 8080)), streaming_app).serve_forever()
@@ -0,0 +1,344 @@
+import argparse
+import bisect
+import csv
+import heapq
+import mmap
+import re
+import struct
+import sys
+
+# File layout (little endian):
+#   header     MAGIC, record count, key count, record table offset, key table offset, top list count,
+#              top table offset
+#   records    "symbol\x1fshortname\x1flongname\x1fexchange\x1fsector\x1fscore" (UTF-8), located by the record table
+#   keys       uint32 record id, float32 score, uint8 is-symbol flag, uint16 length, normalised key bytes,
+#              located by the key table in sorted key order (symbol keys first among equal keys)
+#   top lists  uint16 prefix length, uint16 count, prefix bytes, then count x (uint32 record id, float32 score),
+#              the best-scored records of every prefix with more than MAX_SCANNED_KEYS keys, located by the
+#              top table in sorted prefix order
+# The tables let a search binary-search the mmapped file without loading or parsing it, and rank the
+# matching keys before decoding the records it returns.
+MAGIC = b"SYMIDX02"
+HEADER = struct.Struct("<8sIIIIII")
+OFFSET = struct.Struct("<I")
+KEY_ENTRY = struct.Struct("<IfBH")
+TOP_HEADER = struct.Struct("<HH")
+TOP_ENTRY = struct.Struct("<If")
+FIELDS = ("symbol", "shortname", "longname", "exchange", "sector", "score")
+SEPARATOR = "\x1f"
+
+# Keys a search scans for one prefix: bounds the work (and so the latency) of short, common prefixes,
+# whose best records are precomputed by build_index instead
+MAX_SCANNED_KEYS = 1000
+# Records precomputed per common prefix; larger limits scan every key of the prefix
+TOP_PREFIX_RECORDS = 50
+# Characters of a query a fuzzy match keeps as typed
+FUZZY_FIXED_PREFIX = 3
+
+
+def normalise(text):
+    return " ".join(re.findall(r"[a-z0-9]+", (text or "").lower()))
+
+
+def record_keys(record):
+    """
+    The keys a record is found by, as {key: is symbol}: its symbol (with and without the exchange
+    suffix), and its names from every word on, so "motors" finds "Tata Motors Ltd" as well as "tata".
+    """
+
+    keys = {}
+    for field in ("shortname", "longname"):
+        words = normalise(record.get(field)).split(" ")
+        keys.update((" ".join(words[i:]), False) for i in range(len(words)))
+
+    symbol = normalise(record["symbol"])
+    keys.update({symbol: True, symbol.split(" ")[0]: True})
+    keys.pop("", None)
+    return keys
+
+
+def _score(record):
+    try:
+        return float(record["score"] or 0.0)
+    except ValueError:
+        return 0.0
+
+
+def _best_records(keys, limit):
+    # [(record id, score)] of the best-scored records of (key, record id, is symbol, score) entries
+    scores = {}
+    for _, record_id, _, score in keys:
+        scores[record_id] = score
+    return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def top_prefixes(keys):
+    """
+    Returns {prefix: best records} for every prefix shared by more than MAX_SCANNED_KEYS of the
+    sorted (key, record id, is symbol, score) entries.
+    """
+
+    top = {}
+    ranges = [(b"", 0, len(keys))]
+    while ranges:
+        prefix, start, end = ranges.pop()
+        length = len(prefix) + 1
+        position = start
+        while position < end:
+            # Keys equal to the prefix have no longer prefix
+            if len(keys[position][0]) < length:
+                position += 1
+                continue
+            group = keys[position][0][:length]
+            group_end = position
+            while group_end < end and keys[group_end][0][:length] == group:
+                group_end += 1
+            if group_end - position > MAX_SCANNED_KEYS:
+                top[group] = _best_records(keys[position:group_end], TOP_PREFIX_RECORDS)
+                ranges.append((group, position, group_end))
+            position = group_end
+
+    return top
+
+
+def build_index(csv_path, index_path):
+    """
+    Builds the index file from a CSV dump with the columns symbol, shortname, longname, exchange, sector
+    and optionally score (higher ranks first) and quoteType (only EQUITY rows are kept).
+    Returns the number of records.
+    """
+
+    records = {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            symbol = (row.get("symbol") or "").strip()
+            if not symbol or (row.get("quoteType") or "EQUITY").upper() != "EQUITY":
+                continue
+            records[symbol] = {field: (row.get(field) or "").strip().replace(SEPARATOR, " ") for field in FIELDS}
+
+    records = sorted(records.values(), key=lambda record: record["symbol"])
+    # Symbol keys first among equal keys, so an exact symbol lookup stops at the first name key
+    keys = sorted(((key.encode("utf-8"), record_id, is_symbol, _score(record))
+                   for record_id, record in enumerate(records) for key, is_symbol in record_keys(record).items()),
+                  key=lambda entry: (entry[0], not entry[2], entry[1]))
+    top = top_prefixes(keys)
+
+    record_blobs = [SEPARATOR.join(record[field] for field in FIELDS).encode("utf-8") for record in records]
+    key_blobs = [KEY_ENTRY.pack(record_id, score, is_symbol, len(key)) + key for key, record_id, is_symbol, score in keys]
+    top_blobs = [TOP_HEADER.pack(len(prefix), len(best)) + prefix + b"".join(TOP_ENTRY.pack(*item) for item in best)
+                 for prefix, best in sorted(top.items())]
+
+    record_table = HEADER.size
+    record_data = record_table + OFFSET.size * (len(records) + 1)
+    key_table = record_data + sum(len(blob) for blob in record_blobs)
+    key_data = key_table + OFFSET.size * len(keys)
+    top_table = key_data + sum(len(blob) for blob in key_blobs)
+    top_data = top_table + OFFSET.size * len(top_blobs)
+
+    with open(index_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), len(keys), record_table, key_table, len(top_blobs), top_table))
+
+        offset = record_data
+        for blob in record_blobs + [b""]:
+            f.write(OFFSET.pack(offset))
+            offset += len(blob)
+        f.write(b"".join(record_blobs))
+
+        offset = key_data
+        for blob in key_blobs:
+            f.write(OFFSET.pack(offset))
+            offset += len(blob)
+        f.write(b"".join(key_blobs))
+
+        offset = top_data
+        for blob in top_blobs:
+            f.write(OFFSET.pack(offset))
+            offset += len(blob)
+        f.write(b"".join(top_blobs))
+
+    return len(records)
+
+
+def one_edit_variants(query, fixed=FUZZY_FIXED_PREFIX):
+    """
+    The ways query can be edited once after its first `fixed` characters, as (edit position, variant)
+    with None for the character an insertion or substitution puts at that position.
+    """
+
+    for i in range(fixed, len(query)):
+        yield i, query[:i] + query[i + 1:]
+        yield i, None
+        if i + 1 < len(query):
+            yield i, query[:i] + query[i + 1:i + 2] + query[i:i + 1] + query[i + 2:]
+    yield len(query), None
+
+
+class _Keys:
+    # Sequence view of the sorted keys for bisect
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.key_count
+
+    def __getitem__(self, position):
+        return self.index.key(position)[0]
+
+
+class _TopPrefixes:
+    # Sequence view of the sorted prefixes of the top lists for bisect
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.top_count
+
+    def __getitem__(self, position):
+        return self.index.top(position)[0]
+
+
+class SymbolIndex:
+    """
+    Read-only symbol index memory-mapped from a file written by build_index. Opening it reads
+    only the header; searches binary-search the sorted keys in place.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.record_count, self.key_count, self._record_table, self._key_table, self.top_count, \
+            self._top_table = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a symbol index")
+        self._keys = _Keys(self)
+        self._top_prefixes = _TopPrefixes(self)
+
+    def key(self, position):
+        """
+        Returns (key bytes, record id, score, is symbol) of the key at a position of the sorted keys.
+        """
+
+        offset, = OFFSET.unpack_from(self._map, self._key_table + OFFSET.size * position)
+        record_id, score, is_symbol, length = KEY_ENTRY.unpack_from(self._map, offset)
+        start = offset + KEY_ENTRY.size
+        return self._map[start:start + length], record_id, score, is_symbol
+
+    def top(self, position):
+        """
+        Returns (prefix bytes, [(record id, score)]) of the top list at a position of the sorted prefixes.
+        """
+
+        offset, = OFFSET.unpack_from(self._map, self._top_table + OFFSET.size * position)
+        length, count = TOP_HEADER.unpack_from(self._map, offset)
+        start = offset + TOP_HEADER.size
+        best = start + length
+        return self._map[start:best], [TOP_ENTRY.unpack_from(self._map, best + TOP_ENTRY.size * i) for i in range(count)]
+
+    def record(self, record_id):
+        start, end = struct.unpack_from("<II", self._map, self._record_table + OFFSET.size * record_id)
+        values = self._map[start:end].decode("utf-8").split(SEPARATOR)
+        record = dict(zip(FIELDS, values))
+        record["score"] = _score(record)
+        return record
+
+    def _range(self, prefix, start=0, end=None):
+        # Positions of the keys starting with the prefix; keys are ASCII, so b"\xff" sorts after all of them
+        end = self.key_count if end is None else end
+        start = bisect.bisect_left(self._keys, prefix, start, end)
+        return start, bisect.bisect_left(self._keys, prefix + b"\xff", start, end)
+
+    def _best(self, prefix, limit, start=0, end=None):
+        # [(record id, score)] of the best-scored records with a key starting with the prefix
+        start, end = self._range(prefix, start, end)
+        if end - start > MAX_SCANNED_KEYS and limit <= TOP_PREFIX_RECORDS:
+            position = bisect.bisect_left(self._top_prefixes, prefix)
+            if position < self.top_count:
+                top_prefix, best = self.top(position)
+                if top_prefix == prefix:
+                    return best
+
+        return [(record_id, score) for _, record_id, score, _ in map(self.key, range(start, end))]
+
+    def _exact_symbols(self, query):
+        # [(record id, score)] of the records whose symbol is the query
+        start, end = self._range(query)
+        exact = []
+        for key, record_id, score, is_symbol in map(self.key, range(start, end)):
+            if key != query or not is_symbol:
+                break
+            exact.append((record_id, score))
+        return exact
+
+    def _next_characters(self, prefix, start, end):
+        # The characters following the prefix in the keys between start and end
+        position = start
+        while position < end:
+            key = self.key(position)[0]
+            if len(key) == len(prefix):
+                position += 1
+                continue
+            character = key[len(prefix):len(prefix) + 1]
+            yield character
+            position = bisect.bisect_left(self._keys, prefix + character + b"\xff", position, end)
+
+    def _fuzzy(self, query, limit):
+        # Best records with a key starting within one edit of the query, keeping its first characters
+        best = []
+        for i, variant in one_edit_variants(query):
+            start, end = self._range(query[:i])
+            if start == end:
+                # Nothing shares the query up to the edit, nor up to any later one
+                break
+            if variant is not None:
+                best += self._best(variant, limit, start, end)
+                continue
+            for character in self._next_characters(query[:i], start, end):
+                # Substitution, then insertion
+                if character != query[i:i + 1]:
+                    best += self._best(query[:i] + character + query[i + 1:], limit, start, end)
+                best += self._best(query[:i] + character + query[i:], limit, start, end)
+        return best
+
+    def search(self, query, limit=10, fuzzy=True):
+        """
+        Returns up to `limit` records whose symbol or name starts with the query (any word of the
+        name), or within one edit of it when nothing matches exactly. An exact symbol match ranks
+        first, then higher scores, like Yahoo's search ordering.
+        """
+
+        query = normalise(query).encode("utf-8")
+        if not query:
+            return []
+
+        matches = self._best(query, limit)
+        if not matches and fuzzy and len(query) > FUZZY_FIXED_PREFIX:
+            matches = self._fuzzy(query, limit)
+
+        # Best rank per record: (not an exact symbol match, -score)
+        ranks = {record_id: (True, -score) for record_id, score in matches}
+        for record_id, score in self._exact_symbols(query) if matches else ():
+            ranks[record_id] = (False, -score)
+
+        best = heapq.nsmallest(limit, ranks, key=lambda record_id: (ranks[record_id], record_id))
+        return [self.record(record_id) for record_id in best]
+
+    def close(self):
+        self._map.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the local ticker symbol index from a CSV dump")
+    parser.add_argument("csv_path", help="CSV with symbol, shortname, longname, exchange, sector[, score, quoteType]")
+    parser.add_argument("index_path", nargs="?", default="symbol_index.bin")
+    args = parser.parse_args(argv)
+
+    count = build_index(args.csv_path, args.index_path)
+    print(f"✅ Indexed {count} symbols into {args.index_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend modules are deployed flat next to invoke.py, so make them importable by name
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
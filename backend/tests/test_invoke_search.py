@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+import invoke
+import symbol_index
+
+QUOTES = [
+    {"symbol": "TATAMOTORS.NS", "shortname": "TATA MOTORS LTD", "quoteType": "EQUITY"},
+    {"symbol": "TATASTEEL.NS", "shortname": "TATA STEEL LIMITED", "quoteType": "EQUITY"},
+    {"symbol": "TTM", "shortname": "Tata Motors Limited", "quoteType": "EQUITY"},
+    {"symbol": "^TATA", "shortname": "Tata index", "quoteType": "INDEX"},
+]
+
+
+class FakeResponse:
+
+    def __init__(self, quotes):
+        self.quotes = quotes
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"quotes": self.quotes}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    queries = []
+
+    def get(url, params, timeout):
+        queries.append(params["q"])
+        quotes = [quote for quote in QUOTES if invoke.matches_search_query(quote, params["q"])]
+        return FakeResponse(quotes[:params["quotesCount"]])
+
+    monkeypatch.setattr(invoke.http_session, "get", get)
+    monkeypatch.setattr(invoke, "symbol_index", False)
+    monkeypatch.setattr(invoke, "search_cache", invoke.TypeaheadCache(max_entries=8, ttl_seconds=60))
+    return queries
+
+
+def _search(query):
+    response = invoke.lambda_handler({"rawPath": "/search", "queryStringParameters": {"_q": query}}, None)
+    return [item["symbol"] for item in json.loads(response["body"])], response["headers"]["X-Cache"]
+
+
+def test_repeated_queries_are_served_from_the_cache(upstream):
+    assert _search("Tata Motors") == (["TATAMOTORS.NS", "TTM"], "MISS")
+    assert _search("  tata   MOTORS ") == (["TATAMOTORS.NS", "TTM"], "HIT")
+    assert upstream == ["tata motors"]
+
+
+def test_longer_prefix_is_filtered_from_a_complete_result(upstream):
+    assert _search("tata") == (["TATAMOTORS.NS", "TATASTEEL.NS", "TTM"], "MISS")
+    assert _search("tata m") == (["TATAMOTORS.NS", "TTM"], "PREFIX")
+    assert _search("tata st") == (["TATASTEEL.NS"], "PREFIX")
+    assert upstream == ["tata"]
+
+
+def test_truncated_result_is_not_used_for_longer_prefixes(upstream):
+    symbols, _ = invoke.search_stocks("ta", quotes_count=2)
+    assert len(symbols) == 2
+
+    invoke.search_stocks("tat", quotes_count=2)
+    assert upstream == ["ta", "tat"]
+
+
+def test_entries_expire(upstream, monkeypatch):
+    _search("tata")
+    now = invoke.time.monotonic()
+    monkeypatch.setattr(invoke.time, "monotonic", lambda: now + 61)
+
+    assert _search("tata")[1] == "MISS"
+    assert upstream == ["tata", "tata"]
+
+
+
+def test_local_symbol_index_answers_before_yahoo(upstream, monkeypatch, tmp_path):
+    csv_path, index_path = tmp_path / "symbols.csv", tmp_path / "symbol_index.bin"
+    csv_path.write_text("symbol,shortname,longname,exchange,sector,score\n"
+                        "TATAMOTORS.NS,TATA MOTORS LTD,Tata Motors Limited,NSI,Consumer Cyclical,20000\n")
+    symbol_index.build_index(str(csv_path), str(index_path))
+    monkeypatch.setattr(invoke, "symbol_index", symbol_index.SymbolIndex(str(index_path)))
+
+    assert _search("tata mot") == (["TATAMOTORS.NS"], "LOCAL")
+    assert _search("tata steel") == (["TATASTEEL.NS"], "MISS")
+    assert upstream == ["tata steel"]
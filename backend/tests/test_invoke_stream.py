@@ -0,0 +1,83 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from botocore.response import StreamingBody
+
+import invoke
+
+EVENTS = [f"data: {json.dumps({'event': name, 'data': 'x' * 300})}\n\n".encode() for name in ("quote", "summary", "complete")]
+
+
+class TrickleStream:
+    """
+    Raw HTTP response body delivering one server-sent event every `interval_ms`, with urllib3's
+    read semantics: read1(n) returns what has already arrived, waiting only when nothing has.
+    """
+
+    def __init__(self, events, interval_ms=0):
+        self.events = list(events)
+        self.interval = interval_ms / 1000
+        self.pending = b""
+
+    def read1(self, amt=-1):
+        if not self.pending and self.events:
+            time.sleep(self.interval)
+            self.pending = self.events.pop(0)
+        size = len(self.pending) if amt is None or amt < 0 else amt
+        chunk, self.pending = self.pending[:size], self.pending[size:]
+        return chunk
+
+    def read(self, amt=None):
+        data = b""
+        while amt is None or len(data) < amt:
+            chunk = self.read1(-1 if amt is None else amt - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+
+def _body(events=EVENTS, interval_ms=0):
+    return StreamingBody(TrickleStream(events, interval_ms=interval_ms), None)
+
+
+def test_events_are_parsed_across_chunk_boundaries():
+    events = EVENTS + [b": keep-alive\n\n", b"data: first line\ndata: second line\n\n"]
+
+    parsed = list(invoke.iter_sse_events(_body(events), chunk_size=7))
+
+    assert [json.loads(data)["event"] for data in parsed[:3]] == ["quote", "summary", "complete"]
+    assert parsed[3:] == ["first line\nsecond line"]
+
+
+def test_oversized_event_is_rejected():
+    with pytest.raises(ValueError):
+        list(invoke.iter_sse_events(_body(), chunk_size=64, max_event_bytes=128))
+
+
+def test_first_event_arrives_before_the_stream_ends():
+    started = time.perf_counter()
+    chunks = []
+    for chunk in invoke.read_available(_body(interval_ms=50)):
+        chunks.append((time.perf_counter() - started, chunk))
+
+    assert b"".join(chunk for _, chunk in chunks) == b"".join(EVENTS)
+    assert chunks[0][0] < 0.1 < chunks[-1][0]
+
+
+def test_streaming_app_passes_the_event_stream_through(monkeypatch):
+    monkeypatch.setattr(invoke.boto3, "client", lambda *args, **kwargs: SimpleNamespace(
+        invoke_agent_runtime=lambda **kwargs: {"contentType": "text/event-stream", "response": _body()}))
+    statuses = []
+
+    chunks = invoke.streaming_app({"PATH_INFO": "/analyse", "QUERY_STRING": "stockname=Apple&ticker_symbol=AAPL"},
+                                  lambda status, headers: statuses.append((status, dict(headers))))
+
+    assert b"".join(chunks) == b"".join(EVENTS)
+    assert statuses == [("200 OK", {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})]
+
+    handled = json.loads(invoke.lambda_handler({"rawPath": "/analyse", "queryStringParameters": {"stockname": "Apple"}}, None))
+    assert [json.loads(data)["event"] for data in handled["response"]] == ["quote", "summary", "complete"]
+
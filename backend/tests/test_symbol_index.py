@@ -0,0 +1,78 @@
+import time
+
+import pytest
+
+import symbol_index
+
+ROWS = [
+    ("TATAMOTORS.NS", "TATA MOTORS LTD", "Tata Motors Limited", "NSI", "Consumer Cyclical", "20000", "EQUITY"),
+    ("TTM", "Tata Motors Limited", "Tata Motors Limited", "NYQ", "Consumer Cyclical", "30000", "EQUITY"),
+    ("TATASTEEL.NS", "TATA STEEL LIMITED", "Tata Steel Limited", "NSI", "Basic Materials", "25000", "EQUITY"),
+    ("TATA", "Tata index", "", "NSI", "", "99999", "INDEX"),
+    ("AAPL", "Apple Inc.", "Apple Inc.", "NMS", "Technology", "90000", "EQUITY"),
+    ("APLE", "Apple Hospitality REIT, Inc.", "Apple Hospitality REIT, Inc.", "NYQ", "Real Estate", "100", "EQUITY"),
+]
+
+
+def _open_index(tmp_path, rows):
+    csv_path, index_path = tmp_path / "symbols.csv", tmp_path / "symbol_index.bin"
+    lines = ["symbol,shortname,longname,exchange,sector,score,quoteType"] + [",".join(f'"{value}"' for value in row) for row in rows]
+    csv_path.write_text("\n".join(lines) + "\n")
+
+    assert symbol_index.main([str(csv_path), str(index_path)]) == 0
+    return symbol_index.SymbolIndex(str(index_path))
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = _open_index(tmp_path, ROWS)
+    yield index
+    index.close()
+
+
+def _symbols(records):
+    return [record["symbol"] for record in records]
+
+
+def test_prefix_matches_symbols_and_any_word_of_the_name(index):
+    assert index.record_count == 5
+    assert _symbols(index.search("tata")) == ["TTM", "TATASTEEL.NS", "TATAMOTORS.NS"]
+    assert _symbols(index.search("Tata  Mot")) == ["TTM", "TATAMOTORS.NS"]
+    assert _symbols(index.search("steel")) == ["TATASTEEL.NS"]
+    assert _symbols(index.search("tatamotors")) == ["TATAMOTORS.NS"]
+
+
+def test_exact_symbol_ranks_first_then_score(index):
+    assert _symbols(index.search("aapl")) == ["AAPL"]
+    assert _symbols(index.search("apple")) == ["AAPL", "APLE"]
+    assert _symbols(index.search("aple")) == ["APLE"]
+
+
+def test_fuzzy_match_when_nothing_starts_with_the_query(index):
+    assert _symbols(index.search("tata motrs")) == ["TTM", "TATAMOTORS.NS"]
+    assert _symbols(index.search("appel")) == ["AAPL", "APLE"]
+    assert index.search("microsoft") == []
+    assert index.search("tata motrs", fuzzy=False) == []
+
+
+def test_search_is_fast(index):
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.search("tata m")
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+def test_best_match_is_found_past_the_scanned_keys(tmp_path):
+    # The best-scored match sorts after more than MAX_SCANNED_KEYS keys sharing its first characters
+    rows = [(f"ABC{i:04d}", "", "", "NMS", "", "1", "EQUITY") for i in range(symbol_index.MAX_SCANNED_KEYS + 100)]
+    rows.append(("ABCZ", "Abcz Systems", "Abcz Systems Inc", "NMS", "Technology", "500", "EQUITY"))
+    index = _open_index(tmp_path, rows)
+
+    try:
+        assert index.top_count > 0
+        for query in ("a", "ab", "abc"):
+            assert _symbols(index.search(query, limit=3))[0] == "ABCZ"
+        assert _symbols(index.search("abcy systems")) == ["ABCZ"]
+        assert _symbols(index.search("abc0042")) == ["ABC0042"]
+    finally:
+        index.close()